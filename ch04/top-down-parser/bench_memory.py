@@ -0,0 +1,75 @@
+"""
+Benchmark: peak memory of a large parsed batch, with and without interning.
+
+Parses N expressions drawn from a small set of realistic formulas (so
+identifiers and sub-expressions repeat heavily, as in real feeds) and keeps
+every tree alive, measuring allocations with tracemalloc:
+
+    plain      every tree owns its own nodes and tokens
+    leaves     NodeInterner(share_subtrees=False): shared tokens and leaves
+    shared     NodeInterner(share_subtrees=True): whole subtrees shared too
+
+Times include tracemalloc's own overhead and are only comparable with each
+other.
+
+Usage:    python bench_memory.py [--count N] [--lexer regex]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from parser import LEXERS, NodeInterner, Parser
+
+NAMES = ["sum", "total", "qty", "price", "tax", "discount", "shipping", "count"]
+TEMPLATES = [
+    "({a} + 47) / {b}",
+    "{a} * {b} - {c}",
+    "({a} + {b}) * (1 + {c})",
+    "{a} * 100 / ({b} + {c})",
+]
+
+def generate(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(**dict(zip("abc", rng.sample(NAMES, 3))))
+            for _ in range(count)]
+
+def measure(texts, lexer, interner):
+    tracemalloc.start()
+    start = time.perf_counter()
+    trees = []
+    for text in texts:
+        tree = Parser.from_text(text, lexer).parse()
+        trees.append(interner.intern(tree) if interner else tree)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return trees, current, peak, elapsed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--count", type=int, default=1_000_000)
+    arg_parser.add_argument("--lexer", choices=sorted(LEXERS), default="regex")
+    args = arg_parser.parse_args()
+
+    texts = generate(args.count)
+    modes = {
+        "plain": None,
+        "leaves": NodeInterner(share_subtrees=False),
+        "shared": NodeInterner(share_subtrees=True),
+    }
+
+    print(f"{args.count:,} expressions")
+    print(f"{'mode':<8} {'retained (MB)':>14} {'peak (MB)':>10} {'time (s)':>9}")
+    print("-" * 44)
+    baseline = None
+    for mode, interner in modes.items():
+        trees, current, peak, elapsed = measure(texts, args.lexer, interner)
+        ratio = f"   {baseline / peak:.1f}x smaller peak" if baseline else ""
+        baseline = baseline or peak
+        print(f"{mode:<8} {current / 1e6:14.1f} {peak / 1e6:10.1f} {elapsed:9.2f}{ratio}")
+        del trees
+
+if __name__ == "__main__":
+    main()
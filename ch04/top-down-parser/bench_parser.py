@@ -0,0 +1,180 @@
+"""
+Benchmark suite for the lexers and parsers in parser.py.
+
+Every workload is a fixed, generated list of expressions (seeded, so runs
+are reproducible). Each one is measured in three separate phases:
+
+    lex      text -> token list                     (per lexer engine)
+    parse    token list -> AST, tokens replayed     (per parser engine)
+    repr     AST -> string
+
+and reported as seconds (best of --repeat), tokens/s, nodes/s and the peak
+bytes allocated during the phase (tracemalloc, measured in a separate run so
+it does not distort the timings).
+
+Workloads (n = --size):
+    flat         x0 + x1 * 2 - x2 / 3 + ...          n operands, no nesting
+    nested       (1 + (1 + (1 + ... 1)))              n levels of parentheses
+    identifiers  n identifiers of 200 characters each
+    integers     n integer literals of 1000 digits each
+    mixed        n short real-world formulas (see bench_memory.py)
+
+flat, identifiers and integers spread their n operands over expressions of
+OPERANDS operands each: one chain of n operands would be a left spine n
+levels deep, which repr() cannot print, so only nested is deep on purpose.
+The recursive parser needs three Python frames per parenthesis level, and
+repr() one frame per tree level, so both report RecursionError on nested;
+the precedence parser keeps its state on explicit stacks.
+
+--probe additionally runs every workload once through the Probe hooks on
+get_next_token/eat and prints the call counts and times.
+
+Usage:    python bench_parser.py [--size N] [--repeat R] [--workloads a,b] [--probe]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bench_memory import generate as mixed_formulas
+from parser import LEXERS, PARSERS, BinOp, Probe, TokenType
+
+OPS = "+*-/"
+OPERANDS = 100  # operands per expression of the flat-shaped workloads
+
+def expressions(operands, join):
+    """'operands' joined into expressions of OPERANDS operands each."""
+    return [join(operands[i:i + OPERANDS]) for i in range(0, len(operands), OPERANDS)]
+
+def flat(n):
+    def join(names):
+        return " ".join(f"{name} {OPS[i % 4]}" for i, name in enumerate(names[:-1])) \
+               + f" {names[-1]}"
+    return expressions([f"x{i}" for i in range(n)], join)
+
+def nested(n):
+    return ["(1 + " * n + "1" + ")" * n]
+
+def identifiers(n):
+    return expressions([f"{'v' * 195}{i:05d}" for i in range(n)], " + ".join)
+
+def integers(n):
+    return expressions([str(10 ** 999 + i) for i in range(n)], " * ".join)
+
+def mixed(n):
+    return mixed_formulas(n, seed=42)
+
+WORKLOADS = {
+    "flat": flat,
+    "nested": nested,
+    "identifiers": identifiers,
+    "integers": integers,
+    "mixed": mixed,
+}
+
+class TokenReplay:
+    """A 'lexer' that hands out already-lexed tokens, to time parsing alone."""
+    def __init__(self, tokens):
+        self.get_next_token = iter(tokens).__next__
+
+def lex(lexer_cls, text):
+    lexer = lexer_cls(text)
+    tokens = [lexer.get_next_token()]
+    while tokens[-1].type != TokenType.EOF:
+        tokens.append(lexer.get_next_token())
+    return tokens
+
+def count_nodes(tree):
+    count, stack = 0, [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+    return count
+
+def measure(fn, repeat):
+    """Return (result, best seconds, peak bytes) or None on RecursionError."""
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+            del result
+        tracemalloc.start()
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    except RecursionError:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return None
+    return result, best, peak
+
+def row(workload, phase, engine, measured, tokens, nodes):
+    if measured is None:
+        print(f"{workload:<12} {phase:<6} {engine:<11} {'RecursionError':>10}")
+        return
+    _, seconds, peak = measured
+    node_rate = f"{nodes / seconds:14,.0f}" if nodes else f"{'-':>14}"
+    print(f"{workload:<12} {phase:<6} {engine:<11} {seconds:10.4f} "
+          f"{tokens / seconds:14,.0f} {node_rate} {peak / 1024:12,.0f}")
+
+def run_workload(name, texts, repeat):
+    # --- lex ---
+    token_lists = None
+    for engine, lexer_cls in LEXERS.items():
+        measured = measure(lambda: [lex(lexer_cls, text) for text in texts], repeat)
+        token_lists = token_lists or measured[0]
+        tokens = sum(len(tokens) - 1 for tokens in token_lists)  # minus EOF
+        row(name, "lex", engine, measured, tokens, 0)
+
+    # --- parse (from replayed tokens) ---
+    trees = None
+    nodes = 0
+    for engine, parser_cls in PARSERS.items():
+        measured = measure(lambda: [parser_cls(TokenReplay(tokens)).parse()
+                                    for tokens in token_lists], repeat)
+        if measured is not None and trees is None:
+            trees = measured[0]
+            nodes = sum(count_nodes(tree) for tree in trees)
+        row(name, "parse", engine, measured, tokens, nodes)
+
+    # --- repr ---
+    measured = measure(lambda: [repr(tree) for tree in trees], repeat)
+    row(name, "repr", "-", measured, tokens, nodes)
+
+def run_probe(name, texts):
+    for engine in PARSERS:
+        probe = Probe()
+        try:
+            for text in texts:
+                PARSERS[engine].from_text(text, "regex", probe=probe).parse()
+        except RecursionError:
+            print(f"[probe] {name} / {engine}: RecursionError")
+            continue
+        print(f"[probe] {name} / {engine} (regex lexer)")
+        print(probe.report())
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--size", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    arg_parser.add_argument("--probe", action="store_true")
+    args = arg_parser.parse_args()
+
+    print(f"size={args.size:,}  repeat={args.repeat}")
+    print(f"{'workload':<12} {'phase':<6} {'engine':<11} {'seconds':>10} "
+          f"{'tokens/s':>14} {'nodes/s':>14} {'peak KiB':>12}")
+    print("-" * 84)
+    for name in args.workloads.split(","):
+        texts = WORKLOADS[name](args.size)
+        run_workload(name, texts, args.repeat)
+        if args.probe:
+            run_probe(name, texts)
+
+if __name__ == "__main__":
+    main()
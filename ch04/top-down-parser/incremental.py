@@ -0,0 +1,276 @@
+"""
+Incremental re-parsing for edited expressions.
+
+An editor sends small edits (offset, deleted length, inserted text) to a long
+expression. Re-lexing and re-parsing everything from position 0 each time
+wastes work: almost all tokens and subtrees are unchanged.
+
+IncrementalParser keeps three things between edits:
+
+1. The token list (with the start offset of each token). An edit re-lexes
+   only from the token before the edit until the new tokens line up again
+   with old token boundaries.
+
+2. A memo table with one slot per token: memo[i][kind] records the result
+   of calling expr/term/factor at token i (its node, how many tokens it
+   consumed, and which calls it made). This is the recursive-descent parser
+   of parser.py with memoization ("packrat" style).
+
+3. The memo entries form the derivation tree of the current parse. After
+   an edit, only entries whose tokens (plus one token of lookahead) overlap
+   the damaged range are thrown away. Everything else keeps its node, so
+   the re-parse reuses whole untouched subtrees and only rebuilds the
+   nodes on the path from the edit to the root.
+
+Parsing work is proportional to the edit plus the depth of the edited spot
+(a long flat chain like a + b + c + ... is one deep left spine, so edits near
+its start rebuild that spine). Splicing the text and shifting the offsets of
+later tokens are still linear, but those are single bulk list/str copies.
+
+Rebuilt nodes are ordinary BinOp/Num/Var, and the tree is identical to a
+full parse.
+
+An editor's buffer is invalid for a moment during most edits, so invalid
+text costs no more than valid text. The error (the one Parser gives: an
+unknown character becomes an error token that raises the Lexer Error when
+the parse reaches it) is kept in 'error', not raised, and result() raises
+it; 'tree' keeps the last valid tree. The memo also survives: entries the
+failed parse completed, and those the edit did not touch, are kept for the
+edit that makes the text valid again.
+
+Usage:
+    doc = IncrementalParser("(sum + 47) / total")
+    doc.edit(7, 2, "48")          # replace "47" with "48"
+    print(doc.tree)               # ((Var(sum) + 48) / Var(total))
+    doc.edit(0, 1, "")            # "sum + 48) / total": returns None
+    doc.result()                  # raises the Parser Error
+"""
+
+from bisect import bisect_right
+
+from parser import BinOp, Num, RegexLexer, Token, TokenType, Var
+
+class Entry:
+    """Memoized result of one expr/term/factor call at some token slot."""
+    __slots__ = ("kind", "node", "length", "children", "gen")
+
+    def __init__(self, kind, node, length, children, gen):
+        self.kind = kind
+        self.node = node
+        self.length = length      # tokens consumed (lookahead not included)
+        self.children = children  # [(slot offset from this entry, Entry)]
+        self.gen = gen            # last parse generation that used this entry
+
+# Token type of a character the lexer does not know
+UNKNOWN = "UNKNOWN"
+
+class IncrementalParser:
+    def __init__(self, text):
+        self.gen = 0
+        self.tree = None   # tree of the last valid text
+        self.error = None  # exception of the last parse, if the text is invalid
+        self.reset(text)
+
+    def result(self):
+        """The tree of the current text, or raise the error parsing it gave."""
+        if self.error is not None:
+            raise self.error
+        return self.tree
+
+    # -------------------------------------------------------------------------
+    # Lexing
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def scan(text, pos=0):
+        """Yield (start, Token) pairs from 'pos', ending with EOF."""
+        types = RegexLexer.TOKEN_TYPES
+        for m in RegexLexer.master_re(text).finditer(text, pos):
+            kind = m.lastgroup
+            yield m.start(kind), Token(types.get(kind, UNKNOWN), m.group(kind))
+        yield len(text), Token(TokenType.EOF, None)
+
+    def reset(self, text):
+        """Full lex and parse of 'text'."""
+        self.text = text
+        scanned = list(self.scan(text))
+        self.starts = [start for start, _ in scanned]
+        self.tokens = [token for _, token in scanned]
+        self.memo = [{} for _ in self.tokens]
+        self.roots = []  # (slot, entry): every memo entry is under one of these
+        return self.parse()
+
+    def parse(self):
+        """
+        Re-parse using the memo. On error, record it and keep the memo
+        entries (see edit()); the previous tree stays in 'tree'.
+        """
+        self.fresh = []  # (slot, entry) made by this parse
+        try:
+            root = self.reparse()
+        except Exception as e:
+            self.error = e
+            self.roots += self.fresh
+            return None
+        self.error = None
+        self.roots = [(0, root)] if root else []
+        self.tree = root.node if root else None
+        return self.tree
+
+    # -------------------------------------------------------------------------
+    # Editing
+    # -------------------------------------------------------------------------
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Replace text[offset:offset + deleted] with 'inserted' and return the
+        new tree, or None if the new text is invalid (see error and result()).
+        """
+        old_text = self.text
+        if not 0 <= offset <= offset + deleted <= len(old_text):
+            raise ValueError("edit range outside of text")
+        text = old_text[:offset] + inserted + old_text[offset + deleted:]
+
+        starts, tokens = self.starts, self.tokens
+        delta = len(inserted) - deleted
+
+        # Damaged old tokens: everything touching the edit, widened by one
+        # token on each side because neighbours can merge ("ab" + "c").
+        first = max(0, bisect_right(starts, offset) - 2)
+        last = min(len(tokens), bisect_right(starts, offset + deleted) + 1)
+
+        # Re-lex from the first damaged token until a new token starts where
+        # an old, undamaged token (shifted by delta) used to start; from that
+        # point on the remaining text and therefore the tokens are the same.
+        new_starts, new_tokens = [], []
+        edit_end = offset + len(inserted)
+        sync = len(tokens)
+        # (min: an edit in leading whitespace comes before token 0)
+        for start, token in self.scan(text, min(starts[first], offset)):
+            if start >= edit_end:
+                j = bisect_right(starts, start - delta, last) - 1
+                if j >= last and starts[j] + delta == start:
+                    sync = j
+                    break
+            new_starts.append(start)
+            new_tokens.append(token)
+
+        # Drop memo entries that saw damaged tokens, before slots move
+        orphans = self.invalidate(first, sync)
+
+        shift = len(new_tokens) - (sync - first)
+        self.text = text
+        starts[first:sync] = new_starts
+        if delta:
+            starts[first + len(new_starts):] = [
+                s + delta for s in starts[first + len(new_starts):]]
+        tokens[first:sync] = new_tokens
+        self.memo[first:sync] = [{} for _ in new_tokens]
+
+        orphans = [(slot if slot < first else slot + shift, entry) for slot, entry in orphans]
+        self.roots = orphans
+        tree = self.parse()
+        if self.error is None:
+            self.purge(orphans)
+        return tree
+
+    def invalidate(self, first, last):
+        """
+        Remove memo entries whose span (plus lookahead) overlaps old token
+        slots [first, last). Returns the untouched entries met on the way
+        down from the roots ("orphans"): they stay in the memo for reuse,
+        and once a parse succeeds purge() drops the ones it did not adopt.
+        """
+        orphans = []
+        stack = list(self.roots)
+        while stack:
+            slot, entry = stack.pop()
+            if slot < last and slot + entry.length >= first:
+                self.forget(slot, entry)
+                stack.extend((slot + offset, child) for offset, child in entry.children)
+            else:
+                orphans.append((slot, entry))
+        return orphans
+
+    def purge(self, orphans):
+        """Forget orphan subtrees that the latest parse did not reuse."""
+        stack = list(orphans)
+        while stack:
+            slot, entry = stack.pop()
+            if entry.gen == self.gen:
+                continue  # reused: part of the current derivation
+            self.forget(slot, entry)
+            stack.extend((slot + offset, child) for offset, child in entry.children)
+
+    def forget(self, slot, entry):
+        if slot < len(self.memo) and self.memo[slot].get(entry.kind) is entry:
+            del self.memo[slot][entry.kind]
+
+    # -------------------------------------------------------------------------
+    # Memoized recursive descent (same grammar as Parser)
+    # -------------------------------------------------------------------------
+
+    def reparse(self):
+        self.gen += 1
+        if self.token(0).type == TokenType.EOF:
+            return None
+
+        root = self.call("expr", 0)
+        if self.token(root.length).type != TokenType.EOF:
+            raise Exception("Parser Error: Unexpected symbols after end of expression")
+        return root
+
+    def token(self, i):
+        """Token i, raising the Lexer Error where Parser's lexer would."""
+        token = self.tokens[i]
+        if token.type is UNKNOWN:
+            raise Exception(f"Lexer Error: Unknown character: {token.value}")
+        return token
+
+    def call(self, kind, i):
+        entry = self.memo[i].get(kind)
+        if entry is None:
+            entry = self.memo[i][kind] = getattr(self, kind)(i)
+            self.fresh.append((i, entry))
+        entry.gen = self.gen
+        return entry
+
+    def expect(self, i, token_type):
+        if self.token(i).type != token_type:
+            raise Exception(f"Parser Error: Expected {token_type.name}, "
+                            f"got {self.tokens[i].type.name}")
+
+    def factor(self, i):
+        """factor : IDENT | INT_LIT | LPAREN expr RPAREN"""
+        token = self.token(i)
+        if token.type == TokenType.INT_LIT:
+            return Entry("factor", Num(token), 1, [], self.gen)
+        if token.type == TokenType.IDENT:
+            return Entry("factor", Var(token), 1, [], self.gen)
+        if token.type == TokenType.LEFT_PAREN:
+            inner = self.call("expr", i + 1)
+            self.expect(i + 1 + inner.length, TokenType.RIGHT_PAREN)
+            return Entry("factor", inner.node, inner.length + 2, [(1, inner)], self.gen)
+        raise Exception("Parser Error: Expected identifier, integer, or left parenthesis")
+
+    def chain(self, kind, operand, operators, i):
+        """Shared loop of term and expr: operand ((op) operand)*"""
+        first = self.call(operand, i)
+        children = [(0, first)]
+        node = first.node
+        j = i + first.length
+        while self.token(j).type in operators:
+            op = self.tokens[j]
+            right = self.call(operand, j + 1)
+            children.append((j + 1 - i, right))
+            node = BinOp(left=node, op=op, right=right.node)
+            j += 1 + right.length
+        return Entry(kind, node, j - i, children, self.gen)
+
+    def term(self, i):
+        """term : factor ((MULT | DIV) factor)*"""
+        return self.chain("term", "factor", (TokenType.MULT_OP, TokenType.DIV_OP), i)
+
+    def expr(self, i):
+        """expr : term ((PLUS | MINUS) term)*"""
+        return self.chain("expr", "term", (TokenType.ADD_OP, TokenType.SUB_OP), i)
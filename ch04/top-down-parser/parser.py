@@ -1,5 +1,16 @@
+import argparse
+import functools
+import mmap
+import os
+import pickle
+import re
+import sqlite3
 import sys
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
+from itertools import islice
 
 # =============================================================================
 # 1. TOKENS
@@ -18,6 +29,10 @@ class TokenType(Enum):
     EOF = auto()           # End of File
 
 class Token:
+    # __slots__ replaces the per-instance __dict__ with fixed fields, which
+    # matters when millions of tokens and nodes are alive at once
+    __slots__ = ("type", "value")
+
     def __init__(self, type_: TokenType, value: str):
         self.type = type_
         self.value = value
@@ -31,21 +46,30 @@ class Token:
 
 class AST:
     """Base class for all AST nodes."""
-    pass
+    __slots__ = ()
 
 class BinOp(AST):
     """Represents a binary operation (e.g., left + right)."""
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
 
+    @property
+    def token(self):
+        # Alias kept for code that reads node.token on every node type
+        return self.op
+
     def __repr__(self):
         # Format: (left op right)
         return f"({self.left} {self.op.value} {self.right})"
 
 class Num(AST):
     """Represents an integer number."""
+    __slots__ = ("token", "value")
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
@@ -55,6 +79,8 @@ class Num(AST):
 
 class Var(AST):
     """Represents a variable/identifier."""
+    __slots__ = ("token", "value")
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
@@ -62,6 +88,70 @@ class Var(AST):
     def __repr__(self):
         return f"Var({self.value})"
 
+class NodeInterner:
+    """
+    Canonicalizes trees so that equal pieces are stored once.
+
+    - Tokens with the same type and value become one shared Token.
+    - Num/Var leaves with the same value become one shared node.
+    - With share_subtrees=True (hash-consing), BinOps whose operator and
+      (already canonical) children are identical also become one shared
+      node, so a repeated sub-expression like (sum + 47) exists once no
+      matter how many trees contain it.
+
+    Shared nodes must be treated as immutable. Keep one interner alive for
+    a whole batch; its tables are what make later trees share earlier nodes.
+    """
+
+    def __init__(self, share_subtrees=True):
+        self.share_subtrees = share_subtrees
+        self.tokens = {}   # (type, value) -> Token
+        self.leaves = {}   # (class, value) -> Num/Var
+        self.binops = {}   # (op type, id(left), id(right)) -> BinOp
+
+    def token(self, token):
+        key = (token.type, token.value)
+        return self.tokens.setdefault(key, token)
+
+    def intern(self, node):
+        """Return the canonical version of 'node' (None passes through)."""
+        if node is None:
+            return None
+
+        # Iterative post-order walk, so depth is not limited by recursion
+        done = []
+        stack = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if isinstance(current, BinOp):
+                if not children_done:
+                    stack.append((current, True))
+                    stack.append((current.right, False))
+                    stack.append((current.left, False))
+                    continue
+                right = done.pop()
+                left = done.pop()
+                done.append(self.binop(left, current.op, right))
+            else:
+                key = (type(current), current.value)
+                leaf = self.leaves.get(key)
+                if leaf is None:
+                    leaf = self.leaves[key] = type(current)(self.token(current.token))
+                done.append(leaf)
+        return done[0]
+
+    def binop(self, left, op, right):
+        op = self.token(op)
+        if not self.share_subtrees:
+            return BinOp(left, op, right)
+        # Children are canonical and kept alive by the tables, so their
+        # ids are stable keys
+        key = (op.type, id(left), id(right))
+        node = self.binops.get(key)
+        if node is None:
+            node = self.binops[key] = BinOp(left, op, right)
+        return node
+
 # =============================================================================
 # 3. LEXER
 # =============================================================================
@@ -145,6 +235,187 @@ class Lexer:
 
         return Token(TokenType.EOF, None)
 
+def _char_class(chars):
+    """A regex character-class body matching exactly 'chars' (as ranges)."""
+    codes = sorted(map(ord, chars))
+    parts = []
+    i = 0
+    while i < len(codes):
+        j = i
+        while j + 1 < len(codes) and codes[j + 1] == codes[j] + 1:
+            j += 1
+        first, last = re.escape(chr(codes[i])), re.escape(chr(codes[j]))
+        parts.append(first if i == j else f"{first}-{last}")
+        i = j + 1
+    return "".join(parts)
+
+def _unicode_extras():
+    r"""
+    The characters where regex classes and the str predicates Lexer uses
+    disagree. Regex \s is str.isspace(), \d is str.isdecimal() and [^\W_]
+    is str.isalnum(), but str.isdigit() also accepts digits such as '²', and
+    the non-alphabetic numerics ('²', 'ⅷ', '½', ...) are alnum yet not alpha.
+
+    All of them are non-ASCII, and finding them scans every code point
+    (a tenth of a second or so), so this runs only for non-ASCII text.
+    """
+    digits, numeric = [], []
+    for c in map(chr, range(0x80, sys.maxunicode + 1)):
+        if c.isnumeric() and not c.isdecimal():
+            if c.isdigit():
+                digits.append(c)
+            if not c.isalpha():
+                numeric.append(c)
+    return _char_class(digits), _char_class(numeric)
+
+def _master_pattern(digits="", numeric=""):
+    # Group names double as keys into TOKEN_TYPES.
+    # INT_LIT is a run of str.isdigit() characters; IDENT starts with a
+    # str.isalpha() character and continues with str.isalnum() ones.
+    start = f"(?![{numeric}])" if numeric else ""
+    return rf"""
+        \s*(?:
+            (?P<INT_LIT>[\d{digits}]+)
+          | (?P<IDENT>{start}[^\W\d_][^\W_]*)
+          | (?P<ADD_OP>\+)
+          | (?P<SUB_OP>-)
+          | (?P<MULT_OP>\*)
+          | (?P<DIV_OP>/)
+          | (?P<LEFT_PAREN>\()
+          | (?P<RIGHT_PAREN>\))
+          | (?P<ERROR>\S)
+        )"""
+
+@functools.cache
+def _unicode_master_re():
+    return re.compile(_master_pattern(*_unicode_extras()), re.VERBOSE)
+
+class RegexLexer:
+    """
+    Table-driven lexer: one compiled master regex scans the whole buffer in a
+    single pass, and the name of the group that matched (m.lastgroup) selects
+    the token type from a dispatch table. No per-character Python code runs.
+
+    Emits the same Token stream as Lexer, for any input, including raising
+    the lexer error only when the parser actually reaches the bad character.
+    Regex classes alone differ from the str predicates Lexer uses on some
+    non-ASCII characters, so for non-ASCII text the pattern adds those
+    (_unicode_extras()); it is built on first use, not at import.
+    """
+
+    # Exact for ASCII text, which is all master_re() needs it for
+    MASTER_RE = re.compile(_master_pattern(), re.VERBOSE)
+
+    TOKEN_TYPES = {
+        name: TokenType[name]
+        for name in MASTER_RE.groupindex if name != 'ERROR'
+    }
+
+    def __init__(self, text):
+        self.text = text
+        # Bind the generator's __next__ directly: get_next_token() is then a
+        # single C-level call per token instead of a Python method call.
+        self.get_next_token = self.tokens().__next__
+
+    @classmethod
+    def master_re(cls, text):
+        """The master regex for 'text' (str.isascii() is O(1))."""
+        return cls.MASTER_RE if text.isascii() else _unicode_master_re()
+
+    def error(self, msg="Invalid character"):
+        raise Exception(f"Lexer Error: {msg}")
+
+    def tokens(self):
+        """Yield every token of the buffer, then EOF forever (like Lexer)."""
+        types = self.TOKEN_TYPES
+        for m in self.master_re(self.text).finditer(self.text):
+            kind = m.lastgroup
+            if kind == 'ERROR':
+                self.error(f"Unknown character: {m.group(kind)}")
+            yield Token(types[kind], m.group(kind))
+
+        eof = Token(TokenType.EOF, None)
+        while True:
+            yield eof
+
+class ByteLexer:
+    """
+    RegexLexer over raw bytes: any buffer (bytes, memoryview, mmap) and an
+    optional [start, end) window of it.
+
+    The regex engine scans the buffer in place, so lexing one line of a
+    memory-mapped file copies nothing; only the short lexeme of each token
+    is decoded into a str. Input must be ASCII (bytes have no notion of
+    Unicode letters).
+    """
+
+    MASTER_RE = re.compile(_master_pattern().encode(), re.VERBOSE)
+    TOKEN_TYPES = RegexLexer.TOKEN_TYPES
+
+    def __init__(self, buffer, start=0, end=None):
+        self.buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end is None else end
+        self.get_next_token = self.tokens().__next__
+
+    def error(self, msg="Invalid character"):
+        raise Exception(f"Lexer Error: {msg}")
+
+    def tokens(self):
+        """Yield every token in the window, then EOF forever."""
+        types = self.TOKEN_TYPES
+        for m in self.MASTER_RE.finditer(self.buffer, self.start, self.end):
+            kind = m.lastgroup
+            if kind == 'ERROR':
+                char = m.group(kind).decode('ascii', 'replace')
+                self.error(f"Unknown character: {char}")
+            yield Token(types[kind], m.group(kind).decode('ascii'))
+
+        eof = Token(TokenType.EOF, None)
+        while True:
+            yield eof
+
+def line_spans(buffer, start=0, end=None):
+    """Yield the (start, end) offsets of each line of 'buffer', copying nothing."""
+    end = len(buffer) if end is None else end
+    while start < end:
+        newline = buffer.find(b"\n", start, end)
+        if newline < 0:
+            newline = end
+        yield start, newline
+        start = newline + 1
+
+def map_file(path):
+    """Read-only mmap of 'path' (None for an empty file, which cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+FAULT_AROUND = 64 * 1024
+
+def release_pages(buffer, start, end):
+    """
+    Tell the OS we are done with mapped bytes [start, end). The pages stay
+    in the page cache, but no longer count toward this process's resident
+    memory. A no-op where madvise is unavailable.
+    """
+    if not hasattr(mmap, "MADV_DONTNEED") or not isinstance(buffer, mmap.mmap):
+        return
+    # Widen by the kernel's fault-around window: touching one page maps its
+    # neighbours too, and those would otherwise stay resident
+    start = max(0, start - FAULT_AROUND)
+    start -= start % mmap.PAGESIZE
+    end = min(end + FAULT_AROUND, len(buffer))
+    if end > start:
+        buffer.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+# Lexer engines selectable by name, e.g. Parser.from_text(text, lexer="regex")
+LEXERS = {
+    "classic": Lexer,
+    "regex": RegexLexer,
+}
+
 # =============================================================================
 # 4. PARSER (UPDATED TO BUILD AST)
 # =============================================================================
@@ -154,6 +425,17 @@ class Parser:
         self.lexer = lexer
         self.current_token = self.lexer.get_next_token()
 
+    @classmethod
+    def from_text(cls, text, lexer="classic", probe=None):
+        """
+        Build a parser over 'text' using the lexer engine named 'lexer',
+        optionally instrumented by a Probe.
+        """
+        if probe is None:
+            return cls(LEXERS[lexer](text))
+        parser = cls(probe.attach_lexer(LEXERS[lexer](text)))
+        return probe.attach_parser(parser)
+
     def error(self, msg="Invalid syntax"):
         raise Exception(f"Parser Error: {msg}")
 
@@ -243,19 +525,426 @@ class Parser:
 
         return result
 
+class PrecedenceParser(Parser):
+    """
+    Non-recursive operator-precedence parser (shunting-yard).
+
+    Builds exactly the same BinOp/Num/Var trees as Parser, but instead of
+    one Python call per grammar level (expr -> term -> factor) it keeps two
+    explicit stacks: one for finished operand subtrees and one for pending
+    operators and left parentheses. Nesting depth is therefore limited only
+    by memory, and each token is pushed and popped at most once, so parsing
+    is linear in the input size.
+
+    Note: repr() of a very deep tree is still recursive.
+    """
+
+    # Higher binds tighter; equal precedence reduces left first (left assoc.)
+    PRECEDENCE = {
+        TokenType.ADD_OP: 1,
+        TokenType.SUB_OP: 1,
+        TokenType.MULT_OP: 2,
+        TokenType.DIV_OP: 2,
+    }
+
+    def parse(self):
+        """Main entry point."""
+        if self.current_token.type == TokenType.EOF:
+            return None
+
+        precedence = self.PRECEDENCE
+        next_token = self.lexer.get_next_token
+        operands = []    # finished subtrees
+        operators = []   # pending operator tokens and LEFT_PAREN tokens
+        open_parens = 0
+
+        def reduce():
+            # Pop one operator and combine the top two operands with it
+            op = operators.pop()
+            right = operands.pop()
+            operands.append(BinOp(left=operands.pop(), op=op, right=right))
+
+        token = self.current_token
+        while True:
+            # --- Expecting an operand: any number of '(' then a leaf ---
+            while token.type == TokenType.LEFT_PAREN:
+                operators.append(token)
+                open_parens += 1
+                token = next_token()
+
+            if token.type == TokenType.INT_LIT:
+                operands.append(Num(token))
+            elif token.type == TokenType.IDENT:
+                operands.append(Var(token))
+            else:
+                self.current_token = token
+                self.error("Expected identifier, integer, or left parenthesis")
+            token = next_token()
+
+            # --- Expecting an operator: any number of ')' then +-*/ or end ---
+            while token.type == TokenType.RIGHT_PAREN and open_parens:
+                while operators[-1].type != TokenType.LEFT_PAREN:
+                    reduce()
+                operators.pop()
+                open_parens -= 1
+                token = next_token()
+
+            if token.type in precedence:
+                prec = precedence[token.type]
+                while (operators and operators[-1].type != TokenType.LEFT_PAREN
+                       and precedence[operators[-1].type] >= prec):
+                    reduce()
+                operators.append(token)
+                token = next_token()
+                continue
+
+            self.current_token = token
+            if open_parens:
+                self.error(f"Expected RIGHT_PAREN, got {token.type.name}")
+            if token.type != TokenType.EOF:
+                self.error("Unexpected symbols after end of expression")
+
+            while operators:
+                reduce()
+            return operands[0]
+
+# Parser engines selectable by name, e.g. PARSERS["precedence"].from_text(text)
+PARSERS = {
+    "recursive": Parser,
+    "precedence": PrecedenceParser,
+}
+
+# =============================================================================
+# 5. PROFILING HOOKS
+# =============================================================================
+
+class Probe:
+    """
+    Opt-in instrumentation: counts calls to, and total time spent in,
+    get_next_token (per lexer) and eat (per parser).
+
+    attach_*() shadows the method with a timing wrapper on that one object
+    only; classes are never patched, so uninstrumented lexers and parsers
+    run exactly the original code at full speed.
+
+    Time in eat() includes the get_next_token() call it makes.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.calls = Counter()
+        self.seconds = Counter()
+
+    def wrap(self, name, method):
+        clock, calls, seconds = self.clock, self.calls, self.seconds
+
+        def timed(*args):
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        return timed
+
+    def attach_lexer(self, lexer):
+        # Must happen before the Parser is built: its __init__ reads a token
+        lexer.get_next_token = self.wrap("get_next_token", lexer.get_next_token)
+        return lexer
+
+    def attach_parser(self, parser):
+        parser.eat = self.wrap("eat", parser.eat)
+        return parser
+
+    def report(self):
+        lines = []
+        for name in sorted(self.calls):
+            calls, seconds = self.calls[name], self.seconds[name]
+            lines.append(f"{name:<15} {calls:>10,} calls {seconds:10.4f} s "
+                         f"{seconds / calls * 1e9:8.0f} ns/call")
+        return "\n".join(lines)
+
+# =============================================================================
+# 6. PARSE CACHE
+# =============================================================================
+
+class ParseCache:
+    """
+    Maps expression text to its AST so repeated formulas are parsed once.
+
+    - Keys are normalized: whitespace runs collapse to one space, which never
+      changes the token stream (" a  +\tb" and "a + b" share an entry).
+    - The in-memory tier is an LRU of at most 'maxsize' entries.
+    - With 'path', a sqlite file backs the LRU, so a warm cache survives
+      process restarts and can be shared by several processes.
+    - Lexer/parser errors are cached too, and re-raised on every lookup.
+
+    Cached trees are shared between callers and must not be modified.
+    """
+
+    def __init__(self, maxsize=10000, path=None, lexer="regex", parser="recursive"):
+        self.maxsize = maxsize
+        self.lexer = lexer
+        self.parser = parser
+        self.entries = OrderedDict()  # text -> (tree, error message or None)
+        self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+        self.db = None
+        if path is not None:
+            # Autocommit + WAL: every insert is durable right away and
+            # concurrent readers/writers in other processes do not block
+            self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS parse_cache ("
+                            "text TEXT PRIMARY KEY, tree BLOB, error TEXT)")
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.split())
+
+    def parse(self, text):
+        """Return the AST for 'text', raising the cached error if it had one."""
+        key = self.normalize(text)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = self.load(key)
+            if entry is None:
+                entry = self.compute(key)
+                self.store(key, entry)
+            self.remember(key, entry)
+
+        tree, error = entry
+        if error is not None:
+            raise Exception(error)
+        return tree
+
+    def compute(self, key):
+        try:
+            return PARSERS[self.parser].from_text(key, self.lexer).parse(), None
+        except RecursionError:
+            raise  # a limit of this process, not a property of the input
+        except Exception as e:
+            return None, str(e)
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def load(self, key):
+        if self.db is None:
+            return None
+        row = self.db.execute("SELECT tree, error FROM parse_cache WHERE text = ?",
+                              (key,)).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        tree, error = row
+        return pickle.loads(tree), error
+
+    def store(self, key, entry):
+        if self.db is None:
+            return
+        tree, error = entry
+        try:
+            blob = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            return  # too deep to pickle; keep it in memory only
+        self.db.execute("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?)",
+                        (key, blob, error))
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __repr__(self):
+        return (f"ParseCache(hits={self.hits}, misses={self.misses}, "
+                f"disk_hits={self.disk_hits}, evictions={self.evictions}, "
+                f"size={len(self.entries)}/{self.maxsize})")
+
+# =============================================================================
+# 7. BATCH DRIVER
+# =============================================================================
+
+# Per-process state used by the chunk workers below:
+# a ParseCache set up by init_worker(), and mmaps of input files by path
+worker_cache = None
+worker_maps = {}
+
+def init_worker(cache_args):
+    global worker_cache
+    if cache_args:
+        worker_cache = ParseCache(*cache_args)
+
+def parse_line(text, lexer="classic", parser="recursive"):
+    """Parse one expression; return the AST repr or the error message."""
+    try:
+        return repr(PARSERS[parser].from_text(text.strip(), lexer).parse())
+    except Exception as e:
+        return f"Error: {e}"
+
+def cached_parse_line(text):
+    """Like parse_line(), but answered from this process's worker_cache."""
+    try:
+        return repr(worker_cache.parse(text))
+    except Exception as e:
+        return f"Error: {e}"
+
+def parse_chunk(lines, lexer="classic", parser="recursive"):
+    """Worker entry point: parse a list of lines in one process round trip."""
+    if worker_cache is not None:
+        return [cached_parse_line(line) for line in lines]
+    return [parse_line(line, lexer, parser) for line in lines]
+
+def parse_span_chunk(spans, path, parser="recursive"):
+    """
+    Worker entry point for memory-mapped input: only (start, end) offsets
+    travel between processes; each worker maps the file itself.
+    """
+    buffer = worker_maps.get(path)
+    if buffer is None:
+        buffer = worker_maps[path] = map_file(path)
+
+    results = []
+    for start, end in spans:
+        if worker_cache is not None:
+            results.append(cached_parse_line(buffer[start:end].decode()))
+            continue
+        try:
+            tree = PARSERS[parser](ByteLexer(buffer, start, end)).parse()
+            results.append(repr(tree))
+        except Exception as e:
+            results.append(f"Error: {e}")
+
+    if spans:
+        release_pages(buffer, spans[0][0], spans[-1][1])
+    return results
+
+def run_chunks(worker, chunks, args, workers, cache_args):
+    """
+    Run worker(chunk, *args) for every chunk and yield all results in order.
+
+    Only a few chunks per worker are in flight at a time, so memory stays
+    bounded however many chunks there are.
+    """
+    if workers == 1:
+        init_worker(cache_args)
+        for chunk in chunks:
+            yield from worker(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_args,)) as pool:
+        pending = deque()
+        while True:
+            # Keep every worker busy with one chunk queued behind it
+            for chunk in islice(chunks, 2 * workers - len(pending)):
+                pending.append(pool.submit(worker, chunk, *args))
+            if not pending:
+                break
+            # Futures are consumed in submission order, so output order
+            # matches input order even when later chunks finish first
+            yield from pending.popleft().result()
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    return iter(lambda: list(islice(iterator, size)), [])
+
+def parse_batch(lines, workers=None, chunk_size=1000, lexer="classic",
+                parser="recursive", cache_size=0, cache_path=None):
+    """
+    Stream results for an iterable of expression lines, one per line, in
+    input order.
+
+    Lines are grouped into chunks so each inter-process message carries
+    thousands of expressions instead of one.
+
+    With cache_size > 0 (and optionally cache_path), every worker process
+    keeps its own ParseCache; a cache_path file is shared between them and
+    across runs.
+    """
+    workers = workers or os.cpu_count() or 1
+    cache_args = (cache_size, cache_path, lexer, parser) if cache_size else None
+    yield from run_chunks(parse_chunk, chunked(lines, chunk_size),
+                          (lexer, parser), workers, cache_args)
+
+def parse_file_batch(path, workers=None, chunk_size=1000, parser="recursive",
+                     cache_size=0, cache_path=None):
+    """
+    Like parse_batch(), but for a file that is memory-mapped instead of read.
+
+    The driver only scans for newlines and hands out offset ranges; workers
+    lex the mapped bytes in place with ByteLexer. No line is ever copied or
+    decoded as a whole (unless the cache needs it as a key), and mapped
+    pages are file-backed, so resident memory stays flat for any file size.
+    """
+    workers = workers or os.cpu_count() or 1
+    cache_args = (cache_size, cache_path, "regex", parser) if cache_size else None
+    buffer = map_file(path)
+    if buffer is None:
+        return
+    def chunks():
+        # The newline scan touches every page too; let them go as we pass
+        for spans in chunked(line_spans(buffer), chunk_size):
+            release_pages(buffer, spans[0][0], spans[-1][1])
+            yield spans
+
+    with buffer:
+        yield from run_chunks(parse_span_chunk, chunks(), (path, parser),
+                              workers, cache_args)
+
 # =============================================================================
-# 5. MAIN DRIVER
+# 8. MAIN DRIVER
 # =============================================================================
 
 def main():
+    arg_parser = argparse.ArgumentParser(description="Parse arithmetic expressions.")
+    arg_parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                            help="parse one expression per line of FILE (default: stdin)")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="worker processes for --batch (default: CPU count)")
+    arg_parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="lines per worker task for --batch")
+    arg_parser.add_argument("--mmap", action="store_true",
+                            help="memory-map the --batch FILE and lex its bytes in place")
+    arg_parser.add_argument("--lexer", choices=sorted(LEXERS), default="classic")
+    arg_parser.add_argument("--parser", choices=sorted(PARSERS), default="recursive")
+    arg_parser.add_argument("--cache-size", type=int, default=0,
+                            help="per-process LRU parse cache entries for --batch (0: off)")
+    arg_parser.add_argument("--cache-file", default=None,
+                            help="sqlite file backing the parse cache across runs")
+    args = arg_parser.parse_args()
+
+    if args.batch is not None and args.mmap and args.batch != "-":
+        for result in parse_file_batch(args.batch, args.workers, args.chunk_size,
+                                       args.parser, args.cache_size, args.cache_file):
+            print(result)
+        return
+
+    if args.batch is not None:
+        source = sys.stdin if args.batch == "-" else open(args.batch)
+        with source:
+            for result in parse_batch(source, args.workers, args.chunk_size,
+                                      args.lexer, args.parser,
+                                      args.cache_size, args.cache_file):
+                print(result)
+        return
+
     # Read expression from standard input
     input_text = input().strip()
 
     print(f"Input Expression: {input_text}")
     print("-" * 30)
 
-    lexer = Lexer(input_text)
-    parser = Parser(lexer)
+    lexer = LEXERS[args.lexer](input_text)
+    parser = PARSERS[args.parser](lexer)
 
     try:
         syntax_tree = parser.parse()
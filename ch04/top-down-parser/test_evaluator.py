@@ -0,0 +1,67 @@
+"""
+Tests for evaluator.py: evaluate() and compile_ast() must agree, at any depth.
+
+Usage:    python -m pytest test_evaluator.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from evaluator import compile_ast, compile_text, evaluate
+from parser import Parser, PrecedenceParser
+
+ENV = {"a": 3, "b": -4, "c": 7}
+
+def random_expression(rng, depth=0):
+    if depth > 4 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "c", str(rng.randint(1, 99))])
+    left = random_expression(rng, depth + 1)
+    right = random_expression(rng, depth + 1)
+    text = f"{left} {rng.choice('+-*/')} {right}"
+    return f"({text})" if rng.random() < 0.5 else text
+
+def outcome(f):
+    try:
+        return f()
+    except Exception as e:
+        return str(e)
+
+def test_evaluate_and_compile_ast_agree():
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = random_expression(rng)
+        tree = Parser.from_text(text).parse()
+        expected = outcome(lambda: evaluate(tree, ENV))
+        assert outcome(lambda: compile_ast(tree)(ENV)) == expected, text
+
+@pytest.mark.parametrize("parser", [Parser, PrecedenceParser])
+def test_long_flat_chains(parser):
+    # A left-deep spine of 5000 terms: no recursion in either evaluator
+    text = " + ".join(["a"] * 2500 + ["1"] * 2500)
+    tree = parser.from_text(text, "regex").parse()
+    assert evaluate(tree, ENV) == compile_ast(tree)(ENV) == 3 * 2500 + 2500
+
+def test_compile_text_long_sum():
+    assert compile_text(" + ".join(["2"] * 1500))({}) == 3000
+
+def test_division_by_zero_is_an_evaluator_error():
+    tree = Parser.from_text("a / (c - 7)").parse()
+    for run in (lambda: evaluate(tree, ENV), lambda: compile_ast(tree)(ENV)):
+        with pytest.raises(Exception, match="Evaluator Error: Division by zero"):
+            run()
+
+def test_undefined_variable():
+    tree = Parser.from_text("a + missing").parse()
+    for run in (lambda: evaluate(tree, ENV), lambda: compile_ast(tree)(ENV)):
+        with pytest.raises(Exception, match="Evaluator Error: Undefined variable missing"):
+            run()
+
+def test_vectorized_constant_has_full_length():
+    columns = {"a": np.arange(5.0)}
+    for text, expected in (("6 / 3", np.full(5, 2.0)), ("a * 2", np.arange(5.0) * 2)):
+        tree = Parser.from_text(text).parse()
+        for result in (evaluate(tree, columns), compile_ast(tree)(columns)):
+            assert np.array_equal(result, expected), text
+    assert compile_text("6 / 3")({"x": 1}) == 2.0
@@ -0,0 +1,88 @@
+"""
+Tests for incremental.py: after every edit, IncrementalParser must give the
+tree (or the error) a full parse of the new text gives.
+
+Usage:    python -m pytest test_incremental.py
+"""
+
+import random
+
+import pytest
+
+from evaluator import postorder
+from incremental import IncrementalParser
+from parser import Parser
+
+PIECES = ["a", "b", "xy", "1", "23", "+", "-", "*", "/", "(", ")", " ", "  ", "$"]
+
+def full_parse(text):
+    """repr of the tree, or the error message, as Parser gives it."""
+    try:
+        return repr(Parser.from_text(text).parse())
+    except Exception as e:
+        return str(e)
+
+def incremental_result(doc):
+    try:
+        return repr(doc.result())
+    except Exception as e:
+        return str(e)
+
+def random_expression(rng, depth=0):
+    if depth > 3 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "total", "1", "47", "300"])
+    if rng.random() < 0.2:
+        return f"({random_expression(rng, depth + 1)})"
+    op = rng.choice(" + - * / ".split())
+    return f"{random_expression(rng, depth + 1)} {op} {random_expression(rng, depth + 1)}"
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits_match_full_parse(seed):
+    rng = random.Random(seed)
+    doc = IncrementalParser(random_expression(rng))
+    valid = repr(doc.tree)
+    for _ in range(200):
+        text = doc.text
+        offset = rng.randint(0, len(text))
+        deleted = rng.randint(0, min(3, len(text) - offset))
+        inserted = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 2)))
+        if rng.random() < 0.1:
+            inserted = random_expression(rng)  # paste a whole subexpression
+        returned = doc.edit(offset, deleted, inserted)
+        expected = full_parse(doc.text)
+        assert doc.text == text[:offset] + inserted + text[offset + deleted:]
+        assert incremental_result(doc) == expected, repr(doc.text)
+        if doc.error is None:
+            valid = repr(doc.tree)
+            assert repr(returned) == valid
+        else:
+            assert returned is None
+            assert repr(doc.tree) == valid  # the last valid tree is kept
+
+def test_invalid_text_is_kept_not_raised():
+    doc = IncrementalParser("(a + 1")  # a buffer that is mid-edit
+    assert doc.tree is None and doc.error is not None
+    with pytest.raises(Exception, match="Parser Error"):
+        doc.result()
+    assert repr(doc.edit(6, 0, ")")) == "(Var(a) + 1)"
+    assert doc.error is None
+    assert doc.edit(3, 1, "$") is None
+    with pytest.raises(Exception, match="Lexer Error: Unknown character: \\$"):
+        doc.result()
+    assert repr(doc.tree) == "(Var(a) + 1)"
+
+def test_invalid_edits_reuse_the_memo():
+    # Breaking and then repairing a long expression re-parses only the
+    # path to the edit, not the whole text
+    text = " + ".join(f"(x{i} * {i} - y)" for i in range(5000))
+    doc = IncrementalParser(text)
+    middle = text.index("(x2500")
+    for offset, deleted, inserted in ((middle, 1, ""), (middle, 0, "("),
+                                      (middle + 1, 0, "$"), (middle + 1, 1, "")):
+        doc.edit(offset, deleted, inserted)
+        assert len(doc.fresh) < 100
+    assert doc.error is None
+    # repr() of a 5000-term left spine would recurse too deep
+    flat = lambda tree: [(type(n), n.op.value if hasattr(n, "op") else n.value)
+                         for n in postorder(tree)]
+    assert flat(doc.tree) == flat(Parser.from_text(text).parse())
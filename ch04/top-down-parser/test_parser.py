@@ -0,0 +1,185 @@
+"""
+Tests for parser.py: RegexLexer must produce exactly the tokens of Lexer;
+PrecedenceParser must build exactly the trees of Parser; NodeInterner,
+ParseCache and the batch drivers must not change any tree.
+
+Usage:    python -m pytest test_parser.py
+"""
+
+import random
+import sys
+
+import pytest
+
+from parser import (BinOp, ByteLexer, Lexer, NodeInterner, ParseCache, Parser,
+                    PrecedenceParser, RegexLexer, TokenType, line_spans,
+                    parse_batch, parse_file_batch)
+
+# ASCII expression characters, plus non-ASCII ones where regex classes and
+# str predicates could disagree: letters, decimal and non-decimal digits,
+# other numerics (alphabetic or not), spaces and symbols
+ALPHABET = (
+    "abcxyzXYZ0123456789+-*/()  \t\n_$.#"
+    "éßΩж一二٣४߁²³¹①⑴ⅷⅫ½〇𝟘  　←€"
+)
+
+def tokens(lexer_class, text):
+    """(type, value) pairs up to EOF, or up to the lexer error's message."""
+    lexer = lexer_class(text)
+    out = []
+    try:
+        while True:
+            token = lexer.get_next_token()
+            out.append((token.type, token.value))
+            if token.type == TokenType.EOF:
+                return out
+    except Exception as e:
+        return out + [str(e)]
+
+def test_random_text_lexes_identically():
+    rng = random.Random(0)
+    for _ in range(20_000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+        assert tokens(RegexLexer, text) == tokens(Lexer, text), repr(text)
+
+def test_non_ascii_characters_lex_identically():
+    # Every numeric that is not a decimal digit (where the classes needed
+    # extras) and a sample of the rest: alone, and continuing an identifier
+    # and an integer
+    rng = random.Random(1)
+    numerics = [c for c in map(chr, range(0x80, sys.maxunicode + 1))
+                if c.isnumeric() and not c.isdecimal()]
+    sample = map(chr, rng.sample(range(0x80, sys.maxunicode + 1), 20_000))
+    for char in [*numerics, *sample]:
+        for text in (char, "a" + char, "1" + char):
+            assert tokens(RegexLexer, text) == tokens(Lexer, text), repr(text)
+
+def parsed(parser_class, text):
+    """repr of the tree, or the error message."""
+    try:
+        return repr(parser_class.from_text(text).parse())
+    except Exception as e:
+        return str(e)
+
+def expression(rng, depth=0):
+    """A random valid expression, nesting at most a few levels."""
+    if depth > 4 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "7", "42"])
+    text = f"{expression(rng, depth + 1)} {rng.choice('+-*/')} {expression(rng, depth + 1)}"
+    return f"({text})" if rng.random() < 0.4 else text
+
+def test_precedence_parser_builds_the_same_trees():
+    rng = random.Random(2)
+    for _ in range(5_000):
+        text = expression(rng)
+        assert parsed(PrecedenceParser, text) == parsed(Parser, text), text
+
+def test_precedence_parser_raises_the_same_errors():
+    # Token soup: a few valid expressions and every kind of syntax error
+    rng = random.Random(3)
+    pieces = ["a", "b", "7", "42", "+", "-", "*", "/", "(", ")", " "]
+    for _ in range(20_000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+        assert parsed(PrecedenceParser, text) == parsed(Parser, text), repr(text)
+
+def test_byte_lexer_matches_regex_lexer_on_ascii():
+    rng = random.Random(4)
+    ascii_alphabet = ALPHABET[:ALPHABET.index("é")]
+    for _ in range(5_000):
+        text = "".join(rng.choice(ascii_alphabet) for _ in range(rng.randint(0, 12)))
+        # Lexed in place as a window of a larger buffer
+        buffer = b"((" + text.encode() + b"))"
+        window = lambda _: ByteLexer(buffer, 2, 2 + len(text))
+        assert tokens(window, text) == tokens(RegexLexer, text), repr(text)
+
+def test_line_spans():
+    buffer = b"a + 1\n\nb\n"
+    assert [buffer[s:e] for s, e in line_spans(buffer)] == [b"a + 1", b"", b"b"]
+    assert list(line_spans(b"x")) == [(0, 1)]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_file_batch_matches_line_batch(tmp_path, workers):
+    rng = random.Random(5)
+    lines = [expression(rng) for _ in range(200)] + ["a + * b", "1 + 2"]
+    path = tmp_path / "exprs.txt"
+    path.write_text("\n".join(lines) + "\n")
+    expected = list(parse_batch(lines, workers=1))
+    assert len(expected) == len(lines) and expected[-2].startswith("Error: Parser Error")
+    for parser in ("recursive", "precedence"):
+        results = parse_file_batch(str(path), workers=workers, chunk_size=7, parser=parser)
+        assert list(results) == expected
+    (tmp_path / "empty.txt").write_text("")
+    assert list(parse_file_batch(str(tmp_path / "empty.txt"), workers=1)) == []
+
+def test_nodes_have_no_instance_dict():
+    tree = Parser.from_text("a + 1").parse()
+    for obj in (tree, tree.op, tree.left, tree.right, tree.left.token):
+        assert not hasattr(obj, "__dict__"), type(obj).__name__
+
+def test_interner_shares_equal_subtrees():
+    interner = NodeInterner()
+    first = interner.intern(Parser.from_text("(sum + 47) / total").parse())
+    second = interner.intern(Parser.from_text("(sum + 47) * (sum + 47)").parse())
+    assert repr(first) == "((Var(sum) + 47) / Var(total))"
+    assert repr(second) == "((Var(sum) + 47) * (Var(sum) + 47))"
+    assert isinstance(first.left, BinOp)
+    assert second.left is second.right is first.left
+    assert interner.intern(Parser.from_text("total").parse()) is first.right
+
+    leaves_only = NodeInterner(share_subtrees=False)
+    tree = leaves_only.intern(Parser.from_text("(a + 1) * (a + 1)").parse())
+    assert tree.left is not tree.right
+    assert tree.left.left is tree.right.left and tree.left.op is tree.right.op
+
+def test_cache_hit_returns_the_same_tree():
+    cache = ParseCache(maxsize=10)
+    tree = cache.parse("a + b * 2")
+    assert cache.parse(" a  +\tb * 2 ") is tree  # same key after normalizing
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert repr(tree) == repr(Parser.from_text("a + b * 2").parse())
+
+def test_cache_evicts_least_recently_used():
+    cache = ParseCache(maxsize=2)
+    cache.parse("a")
+    cache.parse("b")
+    cache.parse("a")  # now "b" is the oldest
+    cache.parse("c")
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.evictions == 1
+    cache.parse("b")
+    assert (cache.hits, cache.misses) == (1, 4)
+
+def test_cache_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ParseCache(maxsize=10, path=path)
+    tree = cache.parse("(x + 1) / y")
+    cache.entries.clear()
+    assert repr(cache.parse("(x + 1) / y")) == repr(tree)
+    assert (cache.misses, cache.disk_hits) == (2, 1)
+    cache.close()
+
+    # A new cache on the same file starts warm
+    warm = ParseCache(maxsize=10, path=path)
+    assert repr(warm.parse("(x  + 1) / y")) == repr(tree)
+    assert warm.disk_hits == 1
+    warm.close()
+
+def test_cache_raises_cached_errors_again(tmp_path):
+    cache = ParseCache(maxsize=10, path=str(tmp_path / "cache.db"))
+    for _ in range(2):
+        with pytest.raises(Exception, match="Parser Error"):
+            cache.parse("a + * b")
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.entries.clear()
+    with pytest.raises(Exception, match="Parser Error"):
+        cache.parse("a + * b")
+    assert cache.disk_hits == 1
+    cache.close()
+
+def test_cache_changed_text_is_a_new_entry(tmp_path):
+    cache = ParseCache(maxsize=10, path=str(tmp_path / "cache.db"))
+    before = cache.parse("a + b")
+    after = cache.parse("a - b")
+    assert repr(after) == repr(Parser.from_text("a - b").parse()) != repr(before)
+    assert (cache.hits, cache.misses, cache.disk_hits) == (0, 2, 0)
+    cache.close()
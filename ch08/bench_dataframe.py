@@ -0,0 +1,108 @@
+"""
+Benchmark: the pyspark-fluent.py chain on local_dataframe.py, 10M rows.
+
+Runs
+
+    filter(category == "Electronics")
+    .withColumn("total_price", qty * price)
+    .groupBy("store_id").agg(sum("total_price").alias("revenue"))
+    .orderBy(desc("revenue")).limit(10)
+
+over --rows rows of random sales (sample_sales()) as
+
+    numpy       hand-written NumPy on whole arrays: mask, multiply,
+                np.unique + bincount, full argsort (the baseline)
+    as written  the DataFrame plan run without optimization: the filter
+                runs after total_price is computed for every row, and the
+                aggregated rows are fully sorted
+    optimized   the same DataFrame with the filter pushed into the scan
+                and orderBy + limit turned into a top-k
+
+and checks that all three find the same stores. It also reports a full
+orderBy(desc("price")).limit(10) over the raw rows (sort vs top-k on
+--rows rows) and the chain over a --csv-rows row CSV file read in chunks.
+
+Usage:    python bench_dataframe.py [--rows N] [--stores N] [--csv-rows N]
+                                    [--chunk-rows N]
+Requires: numpy
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import local_dataframe as F
+
+def chain(df):
+    return (df.filter(F.col("category") == "Electronics")
+              .withColumn("total_price", F.col("qty") * F.col("price"))
+              .groupBy("store_id")
+              .agg(F.sum("total_price").alias("revenue"))
+              .orderBy(F.desc("revenue"))
+              .limit(10))
+
+def numpy_chain(data):
+    mask = data["category"] == "Electronics"
+    total = data["qty"][mask] * data["price"][mask]
+    stores, codes = np.unique(data["store_id"][mask], return_inverse=True)
+    revenue = np.bincount(codes, weights=total)
+    order = np.argsort(-revenue, kind="stable")[:10]
+    return stores[order].tolist()
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+def write_csv(path, data):
+    names = list(data)
+    with open(path, "w") as f:
+        f.write(",".join(names) + "\n")
+        for row in zip(*(data[name].tolist() for name in names)):
+            f.write(",".join(map(str, row)) + "\n")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=10_000_000)
+    arg_parser.add_argument("--stores", type=int, default=1000)
+    arg_parser.add_argument("--csv-rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--chunk-rows", type=int, default=F.CHUNK_ROWS)
+    args = arg_parser.parse_args()
+
+    data = F.sample_sales(args.rows, args.stores)
+    print(f"{args.rows:,} rows, {args.stores:,} stores, chunks of {args.chunk_rows:,} rows")
+    print(f"{'query':<16} {'engine':<11} {'seconds':>9}")
+    print("-" * 38)
+
+    seconds, expected = timed(lambda: numpy_chain(data))
+    print(f"{'top stores':<16} {'numpy':<11} {seconds:9.3f}")
+    for label, optimize in (("as written", False), ("optimized", True)):
+        df = F.DataFrame.from_columns(data, args.chunk_rows, optimize)
+        seconds, result = timed(lambda: chain(df).toNumpy())
+        assert result["store_id"].tolist() == expected, f"{label} found other stores"
+        print(f"{'top stores':<16} {label:<11} {seconds:9.3f}")
+
+    for label, optimize in (("as written", False), ("optimized", True)):
+        df = F.DataFrame.from_columns(data, args.chunk_rows, optimize)
+        seconds, result = timed(lambda: df.orderBy(F.desc("price")).limit(10).toNumpy())
+        print(f"{'top prices':<16} {label:<11} {seconds:9.3f}")
+
+    csv_data = {name: values[:args.csv_rows] for name, values in data.items()}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sales.csv")
+        write_csv(path, csv_data)
+        expected = numpy_chain(csv_data)
+        for label, optimize in (("as written", False), ("optimized", True)):
+            df = F.read_csv(path, args.chunk_rows, optimize=optimize)
+            seconds, result = timed(lambda: chain(df).toNumpy())
+            assert result["store_id"].tolist() == expected, f"csv {label} found other stores"
+            print(f"{f'csv {args.csv_rows:,}':<16} {label:<11} {seconds:9.3f}")
+
+    print()
+    chain(F.DataFrame.from_columns(data, args.chunk_rows)).explain()
+
+if __name__ == "__main__":
+    main()
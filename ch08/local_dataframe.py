@@ -0,0 +1,834 @@
+"""
+A local columnar DataFrame on NumPy arrays, for running the fluent chain of
+pyspark-fluent.py without Spark:
+
+    import local_dataframe as F
+
+    df = F.read_csv("sales.csv")                 # or F.DataFrame.from_columns({...})
+    (df.filter(F.col("category") == "Electronics")
+       .withColumn("total_price", F.col("qty") * F.col("price"))
+       .groupBy("store_id")
+       .agg(F.sum("total_price").alias("revenue"))
+       .orderBy(F.desc("revenue"))
+       .limit(10)
+       .show())
+
+The module doubles as the 'F' of pyspark.sql.functions: col, lit, sum,
+count, min, max, avg, desc and asc.
+
+How it runs:
+
+    lazy        each call adds a node to a plan; show(), collect(), count()
+                and toNumpy() optimize the plan and run it
+    pushdown    filters move below withColumn, orderBy and groupBy (when
+                they only test group keys) and into the scan, so rows are
+                dropped before anything else is computed for them
+    pruning     the scan only reads the columns the plan uses
+    vectorized  expressions such as qty * price run as one NumPy operation
+                per chunk
+    hash        groupBy keeps a dict from group key to accumulator slot;
+                a chunk's rows are mapped to its distinct keys in NumPy
+                (bincount for integer keys in a small range, np.unique
+                otherwise), so the dict sees each key once per chunk, and
+                the aggregates are added per slot with bincount/ufunc.at
+    top-k       orderBy(...).limit(k) keeps only the best k rows per chunk
+                (np.argpartition, no full sort) and sorts those at the end
+    streaming   sources are read chunk_rows rows at a time, so memory
+                depends on the chunk size, the number of groups and k,
+                not on the input size
+
+explain() prints the optimized plan. optimize=False (on from_columns() and
+read_csv()) runs the plan as written, for comparison.
+
+CSV input is plain: a header line, no quoted fields; blank lines are
+skipped. Column types are inferred from the first rows (int64, float64,
+else a string as wide as the longest value of each chunk) unless given as
+schema={"name": dtype}. An inferred type that a later chunk does not fit
+is widened (int64 to float64 to string) and the chunk is read again.
+
+Usage:    python local_dataframe.py
+Requires: numpy
+"""
+
+import builtins
+import itertools
+import operator
+
+import numpy as np
+
+CHUNK_ROWS = 1 << 20
+INFER_ROWS = 1000  # CSV rows sampled to infer column types
+
+# =============================================================================
+# Expressions
+# =============================================================================
+
+_BINARY = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge, "+": operator.add, "-": operator.sub,
+    "*": operator.mul, "/": operator.truediv, "&": operator.and_, "|": operator.or_,
+}
+
+class Column:
+    """An expression over the columns of a chunk, evaluated all at once."""
+
+    def __init__(self, op, args, name):
+        self.op = op      # "col", "lit", "~", "-" (unary) or a key of _BINARY
+        self.args = args
+        self.name = name  # the output column name
+
+    def _binary(self, op, other, swap=False):
+        other = other if isinstance(other, Column) else lit(other)
+        left, right = (other, self) if swap else (self, other)
+        return Column(op, (left, right), f"({left.name} {op} {right.name})")
+
+    def __eq__(self, other): return self._binary("==", other)
+    def __ne__(self, other): return self._binary("!=", other)
+    def __lt__(self, other): return self._binary("<", other)
+    def __le__(self, other): return self._binary("<=", other)
+    def __gt__(self, other): return self._binary(">", other)
+    def __ge__(self, other): return self._binary(">=", other)
+    def __add__(self, other): return self._binary("+", other)
+    def __radd__(self, other): return self._binary("+", other, swap=True)
+    def __sub__(self, other): return self._binary("-", other)
+    def __rsub__(self, other): return self._binary("-", other, swap=True)
+    def __mul__(self, other): return self._binary("*", other)
+    def __rmul__(self, other): return self._binary("*", other, swap=True)
+    def __truediv__(self, other): return self._binary("/", other)
+    def __rtruediv__(self, other): return self._binary("/", other, swap=True)
+    def __and__(self, other): return self._binary("&", other)
+    def __or__(self, other): return self._binary("|", other)
+
+    def __invert__(self):
+        return Column("~", (self,), f"(NOT {self.name})")
+
+    def __neg__(self):
+        return Column("-", (self,), f"(- {self.name})")
+
+    __hash__ = None  # == builds an expression, so columns cannot be dict keys
+
+    def __bool__(self):
+        raise TypeError("use '&', '|' and '~' to combine conditions, not 'and', 'or' and 'not'")
+
+    def alias(self, name):
+        return Column(self.op, self.args, name)
+
+    def asc(self):
+        return SortOrder(self, descending=False)
+
+    def desc(self):
+        return SortOrder(self, descending=True)
+
+    def references(self):
+        """Names of the input columns the expression reads."""
+        if self.op == "col":
+            return {self.args[0]}
+        if self.op == "lit":
+            return set()
+        return set().union(*(arg.references() for arg in self.args))
+
+    def renamed(self, names):
+        """The expression reading column names[n] wherever it read n."""
+        if self.op == "col":
+            return col(names.get(self.args[0], self.args[0]))
+        if self.op == "lit":
+            return self
+        args = [arg.renamed(names) for arg in self.args]
+        if self.op == "~":
+            return ~args[0]
+        if len(args) == 1:
+            return -args[0]
+        return args[0]._binary(self.op, args[1])
+
+    def evaluate(self, batch):
+        if self.op == "col":
+            try:
+                return batch[self.args[0]]
+            except KeyError:
+                raise ValueError(f"no column named {self.args[0]!r} "
+                                 f"(columns: {', '.join(batch)})") from None
+        if self.op == "lit":
+            return self.args[0]
+        values = [arg.evaluate(batch) for arg in self.args]
+        if self.op == "~":
+            return np.logical_not(values[0])
+        if len(values) == 1:
+            return np.negative(values[0])
+        return _BINARY[self.op](*values)
+
+    def __repr__(self):
+        return self.name
+
+class SortOrder:
+    def __init__(self, column, descending):
+        self.column = column
+        self.descending = descending
+
+    def __repr__(self):
+        return f"{self.column.name} {'DESC' if self.descending else 'ASC'}"
+
+class AggColumn:
+    """An aggregate (sum, count, min, max, avg) of a column per group."""
+
+    def __init__(self, func, column, name):
+        self.func = func
+        self.column = column  # None for count(*)
+        self.name = name
+
+    def alias(self, name):
+        return AggColumn(self.func, self.column, name)
+
+    def references(self):
+        return self.column.references() if self.column is not None else set()
+
+    def __repr__(self):
+        return self.name
+
+def _as_column(column):
+    return column if isinstance(column, Column) else col(column)
+
+def _as_order(order):
+    return order if isinstance(order, SortOrder) else SortOrder(_as_column(order), False)
+
+# The pyspark.sql.functions subset
+
+def col(name):
+    return Column("col", (name,), name)
+
+def lit(value):
+    return Column("lit", (value,), repr(value))
+
+def sum(column):
+    column = _as_column(column)
+    return AggColumn("sum", column, f"sum({column.name})")
+
+def count(column="*"):
+    if isinstance(column, str) and column == "*":
+        return AggColumn("count", None, "count(1)")
+    column = _as_column(column)
+    return AggColumn("count", column, f"count({column.name})")
+
+def min(column):
+    column = _as_column(column)
+    return AggColumn("min", column, f"min({column.name})")
+
+def max(column):
+    column = _as_column(column)
+    return AggColumn("max", column, f"max({column.name})")
+
+def avg(column):
+    column = _as_column(column)
+    return AggColumn("avg", column, f"avg({column.name})")
+
+def desc(column):
+    return _as_column(column).desc()
+
+def asc(column):
+    return _as_column(column).asc()
+
+# =============================================================================
+# Chunks: dicts of equally long arrays
+# =============================================================================
+
+def _rows(batch):
+    return len(next(iter(batch.values()))) if batch else 0
+
+def _take(batch, index):
+    return {name: values[index] for name, values in batch.items()}
+
+def _concat(batches):
+    out = {}
+    for name in batches[0]:
+        arrays = [b[name] for b in batches]
+        kinds = {values.dtype.kind for values in arrays}
+        if "U" in kinds and len(kinds) > 1:
+            arrays = [values.astype(str) for values in arrays]  # widened mid-stream
+        out[name] = np.concatenate(arrays)
+    return out
+
+def _sort_key(values, descending):
+    """A numeric key whose ascending order is the wanted order of values."""
+    if descending:
+        if values.dtype.kind in "iufb":
+            return -values.astype(np.float64) if values.dtype.kind in "ub" else -values
+        return -np.unique(values, return_inverse=True)[1]  # ranks, reversed
+    return values
+
+def _sort_indices(batch, orders):
+    keys = [_sort_key(order.column.evaluate(batch), order.descending) for order in orders]
+    return np.lexsort(keys[::-1])  # lexsort's last key is the primary one
+
+def _top_indices(batch, orders, k):
+    """Indices of the first k rows in 'orders' order, in no particular order."""
+    rows = _rows(batch)
+    if rows <= k:
+        return np.arange(rows)
+    if len(orders) == 1:
+        key = _sort_key(orders[0].column.evaluate(batch), orders[0].descending)
+        if key.dtype.kind in "iuf":
+            return np.argpartition(key, k - 1)[:k]
+    return _sort_indices(batch, orders)[:k]  # several keys: sort this chunk
+
+def _factorize(arrays):
+    """
+    The distinct key tuples of a chunk, and for each row the index of its
+    tuple in that list.
+    """
+    def one(values):
+        if values.dtype.kind in "iu" and len(values):
+            low, high = int(values.min()), int(values.max())
+            if high - low <= 4 * len(values) + 1024:
+                # Small range: direct addressing, no sort
+                present = np.bincount(values - low) > 0
+                slot = np.cumsum(present) - 1
+                return np.flatnonzero(present) + low, slot[values - low]
+        return np.unique(values, return_inverse=True)
+
+    keys, codes = one(arrays[0])
+    keys = [keys]
+    for values in arrays[1:]:
+        distinct, inverse = one(values)
+        combined, codes = np.unique(codes * len(distinct) + inverse, return_inverse=True)
+        keys = [k[combined // len(distinct)] for k in keys] + [distinct[combined % len(distinct)]]
+    return list(zip(*(k.tolist() for k in keys))), codes
+
+# =============================================================================
+# Sources
+# =============================================================================
+
+class ColumnsSource:
+    """In-memory arrays, handed out chunk_rows rows at a time (as views)."""
+
+    def __init__(self, columns, chunk_rows=CHUNK_ROWS):
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        self.names = list(self.columns)
+        self.chunk_rows = chunk_rows
+
+    def batches(self, names):
+        rows = _rows(self.columns)
+        for start in range(0, builtins.max(rows, 1), self.chunk_rows):
+            yield {name: self.columns[name][start:start + self.chunk_rows] for name in names}
+
+    def __repr__(self):
+        return f"columns, {_rows(self.columns):,} rows"
+
+class CsvSource:
+    """A CSV file with a header line, parsed chunk_rows lines at a time."""
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, schema=None, delimiter=","):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.delimiter = delimiter
+        with open(path) as f:
+            self.names = next(f).rstrip("\r\n").split(delimiter)
+            sample = []
+            for number, line in enumerate(itertools.islice(f, INFER_ROWS), 2):
+                line = line.rstrip("\r\n")
+                if not line:
+                    continue  # empty: loadtxt skips these too
+                fields = line.split(delimiter)
+                if len(fields) != len(self.names):
+                    raise ValueError(f"{path}, line {number}: {len(fields)} fields, "
+                                     f"expected {len(self.names)}")
+                sample.append(fields)
+        self.schema = dict(schema or {})
+        self.inferred = [name for name in self.names if name not in self.schema]
+        for name in self.inferred:
+            i = self.names.index(name)
+            self.schema[name] = self._infer([fields[i] for fields in sample])
+
+    @staticmethod
+    def _infer(values):
+        for kind, parse in (("i8", int), ("f8", float)):
+            try:
+                for value in values:
+                    parse(value)
+                return kind
+            except ValueError:
+                pass
+        return "U"  # no width: sized per chunk (see batches)
+
+    WIDER = ("i8", "f8", "U")
+
+    def _widen(self, lines, names):
+        """
+        Widen the inferred types of 'names' to fit the values in 'lines';
+        False if all of them fit already.
+        """
+        rows = [line.split(self.delimiter) for line in map(str.rstrip, lines) if line]
+        widened = False
+        for name in names:
+            if name not in self.inferred or self.schema[name] == "U":
+                continue
+            i = self.names.index(name)
+            kind = self._infer([fields[i] for fields in rows if len(fields) > i])
+            if self.WIDER.index(kind) > self.WIDER.index(self.schema[name]):
+                self.schema[name] = kind
+                widened = True
+        return widened
+
+    def batches(self, names):
+        usecols = [self.names.index(name) for name in names]
+        with open(self.path) as f:
+            next(f)
+            while True:
+                lines = list(itertools.islice(f, self.chunk_rows))
+                if not lines:
+                    break
+                if not any(line.rstrip("\r\n") for line in lines):
+                    continue  # only empty lines: nothing for loadtxt to parse
+                while True:
+                    # Strings without a width are parsed as Python objects
+                    # and then converted to a str array as wide as the
+                    # chunk's longest value, so values longer than the
+                    # sampled ones are never cut short
+                    sized = {name for name in names
+                             if np.dtype(self.schema[name]) == np.dtype("U")}
+                    dtype = [(name, object if name in sized else self.schema[name])
+                             for name in names]
+                    try:
+                        table = np.loadtxt(lines, delimiter=self.delimiter, dtype=dtype,
+                                           usecols=usecols, ndmin=1)
+                        break
+                    except ValueError:
+                        if not self._widen(lines, names):
+                            raise
+                yield {name: table[name].astype(str) if name in sized
+                       else np.ascontiguousarray(table[name]) for name in names}
+
+    def __repr__(self):
+        return f"csv {self.path}"
+
+# =============================================================================
+# Plan nodes: each yields its output as a stream of chunks
+# =============================================================================
+
+class Scan:
+    def __init__(self, source, columns=None, predicates=()):
+        self.source = source
+        self.columns = columns        # None: all of them
+        self.predicates = predicates  # filters pushed into the scan
+
+    def names(self):
+        return self.columns if self.columns is not None else self.source.names
+
+    def batches(self):
+        read = list(self.names())
+        for predicate in self.predicates:
+            read += [name for name in sorted(predicate.references()) if name not in read]
+        for batch in self.source.batches(read):
+            if self.predicates:
+                mask = np.logical_and.reduce([p.evaluate(batch) for p in self.predicates])
+                batch = {name: batch[name][mask] for name in self.names()}
+            yield batch
+
+    def describe(self):
+        text = f"Scan {self.source!r} [{', '.join(self.names())}]"
+        if self.predicates:
+            text += " where " + " AND ".join(map(repr, self.predicates))
+        return text
+
+class Filter:
+    def __init__(self, child, condition):
+        self.child = child
+        self.condition = condition
+
+    def names(self):
+        return self.child.names()
+
+    def batches(self):
+        for batch in self.child.batches():
+            yield _take(batch, self.condition.evaluate(batch))
+
+    def describe(self):
+        return f"Filter {self.condition!r}"
+
+class WithColumn:
+    def __init__(self, child, name, expression):
+        self.child = child
+        self.name = name
+        self.expression = expression
+
+    def names(self):
+        names = list(self.child.names())
+        return names if self.name in names else names + [self.name]
+
+    def batches(self):
+        for batch in self.child.batches():
+            values = self.expression.evaluate(batch)
+            if np.ndim(values) == 0:
+                values = np.full(_rows(batch), values)
+            yield {**batch, self.name: values}
+
+    def describe(self):
+        return f"WithColumn {self.name} = {self.expression!r}"
+
+class Select:
+    def __init__(self, child, columns):
+        self.child = child
+        self.columns = columns
+
+    def names(self):
+        return [c.name for c in self.columns]
+
+    def batches(self):
+        for batch in self.child.batches():
+            out = {}
+            for c in self.columns:
+                values = c.evaluate(batch)
+                out[c.name] = values if np.ndim(values) else np.full(_rows(batch), values)
+            yield out
+
+    def describe(self):
+        return f"Select [{', '.join(map(repr, self.columns))}]"
+
+class Aggregate:
+    def __init__(self, child, keys, aggregates):
+        self.child = child
+        self.keys = keys              # Columns
+        self.aggregates = aggregates  # AggColumns
+
+    def names(self):
+        return [k.name for k in self.keys] + [a.name for a in self.aggregates]
+
+    @staticmethod
+    def _partial(agg, values, codes, groups):
+        """The aggregate of one chunk, per local group."""
+        if agg.func == "count":
+            return np.bincount(codes, minlength=groups)
+        if agg.func in ("sum", "avg"):
+            if values.dtype.kind == "f":
+                return np.bincount(codes, weights=values, minlength=groups)
+            totals = np.zeros(groups, np.int64)
+            np.add.at(totals, codes, values)
+            return totals
+        ufunc = np.minimum if agg.func == "min" else np.maximum
+        result = np.full(groups, Aggregate._identity(agg, values.dtype), values.dtype)
+        ufunc.at(result, codes, values)
+        return result
+
+    @staticmethod
+    def _identity(agg, dtype):
+        if agg.func not in ("min", "max"):
+            return 0
+        if dtype.kind == "f":
+            return np.inf if agg.func == "min" else -np.inf
+        if dtype.kind in "iu":
+            info = np.iinfo(dtype)
+            return info.max if agg.func == "min" else info.min
+        raise ValueError(f"{agg.func}() needs a numeric column, not {dtype}")
+
+    def batches(self):
+        table = {}   # group key tuple -> slot in the accumulators
+        states = [None] * len(self.aggregates)
+        counts = np.zeros(0, np.int64)  # rows per group, for avg
+        for batch in self.child.batches():
+            if not _rows(batch):
+                continue
+            if self.keys:
+                keys, codes = _factorize([k.evaluate(batch) for k in self.keys])
+            else:
+                keys, codes = [()], np.zeros(_rows(batch), np.intp)  # one global group
+            slots = np.fromiter((table.setdefault(key, len(table)) for key in keys),
+                                np.int64, len(keys))
+            groups = len(table)
+            counts = np.concatenate([counts, np.zeros(groups - len(counts), np.int64)])
+            counts[slots] += np.bincount(codes, minlength=len(keys))
+            for i, agg in enumerate(self.aggregates):
+                values = agg.column.evaluate(batch) if agg.column is not None else None
+                partial = self._partial(agg, values, codes, len(keys))
+                state = states[i]
+                if state is None:
+                    state = np.zeros(0, partial.dtype)
+                elif state.dtype != partial.dtype:
+                    # A CSV column widened mid-stream (int64 to float64)
+                    state = state.astype(np.promote_types(state.dtype, partial.dtype))
+                if len(state) < groups:
+                    fill = self._identity(agg, partial.dtype)
+                    state = np.concatenate([state, np.full(groups - len(state), fill, state.dtype)])
+                if agg.func == "min":
+                    state[slots] = np.minimum(state[slots], partial)
+                elif agg.func == "max":
+                    state[slots] = np.maximum(state[slots], partial)
+                else:
+                    state[slots] += partial
+                states[i] = state
+
+        if not self.keys and not table:
+            # A global aggregate of no rows is still one row
+            table[()] = 0
+            counts = np.zeros(1, np.int64)
+        out = {}
+        key_rows = list(table)
+        for j, key in enumerate(self.keys):
+            out[key.name] = np.array([k[j] for k in key_rows])
+        for agg, state in zip(self.aggregates, states):
+            if state is None:
+                empty = 0 if agg.func == "count" else np.nan
+                state = np.full(len(key_rows), empty, np.int64 if agg.func == "count" else None)
+            out[agg.name] = state / counts if agg.func == "avg" else state
+        yield out
+
+    def describe(self):
+        return (f"Aggregate [{', '.join(map(repr, self.keys))}] "
+                f"[{', '.join(f'{a.name}' for a in self.aggregates)}]")
+
+class Sort:
+    def __init__(self, child, orders):
+        self.child = child
+        self.orders = orders
+
+    def names(self):
+        return self.child.names()
+
+    def batches(self):
+        chunks = list(self.child.batches())
+        if chunks:
+            everything = _concat(chunks)
+            yield _take(everything, _sort_indices(everything, self.orders))
+
+    def describe(self):
+        return f"Sort [{', '.join(map(repr, self.orders))}]"
+
+class Limit:
+    def __init__(self, child, n):
+        self.child = child
+        self.n = n
+
+    def names(self):
+        return self.child.names()
+
+    def batches(self):
+        left = self.n
+        for batch in self.child.batches():
+            if left <= 0:
+                break  # stops the nodes below too: no more chunks are read
+            batch = {name: values[:left] for name, values in batch.items()}
+            left -= _rows(batch)
+            yield batch
+
+    def describe(self):
+        return f"Limit {self.n}"
+
+class TopK:
+    """orderBy(...).limit(k): the best k rows, without sorting the rest."""
+
+    def __init__(self, child, orders, k):
+        self.child = child
+        self.orders = orders
+        self.k = k
+
+    def names(self):
+        return self.child.names()
+
+    def batches(self):
+        best = None
+        for batch in self.child.batches():
+            if best is not None:
+                batch = _concat([best, batch])
+            best = _take(batch, _top_indices(batch, self.orders, self.k))
+        if best is not None:
+            yield _take(best, _sort_indices(best, self.orders))
+
+    def describe(self):
+        return f"TopK {self.k} [{', '.join(map(repr, self.orders))}]"
+
+# =============================================================================
+# Optimizer
+# =============================================================================
+
+def _push_filter(condition, node):
+    """Place 'condition' as far down below 'node' as it can go."""
+    needs = condition.references()
+    if isinstance(node, Scan):
+        return Scan(node.source, node.columns, node.predicates + (condition,))
+    if isinstance(node, WithColumn) and node.name not in needs:
+        return WithColumn(_push_filter(condition, node.child), node.name, node.expression)
+    if isinstance(node, (Filter, Sort)):
+        node = _copy(node, _push_filter(condition, node.child))
+        return node
+    if isinstance(node, Aggregate):
+        # Only conditions on plain group keys; below the aggregate they
+        # read the key's input column, which an alias may have renamed
+        sources = {k.name: k.args[0] for k in node.keys if k.op == "col"}
+        if needs <= sources.keys():
+            return Aggregate(_push_filter(condition.renamed(sources), node.child),
+                             node.keys, node.aggregates)
+    return Filter(node, condition)
+
+def _copy(node, child):
+    clone = object.__new__(type(node))
+    clone.__dict__.update(node.__dict__, child=child)
+    return clone
+
+def _rewrite(node):
+    """Top-k and filter pushdown, bottom up."""
+    if isinstance(node, Scan):
+        return node
+    child = _rewrite(node.child)
+    if isinstance(node, Limit) and isinstance(child, Sort):
+        return TopK(child.child, child.orders, node.n)
+    if isinstance(node, Filter):
+        return _push_filter(node.condition, child)
+    return _copy(node, child)
+
+def _prune(node, needed):
+    """Make the scan read only the columns in 'needed' (None: all)."""
+    if isinstance(node, Scan):
+        if needed is None:
+            return node
+        columns = [name for name in node.source.names if name in needed]
+        return Scan(node.source, columns, node.predicates)
+    if isinstance(node, Aggregate):
+        needed = set().union(*(c.references() for c in node.keys + node.aggregates))
+    elif isinstance(node, Select):
+        needed = set().union(*(c.references() for c in node.columns))
+    elif isinstance(node, WithColumn) and needed is not None:
+        needed = (needed - {node.name}) | node.expression.references()
+    elif isinstance(node, Filter) and needed is not None:
+        needed = needed | node.condition.references()
+    elif isinstance(node, (Sort, TopK)) and needed is not None:
+        needed = needed.union(*(o.column.references() for o in node.orders))
+    return _copy(node, _prune(node.child, needed))
+
+def optimize(plan):
+    return _prune(_rewrite(plan), None)
+
+# =============================================================================
+# DataFrame API
+# =============================================================================
+
+class DataFrame:
+    """A lazy query: a plan that runs when a result is asked for."""
+
+    def __init__(self, plan, optimize=True):
+        self.plan = plan
+        self._optimize = optimize
+
+    @classmethod
+    def from_columns(cls, columns, chunk_rows=CHUNK_ROWS, optimize=True):
+        """A DataFrame of {name: array-like} columns."""
+        return cls(Scan(ColumnsSource(columns, chunk_rows)), optimize)
+
+    def _then(self, plan):
+        return DataFrame(plan, self._optimize)
+
+    @property
+    def columns(self):
+        return list(self.plan.names())
+
+    # ------------------------------------------------------------------
+    # Transformations
+    # ------------------------------------------------------------------
+
+    def filter(self, condition):
+        return self._then(Filter(self.plan, condition))
+
+    where = filter
+
+    def withColumn(self, name, expression):
+        return self._then(WithColumn(self.plan, name, _as_column(expression)))
+
+    def select(self, *columns):
+        return self._then(Select(self.plan, [_as_column(c) for c in columns]))
+
+    def groupBy(self, *columns):
+        return GroupedData(self, [_as_column(c) for c in columns])
+
+    def orderBy(self, *orders):
+        return self._then(Sort(self.plan, [_as_order(o) for o in orders]))
+
+    sort = orderBy
+
+    def limit(self, n):
+        return self._then(Limit(self.plan, n))
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+
+    def _batches(self):
+        return (optimize(self.plan) if self._optimize else self.plan).batches()
+
+    def toNumpy(self):
+        """The result as {name: array}."""
+        chunks = list(self._batches())
+        if not chunks:
+            return {name: np.zeros(0) for name in self.columns}
+        return _concat(chunks)
+
+    def collect(self):
+        """The result as a list of {name: value} rows."""
+        result = self.toNumpy()
+        names = list(result)
+        return [dict(zip(names, row)) for row in zip(*(result[n].tolist() for n in names))]
+
+    def count(self):
+        return builtins.sum(_rows(batch) for batch in self._batches())
+
+    def show(self, n=20):
+        """Print the first n rows as a table, as Spark does."""
+        rows = self.limit(n).collect()
+        names = self.columns
+        cells = [[str(row[name]) for name in names] for row in rows]
+        widths = [builtins.max([len(name)] + [len(r[i]) for r in cells])
+                  for i, name in enumerate(names)]
+        rule = "+" + "+".join("-" * w for w in widths) + "+"
+        print(rule)
+        print("|" + "|".join(name.rjust(w) for name, w in zip(names, widths)) + "|")
+        print(rule)
+        for r in cells:
+            print("|" + "|".join(cell.rjust(w) for cell, w in zip(r, widths)) + "|")
+        print(rule)
+
+    def explain(self):
+        """Print the plan that would run, top node first."""
+        node = optimize(self.plan) if self._optimize else self.plan
+        print("== Optimized Plan ==" if self._optimize else "== Plan ==")
+        depth = 0
+        while True:
+            print(("   " * (depth - 1) + "+- " if depth else "") + node.describe())
+            if isinstance(node, Scan):
+                break
+            node, depth = node.child, depth + 1
+
+class GroupedData:
+    def __init__(self, frame, keys):
+        self.frame = frame
+        self.keys = keys
+
+    def agg(self, *aggregates):
+        return self.frame._then(Aggregate(self.frame.plan, self.keys, list(aggregates)))
+
+def read_csv(path, chunk_rows=CHUNK_ROWS, schema=None, delimiter=",", optimize=True):
+    """A DataFrame over a CSV file, read in chunks of chunk_rows lines."""
+    return DataFrame(Scan(CsvSource(path, chunk_rows, schema, delimiter)), optimize)
+
+def sample_sales(rows, stores=1000, seed=0):
+    """Random raw_sales_df columns: store_id, category, qty, price."""
+    rng = np.random.default_rng(seed)
+    categories = np.array(["Electronics", "Grocery", "Clothing", "Toys", "Garden"])
+    return {
+        "store_id": rng.integers(1, stores + 1, rows),
+        "category": categories[rng.integers(0, len(categories), rows)],
+        "qty": rng.integers(1, 10, rows),
+        "price": np.round(rng.uniform(1.0, 500.0, rows), 2),
+    }
+
+if __name__ == "__main__":
+    raw_sales_df = DataFrame.from_columns(sample_sales(100_000), chunk_rows=25_000)
+    top = (
+        raw_sales_df
+        .filter(col("category") == "Electronics")
+        .withColumn("total_price", col("qty") * col("price"))
+        .groupBy("store_id")
+        .agg(sum("total_price").alias("revenue"))
+        .orderBy(desc("revenue"))
+        .limit(10)
+    )
+    top.explain()
+    print()
+    top.show()
@@ -1,4 +1,10 @@
-from pyspark.sql import functions as F
+try:
+    from pyspark.sql import functions as F
+except ImportError:
+    # No Spark here: the same chain on a local columnar engine
+    # (local_dataframe.py), over random sales data
+    import local_dataframe as F
+    raw_sales_df = F.DataFrame.from_columns(F.sample_sales(100_000))
 
 # Creating a fluent chain
 final_df = (
@@ -0,0 +1,78 @@
+"""
+Tests for local_dataframe.py: CSV reading and filter pushdown.
+
+Usage:    python -m pytest test_local_dataframe.py
+"""
+
+import local_dataframe as F
+
+def write(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return str(path)
+
+def test_csv_strings_longer_than_the_sample_are_kept(tmp_path):
+    # The first INFER_ROWS values are short; two long values that only
+    # differ at the end come later and must stay two groups
+    short = ["s,1"] * F.INFER_ROWS
+    long = ["x" * 100 + "a,2", "x" * 100 + "b,3"]
+    path = write(tmp_path / "long.csv", ["name,n", *short, *long])
+    for chunk_rows in (F.CHUNK_ROWS, 7):
+        df = F.read_csv(path, chunk_rows)
+        rows = df.groupBy("name").agg(F.sum("n").alias("total")).collect()
+        assert sorted((r["name"], r["total"]) for r in rows) == [
+            ("s", F.INFER_ROWS), ("x" * 100 + "a", 2), ("x" * 100 + "b", 3)]
+
+def test_csv_blank_lines_are_skipped(tmp_path):
+    path = write(tmp_path / "blank.csv", ["a,b", "1,x", "", "2,y", "", "", "3,z", ""])
+    df = F.read_csv(path)
+    assert df.collect() == [{"a": 1, "b": "x"}, {"a": 2, "b": "y"}, {"a": 3, "b": "z"}]
+    assert F.read_csv(path, chunk_rows=1).count() == 3
+
+def test_csv_short_line_names_the_line(tmp_path):
+    path = write(tmp_path / "short.csv", ["a,b", "1,x", "2"])
+    try:
+        F.read_csv(path)
+    except ValueError as e:
+        assert "line 3" in str(e)
+    else:
+        raise AssertionError("no error for a line with too few fields")
+
+def test_filter_on_aliased_group_key_is_pushed_down():
+    df = F.DataFrame.from_columns({"a": [1, 1, 2, 3], "x": [1, 2, 3, 4]})
+    query = (df.groupBy(F.col("a").alias("b"))
+               .agg(F.sum("x").alias("s"))
+               .filter(F.col("b") >= 2))
+    plan = F.optimize(query.plan)
+    assert isinstance(plan, F.Aggregate) and repr(plan.child.predicates[0]) == "(a >= 2)"
+    expected = [{"b": 2, "s": 3}, {"b": 3, "s": 4}]
+    assert sorted(query.collect(), key=lambda r: r["b"]) == expected
+    unoptimized = F.DataFrame(query.plan, optimize=False)
+    assert sorted(unoptimized.collect(), key=lambda r: r["b"]) == expected
+
+def test_filter_on_aggregate_or_computed_key_stays_above():
+    df = F.DataFrame.from_columns({"a": [1, 1, 2], "x": [1, 2, 3]})
+    by_sum = df.groupBy("a").agg(F.sum("x").alias("s")).filter(F.col("s") > 2)
+    assert isinstance(F.optimize(by_sum.plan), F.Filter)
+    assert by_sum.collect() == [{"a": 1, "s": 3}, {"a": 2, "s": 3}]
+    by_expression = (df.groupBy((F.col("a") * 10).alias("k"))
+                       .agg(F.count().alias("n"))
+                       .filter(F.col("k") == 20))
+    assert isinstance(F.optimize(by_expression.plan), F.Filter)
+    assert by_expression.collect() == [{"k": 20, "n": 1}]
+
+def test_csv_types_widen_after_the_sample(tmp_path):
+    ints = [f"{i},{i},k{i % 3}" for i in range(F.INFER_ROWS)]
+    path = write(tmp_path / "widen.csv", ["n,m,key", *ints, "2.5,x,k0", "3,4,k1"])
+    for chunk_rows in (F.CHUNK_ROWS, 64):
+        df = F.read_csv(path, chunk_rows)
+        total = df.groupBy().agg(F.sum("n").alias("total")).collect()
+        assert total == [{"total": sum(range(F.INFER_ROWS)) + 2.5 + 3}]
+        values = df.toNumpy()["m"]
+        assert values.dtype.kind == "U" and values[-2:].tolist() == ["x", "4"]
+
+def test_global_aggregate():
+    df = F.DataFrame.from_columns({"x": [1, 2, 3], "y": [4.0, 5.0, 6.0]}, chunk_rows=2)
+    rows = df.groupBy().agg(F.sum("x"), F.count(), F.min("y"), F.avg("y")).collect()
+    assert rows == [{"sum(x)": 6, "count(1)": 3, "min(y)": 4.0, "avg(y)": 5.0}]
+    empty = df.filter(F.col("x") > 10).groupBy().agg(F.count(), F.sum("x")).collect()
+    assert len(empty) == 1 and empty[0]["count(1)"] == 0
@@ -0,0 +1,119 @@
+"""
+Benchmark: LocalContext (local_rdd.py) pipelines vs plain Python loops.
+
+Two workloads over --n elements:
+
+    squares     filter(even).map(square).reduce(add) over range(n)
+    wordcount   flatMap(split).map((word, 1)).reduceByKey(add) over n words
+                of generated text (--vocabulary distinct words)
+
+each run as
+
+    loop        a for loop with an if and a running total (or a dict)
+    builtins    sum() over a generator / collections.Counter
+    rdd x1      LocalContext(workers=1): the fused pipeline, in-process
+    rdd xN      LocalContext(workers=N) for each --workers count
+
+and reports the time and the speedup over the loop. Worker pools pay for
+forking and for pickling results back, so they only win with several CPUs
+and enough work per element.
+
+It also reports the start-up cost: creating a LocalContext and running a
+5-element pipeline (the job of rdd.py), which a JVM-backed SparkContext
+takes seconds for.
+
+Usage:    python bench_rdd.py [--n N] [--workers 2,4] [--vocabulary N]
+"""
+
+import argparse
+import collections
+import operator
+import os
+import random
+import time
+
+from local_rdd import LocalContext
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+def squares_loop(n):
+    total = 0
+    for x in range(n):
+        if x % 2 == 0:
+            total += x * x
+    return total
+
+def squares_builtins(n):
+    return sum(x * x for x in range(n) if x % 2 == 0)
+
+def squares_rdd(sc, n):
+    return sc.parallelize(range(n)) \
+             .filter(lambda x: x % 2 == 0) \
+             .map(lambda x: x * x) \
+             .reduce(operator.add)
+
+def words_loop(lines):
+    counts = {}
+    for line in lines:
+        for word in line.split():
+            counts[word] = counts.get(word, 0) + 1
+    return counts
+
+def words_builtins(lines):
+    return collections.Counter(word for line in lines for word in line.split())
+
+def words_rdd(sc, lines):
+    return dict(sc.parallelize(lines)
+                  .flatMap(str.split)
+                  .map(lambda word: (word, 1))
+                  .reduceByKey(operator.add)
+                  .collect())
+
+def make_lines(n, vocabulary, words_per_line=10):
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(vocabulary)]
+    return [" ".join(rng.choices(words, k=words_per_line))
+            for _ in range(n // words_per_line)]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--n", type=int, default=2_000_000)
+    arg_parser.add_argument("--workers", default="2,4")
+    arg_parser.add_argument("--vocabulary", type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    seconds, result = timed(lambda: LocalContext().parallelize([2, 4, 6, 8, 10])
+                            .filter(lambda x: x % 2 == 0).map(lambda x: x * x)
+                            .reduce(operator.add))
+    print(f"start-up: context + 5-element pipeline in {seconds * 1e3:.2f} ms (result {result})")
+    print()
+
+    lines = make_lines(args.n, args.vocabulary)
+    workloads = {
+        "squares": (lambda: squares_loop(args.n), lambda: squares_builtins(args.n),
+                    lambda sc: squares_rdd(sc, args.n)),
+        "wordcount": (lambda: words_loop(lines), lambda: words_builtins(lines),
+                      lambda sc: words_rdd(sc, lines)),
+    }
+    contexts = [("rdd x1", LocalContext(workers=1))]
+    contexts += [(f"rdd x{w}", LocalContext(workers=w)) for w in map(int, args.workers.split(","))]
+
+    print(f"n = {args.n:,}, {os.cpu_count()} CPUs")
+    print(f"{'workload':<10} {'engine':<9} {'seconds':>9} {'vs loop':>8}")
+    print("-" * 39)
+    for name, (loop, builtins, rdd) in workloads.items():
+        base, expected = timed(loop)
+        print(f"{name:<10} {'loop':<9} {base:9.3f} {1.0:8.2f}")
+        seconds, result = timed(builtins)
+        assert result == expected
+        print(f"{name:<10} {'builtins':<9} {seconds:9.3f} {base / seconds:8.2f}")
+        for label, sc in contexts:
+            seconds, result = timed(lambda: rdd(sc))
+            assert result == expected, f"{label} gave a different result"
+            print(f"{name:<10} {label:<9} {seconds:9.3f} {base / seconds:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+A local, pure-Python stand-in for Spark's RDD API, for running the
+functional pipelines of this chapter without a JVM or a cluster.
+
+    sc = LocalContext()
+    sc.parallelize(range(10)).filter(lambda x: x % 2 == 0) \\
+      .map(lambda x: x * x).reduce(lambda a, b: a + b)          # 120
+
+Supported: parallelize, map, filter, flatMap, reduce, reduceByKey, collect
+(plus count and getNumPartitions).
+
+How it runs:
+
+    lazy        transformations only record a step; nothing runs until an
+                action (collect, reduce, count) needs a result
+    fused       the narrow steps (map, filter, flatMap) between two
+                shuffles become one chain of iterators, so each partition
+                is read once and no intermediate lists are built
+    parallel    the partitions of a stage run in a pool of forked worker
+                processes; forked workers inherit the data and the lambdas,
+                so neither has to be pickled (lambdas cannot be), and only
+                results travel back
+    tree        reduce() combines the per-partition results pairwise,
+                in log2(partitions) rounds, as do the reduce side of
+                reduceByKey() (whose map side combines within each
+                partition first, like Spark's map-side combine)
+
+Small jobs (fewer than parallel_threshold elements) and platforms without
+fork() run the same stages in the calling process: forking a pool costs
+more than it saves on a few thousand elements.
+
+Usage:    python local_rdd.py
+"""
+
+import functools
+import itertools
+import multiprocessing
+import os
+
+PARALLEL_THRESHOLD = 10_000  # elements; below this, stages run in-process
+
+# The stage being run. Set before the worker pool forks, so every worker
+# inherits it; tasks then only need their partition index.
+_STAGE = None
+
+def _pipeline(ops, items):
+    """Chain the narrow steps over one partition: a single lazy pass."""
+    for kind, f in ops:
+        if kind == "map":
+            items = map(f, items)
+        elif kind == "filter":
+            items = filter(f, items)
+        elif kind == "flatMap":
+            items = itertools.chain.from_iterable(map(f, items))
+    return items
+
+def _tree_reduce(f, values):
+    """Combine neighbours pairwise until one value is left (order kept)."""
+    while len(values) > 1:
+        values = [f(values[i], values[i + 1]) if i + 1 < len(values) else values[i]
+                  for i in range(0, len(values), 2)]
+    return values[0]
+
+def _merge_into(f, left, right):
+    """Fold the (key -> value) dict 'right' into 'left' with f."""
+    for key, value in right.items():
+        left[key] = f(left[key], value) if key in left else value
+    return left
+
+def _run_task(index):
+    """Run the current stage on one partition."""
+    action, partitions, ops, f, buckets = _STAGE
+    if action == "merge":
+        # Reduce side of reduceByKey: bucket 'index' of every map-side result
+        # (those dicts belong to this shuffle alone, so merging may modify them)
+        merged = _tree_reduce(functools.partial(_merge_into, f),
+                              [combined[index] for combined in partitions] or [{}])
+        return list(merged.items())
+
+    items = iter(_pipeline(ops, partitions[index]))
+    if action == "collect":
+        return list(items)
+    if action == "count":
+        return sum(1 for _ in items)
+    if action == "reduce":
+        first = next(items, _run_task)  # the function itself marks "empty"
+        if first is _run_task:
+            return (False, None)
+        return (True, functools.reduce(f, items, first))
+    if action == "combine":
+        # Map side of reduceByKey: one dict per output partition
+        combined = [{} for _ in range(buckets)]
+        for key, value in items:
+            bucket = combined[hash(key) % buckets]
+            bucket[key] = f(bucket[key], value) if key in bucket else value
+        return combined
+    raise ValueError(f"unknown action: {action}")
+
+class LocalContext:
+    """
+    The SparkContext of this module: makes RDDs and runs their stages.
+
+    workers             processes per stage (default: usable CPUs)
+    parallel_threshold  stages over fewer elements run in-process
+    """
+
+    def __init__(self, workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+        if workers is None:
+            workers = (len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                       else os.cpu_count() or 1)
+        if workers < 1:
+            raise ValueError("workers should be >= 1")
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self.can_fork = "fork" in multiprocessing.get_all_start_methods()
+        self.stages = 0           # stages run
+        self.parallel_stages = 0  # ... of which in a worker pool
+
+    @property
+    def defaultParallelism(self):
+        return self.workers
+
+    def parallelize(self, data, numSlices=None):
+        """An RDD of 'data' cut into numSlices contiguous partitions."""
+        if not isinstance(data, range):
+            data = list(data)  # ranges slice into ranges, without a copy
+        slices = max(1, numSlices or self.defaultParallelism)
+        bounds = [len(data) * i // slices for i in range(slices + 1)]
+        return RDD(self, [data[bounds[i]:bounds[i + 1]] for i in range(slices)])
+
+    def run_stage(self, action, partitions, ops=(), f=None, buckets=None, tasks=None,
+                  size=None):
+        """Run _run_task over 'tasks' partitions, in a pool if worth it."""
+        global _STAGE
+        tasks = len(partitions) if tasks is None else tasks
+        size = sum(map(len, partitions)) if size is None else size
+        parallel = (self.can_fork and self.workers > 1 and tasks > 1
+                    and size >= self.parallel_threshold)
+        self.stages += 1
+        _STAGE = (action, partitions, ops, f, buckets)
+        try:
+            if not parallel:
+                return [_run_task(i) for i in range(tasks)]
+            self.parallel_stages += 1
+            context = multiprocessing.get_context("fork")
+            with context.Pool(min(self.workers, tasks)) as pool:
+                return pool.map(_run_task, range(tasks), chunksize=1)
+        finally:
+            _STAGE = None
+
+    def stop(self):
+        """Nothing to release; kept for SparkContext compatibility."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class RDD:
+    """
+    A partitioned collection plus the narrow steps still to apply to it.
+
+    The partitions come either from parallelize() or, after reduceByKey(),
+    from a shuffle that runs (once, shared by every RDD derived from it)
+    when the first action needs it.
+    """
+
+    def __init__(self, context, partitions=None, ops=(), shuffle=None, base=None):
+        self.context = context
+        self._partitions = partitions
+        self._shuffle = shuffle  # (parent RDD, f, numPartitions) for reduceByKey
+        self._ops = ops
+        self._base = base or self  # the RDD that owns the partitions
+
+    # ------------------------------------------------------------------
+    # Transformations (lazy)
+    # ------------------------------------------------------------------
+
+    def _then(self, kind, f):
+        return RDD(self.context, ops=self._ops + ((kind, f),), base=self._base)
+
+    def map(self, f):
+        return self._then("map", f)
+
+    def filter(self, f):
+        return self._then("filter", f)
+
+    def flatMap(self, f):
+        return self._then("flatMap", f)
+
+    def reduceByKey(self, f, numPartitions=None):
+        """Merge the values of each key of an RDD of (key, value) pairs."""
+        buckets = numPartitions or self.getNumPartitions()
+        return RDD(self.context, shuffle=(self, f, buckets))
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+
+    def _source(self):
+        base = self._base
+        if base._partitions is None:
+            parent, f, buckets = base._shuffle
+            maps = self.context.run_stage("combine", parent._source(), parent._ops,
+                                          f, buckets)
+            size = sum(len(bucket) for combined in maps for bucket in combined)
+            base._partitions = self.context.run_stage("merge", maps, f=f, tasks=buckets,
+                                                      size=size)
+        return base._partitions
+
+    def collect(self):
+        parts = self.context.run_stage("collect", self._source(), self._ops)
+        return list(itertools.chain.from_iterable(parts))
+
+    def count(self):
+        return sum(self.context.run_stage("count", self._source(), self._ops))
+
+    def reduce(self, f):
+        """Reduce with an associative f: within partitions, then as a tree."""
+        results = self.context.run_stage("reduce", self._source(), self._ops, f)
+        partials = [value for nonempty, value in results if nonempty]
+        if not partials:
+            raise ValueError("Can not reduce() empty RDD")
+        return _tree_reduce(f, partials)
+
+    def getNumPartitions(self):
+        base = self._base
+        if base._partitions is None:
+            return base._shuffle[2]
+        return len(base._partitions)
+
+if __name__ == "__main__":
+    sc = LocalContext()
+    squares = sc.parallelize([2, 4, 6, 8, 10]) \
+                .filter(lambda x: x % 2 == 0) \
+                .map(lambda x: x * x) \
+                .reduce(lambda a, b: a + b)
+    print(f"sum of squares: {squares}")  # 220
+
+    lines = ["to be or not to be", "that is the question"] * 10_000
+    counts = sc.parallelize(lines) \
+               .flatMap(str.split) \
+               .map(lambda word: (word, 1)) \
+               .reduceByKey(lambda a, b: a + b) \
+               .collect()
+    print(f"word counts: {sorted(counts)}")
+    print(f"{sc.stages} stages, {sc.parallel_stages} in a pool of {sc.workers} worker(s)")
@@ -1,7 +1,15 @@
-from pyspark.sql import SparkSession
+try:
+    from pyspark.sql import SparkSession
+except ImportError:
+    SparkSession = None
 
-spark = SparkSession.builder.appName("FunctionalExample").getOrCreate()
-sc = spark.sparkContext
+if SparkSession is not None:
+    spark = SparkSession.builder.appName("FunctionalExample").getOrCreate()
+    sc = spark.sparkContext
+else:
+    # No Spark here: the same API on local processes (local_rdd.py)
+    from local_rdd import LocalContext
+    sc = LocalContext()
 
 # Data: A list of integers
 data = [2, 4, 6, 8, 10]
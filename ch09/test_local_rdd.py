@@ -0,0 +1,62 @@
+"""
+Tests for local_rdd.py: every pipeline must give what plain Python gives,
+in-process and in a worker pool alike.
+
+Usage:    python -m pytest test_local_rdd.py
+"""
+
+from collections import Counter
+from functools import reduce
+
+import pytest
+
+from local_rdd import LocalContext
+
+LINES = ["to be or not to be", "that is the question", "", "be quick"] * 50
+
+@pytest.fixture(params=["in-process", "pool"])
+def sc(request):
+    if request.param == "in-process":
+        return LocalContext(workers=1)
+    return LocalContext(workers=2, parallel_threshold=0)
+
+def test_narrow_steps_and_reduce(sc):
+    data = list(range(1000))
+    rdd = sc.parallelize(data, 7).filter(lambda x: x % 3).map(lambda x: x * x)
+    expected = [x * x for x in data if x % 3]
+    assert rdd.collect() == expected  # partition order is kept
+    assert rdd.count() == len(expected)
+    assert rdd.reduce(lambda a, b: a + b) == sum(expected)
+    assert sc.parallelize(["a", "b", "c"], 2).reduce(lambda a, b: a + b) == "abc"
+
+def test_word_count(sc):
+    counts = (sc.parallelize(LINES, 5)
+                .flatMap(str.split)
+                .map(lambda word: (word, 1))
+                .reduceByKey(lambda a, b: a + b, numPartitions=3))
+    assert counts.getNumPartitions() == 3
+    assert sorted(counts.collect()) == sorted(Counter(" ".join(LINES).split()).items())
+    longest = counts.map(lambda pair: pair[1]).reduce(max)
+    assert longest == max(Counter(" ".join(LINES).split()).values())
+
+def test_shuffle_runs_once(sc):
+    counts = sc.parallelize(range(100), 4).map(lambda x: (x % 5, x)) \
+               .reduceByKey(lambda a, b: a + b)
+    stages = sc.stages
+    assert dict(counts.collect()) == {k: sum(range(k, 100, 5)) for k in range(5)}
+    assert sc.stages == stages + 3  # combine, merge, collect
+    assert counts.filter(lambda pair: pair[0]).count() == 4
+    assert sc.stages == stages + 4  # the shuffled partitions are reused
+
+def test_empty_partitions(sc):
+    rdd = sc.parallelize(range(3), 8)
+    assert rdd.getNumPartitions() == 8
+    assert rdd.reduce(lambda a, b: a + b) == reduce(lambda a, b: a + b, range(3))
+    with pytest.raises(ValueError):
+        rdd.filter(lambda x: x > 10).reduce(lambda a, b: a + b)
+
+def test_pool_is_used_above_the_threshold():
+    sc = LocalContext(workers=2, parallel_threshold=100)
+    sc.parallelize(range(10), 2).collect()
+    sc.parallelize(range(1000), 2).collect()
+    assert (sc.stages, sc.parallel_stages) == (2, 1)
@@ -1,5 +1,10 @@
 import asyncio
+import contextlib
+import os
+import sqlite3
 import time
+from collections import deque
+from urllib.parse import urlsplit
 import aiohttp
 from aiohttp import ClientSession
 import logging
@@ -25,44 +30,262 @@ URLS = [
     'https://www.postgresql.org'
 ]
 
+# Connection pool settings used by make_session()
+POOL_LIMIT = 100           # open connections in total
+POOL_LIMIT_PER_HOST = 10   # open connections to any one host
+KEEPALIVE_TIMEOUT = 30     # seconds an idle connection stays open for reuse
+DNS_CACHE_TTL = 300        # seconds a resolved host name is reused
 
-async def fetch_url(url: str, session: ClientSession) -> tuple:
-    """Fetch content from a URL and return the URL and response status"""
+# Streaming reads: bytes kept per page, and how much of the rest of a body
+# is still worth reading just to keep the connection reusable
+SAMPLE_BYTES = 1024
+DRAIN_LIMIT = 64 * 1024
+
+# Response cache used by main(): kept between runs, next to this script
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fetch_cache.sqlite")
+CACHE_MAX_BYTES = 50 * 2**20
+
+
+def make_session(limit: int = POOL_LIMIT, limit_per_host: int = POOL_LIMIT_PER_HOST,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 ttl_dns_cache: int = DNS_CACHE_TTL, **session_options) -> ClientSession:
+    """
+    Create a ClientSession with an explicitly configured connection pool.
+    Create it once and pass it to every batch, so later batches reuse the
+    open connections and cached DNS lookups of earlier ones.
+    """
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                     keepalive_timeout=keepalive_timeout,
+                                     use_dns_cache=True, ttl_dns_cache=ttl_dns_cache)
+    return ClientSession(connector=connector, **session_options)
+
+
+@contextlib.asynccontextmanager
+async def session_scope(session: ClientSession = None):
+    """Use the given session, or a new pooled one closed afterwards."""
+    if session is not None:
+        yield session
+    else:
+        async with make_session() as own:
+            yield own
+
+
+def connection_counter() -> tuple:
+    """
+    A TraceConfig for make_session(trace_configs=[...]) and the dict it
+    fills: connections "opened" and pooled ones "reused", per request.
+    """
+    counts = {"opened": 0, "reused": 0}
+    trace = aiohttp.TraceConfig()
+
+    async def opened(session, context, params):
+        counts["opened"] += 1
+
+    async def reused(session, context, params):
+        counts["reused"] += 1
+
+    trace.on_connection_create_end.append(opened)
+    trace.on_connection_reuseconn.append(reused)
+    return trace, counts
+
+
+async def read_prefix(response, max_bytes: int) -> bytes:
+    """
+    Read at most max_bytes of the body, then stop the download. The
+    connection returns to the pool only if the body was read to the end,
+    so a short remainder (up to DRAIN_LIMIT bytes) is drained; a longer one
+    is cut off by closing the connection.
+
+    Sizes are in decoded bytes, as response.content hands them out.
+    Content-Length only says in advance that the rest is too long when
+    the body is not compressed (it counts the bytes on the wire);
+    otherwise the drain itself finds out.
+    """
+    chunks, size = [], 0
+    while size < max_bytes:
+        chunk = await response.content.read(max_bytes - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+
+    if not response.content.at_eof():
+        length = response.content_length
+        if "Content-Encoding" in response.headers:
+            length = None
+        if length is None or length - size <= DRAIN_LIMIT:
+            drained = 0
+            while drained < DRAIN_LIMIT:
+                chunk = await response.content.read(DRAIN_LIMIT - drained)
+                if not chunk:
+                    break
+                drained += len(chunk)
+        if not response.content.at_eof():
+            response.close()
+    return b"".join(chunks)
+
+
+class ResponseCache:
+    """
+    On-disk HTTP cache for fetch_url(), with conditional revalidation.
+
+    - Responses that carry an ETag or Last-Modified header are stored in a
+      sqlite file (status, validators and the body, or the first max_bytes
+      of it), so the cache survives between runs.
+    - A later fetch of the same URL sends If-None-Match / If-Modified-Since;
+      an unchanged resource comes back as a bodiless 304 and the stored
+      copy is used.
+    - The stored bodies are bounded by max_bytes in total; the least
+      recently used entries are evicted first.
+    - Concurrent fetch_url() calls for one URL and max_bytes share a
+      single request.
+
+    sqlite calls run on the event loop thread; they are small, local reads
+    and writes next to a network round trip.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.in_flight = {}  # (url, max_bytes) -> task of the one request being made
+        self.stored = self.revalidated = self.joined = self.evictions = 0
+        # Autocommit + WAL, as in ParseCache (ch04): durable, and readers
+        # in other processes do not block
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                        "url TEXT PRIMARY KEY, status INTEGER, etag TEXT, "
+                        "last_modified TEXT, body BLOB, complete INTEGER, "
+                        "size INTEGER, accessed REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed "
+                        "ON responses (accessed)")
+        self.size = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def validators(self, url: str, max_bytes: int = None) -> dict:
+        """Conditional request headers for 'url', if its stored copy would do."""
+        row = self.db.execute("SELECT etag, last_modified, complete, size FROM responses "
+                              "WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified, complete, size = row
+        if not complete and (max_bytes is None or size < max_bytes):
+            return {}  # only a shorter prefix is stored: fetch it all again
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def hit(self, url: str) -> bytes:
+        """A 304 confirmed the stored copy: mark it used and return its body
+        (None if it was evicted in the meantime)."""
+        row = self.db.execute("SELECT body FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        self.revalidated += 1
+        self.db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+        return row[0]
+
+    def store(self, url: str, response, body: bytes, complete: bool) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status != 200 or not (etag or last_modified) or len(body) > self.max_bytes:
+            return  # nothing to revalidate with, or too big to keep
+        old = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, response.status, etag, last_modified, body, int(complete),
+                         len(body), time.time()))
+        self.size += len(body) - (old[0] if old else 0)
+        self.stored += 1
+        while self.size > self.max_bytes:
+            url, size = self.db.execute("SELECT url, size FROM responses "
+                                        "ORDER BY accessed LIMIT 1").fetchone()
+            self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.size -= size
+            self.evictions += 1
+
+    def close(self) -> None:
+        self.db.close()
+
+
+async def fetch_url(url: str, session: ClientSession, max_bytes: int = None,
+                    cache: ResponseCache = None) -> tuple:
+    """
+    Fetch content from a URL and return the URL and response status.
+    With max_bytes, stream only the first max_bytes of the body. With a
+    cache, revalidate a stored copy (status 304 when it is still current)
+    and join a request for the same URL that is already in flight.
+    """
+    if cache is None:
+        return await fetch_once(url, session, max_bytes)
+
+    # Keyed by max_bytes too: a caller wanting more of the body than the
+    # request in flight reads must not get its shorter prefix
+    key = (url, max_bytes)
+    task = cache.in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_once(url, session, max_bytes, cache))
+        cache.in_flight[key] = task
+        task.add_done_callback(lambda _: cache.in_flight.pop(key, None))
+    else:
+        cache.joined += 1
+    # shield: one caller being cancelled must not cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def fetch_once(url: str, session: ClientSession, max_bytes: int = None,
+                     cache: ResponseCache = None, revalidate: bool = True) -> tuple:
+    """Make the request for fetch_url()"""
     try:
-        start_time = time.time()
-        async with session.get(url) as response:
-            # Just get the first chunk of content
-            content = await response.read()
-            content_sample = content[:1024]  # Just take the first 1024 bytes for analysis
-            elapsed = time.time() - start_time
-            logger.info(f"Fetched {url} with status {response.status} in {elapsed:.2f} seconds")
-            return url, response.status, elapsed
+        start_time = time.perf_counter()
+        headers = cache.validators(url, max_bytes) if cache and revalidate else None
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cache:
+                content = cache.hit(url)
+            elif max_bytes is None:
+                content = await response.read()
+            else:
+                content = await read_prefix(response, max_bytes)
+            if content is not None:
+                if cache and response.status != 304:
+                    complete = max_bytes is None or len(content) < max_bytes
+                    cache.store(url, response, content, complete)
+                content_sample = content[:1024]  # Just take the first 1024 bytes for analysis
+                elapsed = time.perf_counter() - start_time
+                logger.info(f"Fetched {url} with status {response.status} in {elapsed:.2f} seconds")
+                return url, response.status, elapsed
+        # A 304, but the stored copy was evicted since validators(). Now
+        # that this response is released, ask once more, unconditionally
+        return await fetch_once(url, session, max_bytes, cache, revalidate=False)
     except Exception as e:
         logger.error(f"Error fetching {url}: {str(e)}")
         return url, f"Error: {str(e)}", None
 
 
-async def fetch_all_urls(urls: list) -> list:
+async def fetch_all_urls(urls: list, session: ClientSession = None,
+                         max_bytes: int = None, cache: ResponseCache = None) -> list:
     """Concurrently fetch all URLs"""
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
         tasks = []
         for url in urls:
-            tasks.append(fetch_url(url, session))
+            tasks.append(fetch_url(url, session, max_bytes, cache))
 
         # Execute all tasks concurrently and gather results
         results = await asyncio.gather(*tasks)
         return results
 
 
-async def process_with_semaphore(urls: list, limit: int = 5) -> list:
+async def process_with_semaphore(urls: list, limit: int = 5, session: ClientSession = None,
+                                 max_bytes: int = None) -> list:
     """Fetch URLs with a limit on concurrent connections using semaphore"""
     semaphore = asyncio.Semaphore(limit)
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
         tasks = []
 
         async def fetch_with_semaphore(url):
             async with semaphore:  # Only allow `limit` concurrent requests
-                return await fetch_url(url, session)
+                return await fetch_url(url, session, max_bytes)
 
         for url in urls:
             tasks.append(fetch_with_semaphore(url))
@@ -71,22 +294,186 @@ async def process_with_semaphore(urls: list, limit: int = 5) -> list:
         return results
 
 
+class HostLimit:
+    """Concurrency state of one host inside AdaptiveLimiter."""
+
+    def __init__(self, initial: float):
+        self.limit = initial
+        self.in_flight = 0
+        self.waiters = deque()               # futures of queued acquire() calls
+        self.recent = deque(maxlen=50)       # latencies of recent successes
+        self.last_decrease = 0.0
+        self.completed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.first_start = None
+
+
+class AdaptiveLimiter:
+    """
+    Per-host concurrency limits that adapt to how each host responds (AIMD,
+    as in TCP congestion control).
+
+    - Additive increase: every successful request whose latency stays
+      within 'tolerance' times the host's baseline (the lowest latency
+      among its recent successes) raises the limit by increase / limit,
+      i.e. by about 'increase' per limit's worth of completed requests.
+    - Multiplicative decrease: an error, an HTTP 429/5xx status or a
+      latency spike multiplies the limit by 'decrease'. Only requests that
+      started after the previous decrease count, so one burst of failures
+      backs off once rather than once per failed request.
+
+    The latencies are the 'elapsed' values fetch_url() measures:
+        start = await limiter.acquire(url)
+        url, status, elapsed = await fetch_url(url, session)
+        limiter.release(url, start, status, elapsed)
+    """
+
+    def __init__(self, initial: float = 2, minimum: float = 1, maximum: float = 100,
+                 increase: float = 1.0, decrease: float = 0.5, tolerance: float = 2.0):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.hosts = {}
+
+    def host(self, url: str) -> HostLimit:
+        name = urlsplit(url).netloc
+        if name not in self.hosts:
+            self.hosts[name] = HostLimit(self.initial)
+        return self.hosts[name]
+
+    async def acquire(self, url: str) -> float:
+        """Wait for a slot on the URL's host; returns the start time for release()."""
+        host = self.host(url)
+        if host.in_flight >= int(host.limit) or host.waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            host.waiters.append(waiter)
+            try:
+                await waiter  # release() hands the slot over, in_flight included
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    host.in_flight -= 1  # granted, but nobody will use it
+                    self._wake(host)
+                raise
+        else:
+            host.in_flight += 1
+        start = time.monotonic()
+        if host.first_start is None:
+            host.first_start = start
+        return start
+
+    def release(self, url: str, start: float, status, elapsed: float = None) -> None:
+        """Give back the slot and adapt the limit to how the request went."""
+        host = self.host(url)
+        host.in_flight -= 1
+        failed = elapsed is None or not isinstance(status, int) \
+            or status == 429 or status >= 500
+
+        if failed:
+            host.errors += 1
+        else:
+            host.completed += 1
+            host.total_latency += elapsed
+            host.recent.append(elapsed)
+        spike = not failed and elapsed > self.tolerance * min(host.recent)
+
+        if failed or spike:
+            if start >= host.last_decrease:
+                host.limit = max(self.minimum, host.limit * self.decrease)
+                host.last_decrease = time.monotonic()
+        else:
+            host.limit = min(self.maximum, host.limit + self.increase / host.limit)
+
+        self._wake(host)
+
+    def _wake(self, host: HostLimit) -> None:
+        """Hand free slots to queued requests, oldest first."""
+        while host.waiters and host.in_flight < int(host.limit):
+            waiter = host.waiters.popleft()
+            if not waiter.done():
+                host.in_flight += 1
+                waiter.set_result(None)
+
+    def limits(self) -> dict:
+        """Current concurrency limit per host."""
+        return {name: int(host.limit) for name, host in self.hosts.items()}
+
+    def stats(self) -> dict:
+        """Per host: limit, in flight, completed, errors, requests/sec, latencies."""
+        now = time.monotonic()
+        result = {}
+        for name, host in self.hosts.items():
+            elapsed = now - host.first_start if host.first_start else 0.0
+            result[name] = {
+                "limit": int(host.limit),
+                "in_flight": host.in_flight,
+                "completed": host.completed,
+                "errors": host.errors,
+                "throughput": host.completed / elapsed if elapsed else 0.0,
+                "baseline_latency": min(host.recent) if host.recent else None,
+                "mean_latency": host.total_latency / host.completed if host.completed else None,
+            }
+        return result
+
+
+async def process_adaptive(urls: list, limiter: AdaptiveLimiter = None,
+                           session: ClientSession = None, max_bytes: int = None) -> list:
+    """Fetch URLs with per-host concurrency limits set by an AdaptiveLimiter"""
+    limiter = limiter or AdaptiveLimiter()
+    async with session_scope(session) as session:
+
+        async def fetch_with_limiter(url):
+            start = await limiter.acquire(url)
+            result = None
+            try:
+                result = await fetch_url(url, session, max_bytes)
+                return result
+            finally:
+                # A cancelled fetch (result None) counts as a failure
+                _, status, elapsed = result or (url, None, None)
+                limiter.release(url, start, status, elapsed)
+
+        return await asyncio.gather(*(fetch_with_limiter(url) for url in urls))
+
+
 async def main():
     logger.info(f"Starting to fetch {len(URLS)} URLs")
 
-    # Method 1: Fetch all URLs without limiting concurrency
-    start_time = time.time()
-    logger.info("Method 1: Fetching without limits")
-    results = await fetch_all_urls(URLS)
-    elapsed = time.time() - start_time
-    logger.info(f"Completed all unrestricted fetches in {elapsed:.2f} seconds")
-
-    # Method 2: Fetch with a concurrency limit using semaphore
-    logger.info("\nMethod 2: Fetching with semaphore (max 3 concurrent connections)")
-    start_time = time.time()
-    results_limited = await process_with_semaphore(URLS, limit=3)
-    elapsed = time.time() - start_time
-    logger.info(f"Completed all semaphore-controlled fetches in {elapsed:.2f} seconds")
+    # One pooled session for both methods: the second batch reuses the
+    # connections and DNS lookups of the first. Only the first
+    # SAMPLE_BYTES of each page are downloaded.
+    async with make_session() as session:
+        # Method 1: Fetch all URLs without limiting concurrency. Through the
+        # response cache: pages unchanged since the last run come back as 304
+        start_time = time.perf_counter()
+        logger.info("Method 1: Fetching without limits")
+        cache = ResponseCache()
+        results = await fetch_all_urls(URLS, session, max_bytes=SAMPLE_BYTES, cache=cache)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Completed all unrestricted fetches in {elapsed:.2f} seconds "
+                    f"({cache.revalidated} unchanged since the last run, "
+                    f"{cache.stored} stored in {CACHE_PATH})")
+        cache.close()
+
+        # Method 2: Fetch with a concurrency limit using semaphore
+        logger.info("\nMethod 2: Fetching with semaphore (max 3 concurrent connections)")
+        start_time = time.perf_counter()
+        results_limited = await process_with_semaphore(URLS, limit=3, session=session,
+                                                       max_bytes=SAMPLE_BYTES)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Completed all semaphore-controlled fetches in {elapsed:.2f} seconds")
+
+        # Method 3: Per-host limits that adapt to each host's latency and errors
+        logger.info("\nMethod 3: Fetching with adaptive per-host limits")
+        limiter = AdaptiveLimiter()
+        start_time = time.perf_counter()
+        await process_adaptive(URLS, limiter, session, max_bytes=SAMPLE_BYTES)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Completed all adaptively limited fetches in {elapsed:.2f} seconds")
+        logger.info(f"Final per-host limits: {limiter.limits()}")
 
     # Compare and print results summary
     logger.info("\nResults Summary:")
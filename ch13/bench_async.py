@@ -0,0 +1,176 @@
+"""
+Benchmark: full-body reads vs streamed prefixes, fresh vs shared sessions.
+
+Runs fetch_all_urls() from async.py against local_server.py (no network
+needed) for two workloads:
+
+    large    --requests URLs of /bytes/--body-size (big downloads)
+    small    --requests URLs of / (small pages: connection setup dominates)
+
+each fetched --batches times, with every combination of
+
+    read     full      response.read(), then keep the first 1 KiB
+             stream    read_prefix(): at most --max-bytes, then let go
+    session  fresh     a new default ClientSession per batch (as before)
+             shared    one make_session() pool reused by every batch
+
+and reports wall time, body bytes kept in memory and TCP connections opened
+(counted with an aiohttp TraceConfig).
+
+A second run starts two servers with injected faults, a "fast" host
+(10 ms, 32 requests at a time) and a "slow" one (50 ms, 4 at a time, 503
+once 8 are queued, 2% random 503s), and fetches --adaptive-requests URLs
+from each with process_with_semaphore() at two fixed limits and with
+process_adaptive(), reporting time, failures and the final limits.
+
+A third run fetches --cache-requests URLs spread over 50 pages of 64 KiB
+(each page requested several times at once) with fetch_all_urls(): without
+a cache, with a cold ResponseCache, with the same cache again (every page
+revalidates as 304), and after the server changed every page. It reports
+time, HTTP requests actually sent, body bytes received and 304s.
+
+Usage:    python bench_async.py [--requests N] [--body-size BYTES] [--batches N]
+                                [--adaptive-requests N] [--cache-requests N]
+Requires: aiohttp
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import tempfile
+import time
+
+import aiohttp
+
+from local_server import LocalServer
+
+fetcher = importlib.import_module("async")  # 'async' is a keyword: no plain import
+fetcher.logger.setLevel(logging.WARNING)     # no log line per request
+
+async def run(urls, batches, max_bytes, shared):
+    trace, counts = fetcher.connection_counter()
+    kept = 0
+
+    async def fetch(session, url):
+        nonlocal kept
+        async with session.get(url) as response:
+            if max_bytes is None:
+                body = await response.read()
+            else:
+                body = await fetcher.read_prefix(response, max_bytes)
+        kept += len(body)
+
+    start = time.perf_counter()
+    if shared:
+        async with fetcher.make_session(trace_configs=[trace]) as session:
+            for _ in range(batches):
+                await asyncio.gather(*(fetch(session, url) for url in urls))
+    else:
+        for _ in range(batches):
+            async with aiohttp.ClientSession(trace_configs=[trace]) as session:
+                await asyncio.gather(*(fetch(session, url) for url in urls))
+    return time.perf_counter() - start, kept, counts["opened"]
+
+async def run_limited(urls, strategy):
+    limiter = None
+    start = time.perf_counter()
+    async with fetcher.make_session(limit=0, limit_per_host=0) as session:
+        if strategy == "adaptive":
+            limiter = fetcher.AdaptiveLimiter()
+            results = await fetcher.process_adaptive(urls, limiter, session)
+        else:
+            results = await fetcher.process_with_semaphore(urls, strategy, session)
+    seconds = time.perf_counter() - start
+    failed = sum(1 for _, status, _ in results if status != 200)
+    return seconds, failed, limiter.limits() if limiter else {}
+
+def bench_adaptive(count):
+    fast = LocalServer(delay=0.01, capacity=32)
+    slow = LocalServer(delay=0.05, capacity=4, queue_limit=8, fail_rate=0.02)
+    with fast, slow:
+        urls = [server.url("/") for _ in range(count) for server in (fast, slow)]
+        names = {f"{fast.host}:{fast.port}": "fast", f"{slow.host}:{slow.port}": "slow"}
+        print(f"{count} requests to each of a fast and a slow host")
+        print(f"{'strategy':<16} {'seconds':>9} {'failed':>8}  final limits")
+        print("-" * 56)
+        for strategy in (3, 64, "adaptive"):
+            seconds, failed, limits = asyncio.run(run_limited(urls, strategy))
+            label = f"semaphore({strategy})" if strategy != "adaptive" else strategy
+            final = ", ".join(f"{names[host]}={limit}" for host, limit in limits.items())
+            print(f"{label:<16} {seconds:9.3f} {failed:8,}  {final or '-'}")
+
+async def run_cached(server, urls, cache, bump=False):
+    trace = aiohttp.TraceConfig()
+    counts = {"requests": 0, "bytes": 0}
+
+    async def request_start(session, context, params):
+        counts["requests"] += 1
+
+    async def chunk_received(session, context, params):
+        counts["bytes"] += len(params.chunk)
+
+    trace.on_request_start.append(request_start)
+    trace.on_response_chunk_received.append(chunk_received)
+    async with fetcher.make_session(trace_configs=[trace]) as session:
+        if bump:
+            async with session.post(server.url("/bump")):
+                pass
+            counts["requests"] = 0
+        start = time.perf_counter()
+        results = await fetcher.fetch_all_urls(urls, session, cache=cache)
+        seconds = time.perf_counter() - start
+    not_modified = sum(1 for _, status, _ in results if status == 304)
+    return seconds, counts["requests"], counts["bytes"], not_modified
+
+def bench_cache(count):
+    with LocalServer() as server, tempfile.TemporaryDirectory() as directory:
+        urls = [server.url(f"/page/p{i % 50}") for i in range(count)]
+        cache = fetcher.ResponseCache(os.path.join(directory, "cache.sqlite"))
+        print(f"{count} requests for 50 pages of {64 * 1024:,} bytes")
+        print(f"{'cache':<16} {'seconds':>9} {'sent':>7} {'bytes received':>15} {'304s':>6}")
+        print("-" * 57)
+        runs = (("none", None, False), ("cold", cache, False),
+                ("warm", cache, False), ("pages changed", cache, True))
+        for label, run_cache, bump in runs:
+            seconds, sent, received, not_modified = asyncio.run(
+                run_cached(server, urls, run_cache, bump))
+            print(f"{label:<16} {seconds:9.3f} {sent:7,} {received:15,} {not_modified:6,}")
+        cache.close()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=50)
+    arg_parser.add_argument("--body-size", type=int, default=4 * 2**20)
+    arg_parser.add_argument("--batches", type=int, default=3)
+    arg_parser.add_argument("--max-bytes", type=int, default=fetcher.SAMPLE_BYTES)
+    arg_parser.add_argument("--adaptive-requests", type=int, default=400)
+    arg_parser.add_argument("--cache-requests", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    with LocalServer() as server:
+        workloads = {
+            "large": [server.url(f"/bytes/{args.body_size}")] * args.requests,
+            "small": [server.url("/")] * args.requests,
+        }
+        print(f"{args.requests} requests x {args.batches} batches, "
+              f"large bodies {args.body_size:,} bytes, stream prefix {args.max_bytes:,} bytes")
+        print(f"{'workload':<9} {'read':<7} {'session':<8} {'seconds':>9} "
+              f"{'bytes kept':>14} {'connections':>12}")
+        print("-" * 64)
+        for name, urls in workloads.items():
+            for read, max_bytes in (("full", None), ("stream", args.max_bytes)):
+                for session in ("fresh", "shared"):
+                    seconds, kept, opened = asyncio.run(
+                        run(urls, args.batches, max_bytes, session == "shared"))
+                    print(f"{name:<9} {read:<7} {session:<8} {seconds:9.3f} "
+                          f"{kept:14,} {opened:12,}")
+
+    print()
+    bench_adaptive(args.adaptive_requests)
+    print()
+    bench_cache(args.cache_requests)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Load test for the fetch strategies in async.py.
+
+Sends --requests requests (the URL list repeated as needed) with each
+strategy in turn, on a fresh pooled session per strategy:
+
+    gather      fetch_all_urls(): everything at once, bounded only by the
+                connection pool (--pool-limit, --per-host)
+    semaphore   process_with_semaphore() with --limit
+    adaptive    process_adaptive(): per-host AIMD limits
+
+and reports for each:
+
+    req/s               completed requests per second of wall time
+    p50 p90 p99 max     latency of one request, from when it was issued
+                        (every strategy issues all requests at the start)
+                        until its response headers arrived
+    wait p50            part of the latency spent queued before a
+                        connection was available: in a limiter, in the
+                        connection pool, or both
+    service p50         the rest: from having a connection to the headers
+    errors              exceptions and HTTP 4xx/5xx, as a fraction
+    reuse               share of requests sent on an already open
+                        connection (aiohttp TraceConfig counters)
+
+The latencies are measured the same way for every strategy, with aiohttp
+TraceConfig hooks and time.perf_counter (a monotonic clock); reading the
+(at most --max-bytes) body after the headers is not included.
+
+Without --urls it targets a local synthetic server (local_server.py), whose
+latency and failures can be injected with --delay, --capacity,
+--queue-limit and --fail-rate. --json FILE (or - for stdout) writes the
+configuration and results as JSON for tracking regressions.
+
+Usage:    python loadtest.py [--requests N] [--strategies gather,semaphore,adaptive]
+                             [--urls FILE | --path /page/a --delay S ...]
+                             [--json FILE]
+Requires: aiohttp
+"""
+
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import sys
+import time
+
+import aiohttp
+
+from local_server import LocalServer
+
+fetcher = importlib.import_module("async")  # 'async' is a keyword: no plain import
+fetcher.logger.setLevel(logging.CRITICAL)    # errors are counted, not logged one by one
+
+STRATEGIES = ("gather", "semaphore", "adaptive")
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(len(ordered) * percent / 100 + 0.5) - 1))]
+
+def request_timer():
+    """
+    A TraceConfig recording, per request, when it got a connection (after
+    any wait in the connection pool) and when its response headers (or an
+    error) arrived.
+    """
+    times = []  # (connected, done) pairs
+    trace = aiohttp.TraceConfig()
+
+    async def started(session, context, params):
+        context.started = time.perf_counter()
+        context.pooled = 0.0
+
+    async def queued(session, context, params):
+        context.queued = time.perf_counter()
+
+    async def dequeued(session, context, params):
+        context.pooled += time.perf_counter() - context.queued
+
+    async def done(session, context, params):
+        times.append((context.started + context.pooled, time.perf_counter()))
+
+    trace.on_request_start.append(started)
+    trace.on_connection_queued_start.append(queued)
+    trace.on_connection_queued_end.append(dequeued)
+    trace.on_request_end.append(done)
+    trace.on_request_exception.append(done)
+    return trace, times
+
+async def run_strategy(strategy, urls, args):
+    trace, connections = fetcher.connection_counter()
+    timer, times = request_timer()
+    limiter = None
+    async with fetcher.make_session(limit=args.pool_limit, limit_per_host=args.per_host,
+                                    trace_configs=[trace, timer]) as session:
+        start = time.perf_counter()  # every strategy issues all requests now
+        if strategy == "gather":
+            results = await fetcher.fetch_all_urls(urls, session, args.max_bytes)
+        elif strategy == "semaphore":
+            results = await fetcher.process_with_semaphore(urls, args.limit, session,
+                                                           args.max_bytes)
+        elif strategy == "adaptive":
+            limiter = fetcher.AdaptiveLimiter()
+            results = await fetcher.process_adaptive(urls, limiter, session, args.max_bytes)
+        else:
+            raise ValueError(f"unknown strategy: {strategy}")
+        seconds = time.perf_counter() - start
+
+    latencies = sorted(done - start for connected, done in times)
+    waits = sorted(connected - start for connected, done in times)
+    services = sorted(done - connected for connected, done in times)
+    errors = sum(1 for _, status, _ in results if not isinstance(status, int) or status >= 400)
+    sent = connections["opened"] + connections["reused"]
+    result = {
+        "strategy": strategy,
+        "requests": len(results),
+        "seconds": seconds,
+        "requests_per_second": len(results) / seconds,
+        "latency": {f"p{p}": percentile(latencies, p) for p in (50, 90, 99)},
+        "queue_wait": {f"p{p}": percentile(waits, p) for p in (50, 90, 99)},
+        "service": {f"p{p}": percentile(services, p) for p in (50, 90, 99)},
+        "errors": errors,
+        "error_rate": errors / len(results),
+        "connections_opened": connections["opened"],
+        "connections_reused": connections["reused"],
+        "reuse_rate": connections["reused"] / sent if sent else 0.0,
+    }
+    result["latency"]["max"] = latencies[-1] if latencies else None
+    if limiter:
+        result["final_limits"] = limiter.limits()
+    return result
+
+def print_table(results, file=None):
+    def ms(value):
+        return f"{value * 1e3:8.1f}" if value is not None else f"{'-':>8}"
+
+    print(f"{'strategy':<10} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'wait p50':>8} {'svc p50':>8} {'errors':>7} {'reuse':>6} "
+          f"{'conns':>6}", file=file)
+    print("-" * 97, file=file)
+    for r in results:
+        lat = r["latency"]
+        print(f"{r['strategy']:<10} {r['requests_per_second']:9,.0f} {ms(lat['p50'])} "
+              f"{ms(lat['p90'])} {ms(lat['p99'])} {ms(lat['max'])} "
+              f"{ms(r['queue_wait']['p50'])} {ms(r['service']['p50'])} "
+              f"{r['error_rate']:7.1%} {r['reuse_rate']:6.0%} {r['connections_opened']:6,}",
+              file=file)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=5000)
+    arg_parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    arg_parser.add_argument("--limit", type=int, default=50, help="semaphore limit")
+    arg_parser.add_argument("--pool-limit", type=int, default=fetcher.POOL_LIMIT)
+    arg_parser.add_argument("--per-host", type=int, default=fetcher.POOL_LIMIT_PER_HOST)
+    arg_parser.add_argument("--max-bytes", type=int, default=fetcher.SAMPLE_BYTES)
+    arg_parser.add_argument("--urls", help="file with one URL per line")
+    arg_parser.add_argument("--path", default="/", help="local server path to request")
+    arg_parser.add_argument("--delay", type=float, default=0.0)
+    arg_parser.add_argument("--capacity", type=int, default=None)
+    arg_parser.add_argument("--queue-limit", type=int, default=None)
+    arg_parser.add_argument("--fail-rate", type=float, default=0.0)
+    arg_parser.add_argument("--json", help="write results as JSON to FILE (- for stdout)")
+    args = arg_parser.parse_args()
+    if args.requests < 1:
+        arg_parser.error("--requests must be at least 1")
+
+    server = None
+    if args.urls:
+        with open(args.urls) as f:
+            targets = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        server = LocalServer(delay=args.delay, capacity=args.capacity,
+                             queue_limit=args.queue_limit, fail_rate=args.fail_rate).start()
+        targets = [server.url(args.path)]
+    urls = list(itertools.islice(itertools.cycle(targets), args.requests))
+
+    try:
+        results = [asyncio.run(run_strategy(strategy, urls, args))
+                   for strategy in args.strategies.split(",")]
+    finally:
+        if server:
+            server.stop()
+
+    # The table goes to stderr when the JSON goes to stdout
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{len(urls):,} requests to {len(targets)} URL(s)"
+          f"{'' if args.urls else ' on the local server'}", file=out)
+    print_table(results, file=out)
+
+    if args.json:
+        report = {"config": vars(args), "targets": targets, "results": results}
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
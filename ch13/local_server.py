@@ -0,0 +1,196 @@
+"""
+A local aiohttp server that stands in for the real sites in async.py, so
+the fetcher can be benchmarked without the network.
+
+Routes:
+    /                 a small HTML page
+    /bytes/{n}        n bytes of body, streamed in 64 KiB chunks (large
+                      bodies without holding them in memory)
+    /page/{name}      a 64 KiB page whose content depends on the server's
+                      version number; POST /bump increments the version,
+                      as if every page had been edited
+
+/ and /page/{name} send ETag and Last-Modified headers and answer a
+matching If-None-Match or If-Modified-Since with 304 Not Modified.
+
+Fault injection, to exercise the fetcher's concurrency control:
+
+    --delay S         every request takes at least S seconds
+    --capacity N      only N requests are served at once; the rest queue,
+                      so latency grows once a client exceeds N
+    --queue-limit N   with more than N requests queued, answer 503 at once
+    --fail-rate P     answer a random fraction P of requests with 503
+
+Use it in-process (benchmarks start it on a free port in a background
+thread) or on its own:
+
+    python local_server.py [--port 8080] [--delay S] [--capacity N]
+                           [--queue-limit N] [--fail-rate P]
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from aiohttp import web
+
+CHUNK = 64 * 1024
+PAGE = b"<html><body>" + b"<p>Hello from the local test server.</p>" * 20 + b"</body></html>"
+
+PAGE_SIZE = 64 * 1024
+STATE = web.AppKey("state", dict)  # version and times of the pages
+
+def conditional(request, body, etag, modified, content_type="text/html"):
+    """Respond with 'body', or 304 if the client's copy is still current."""
+    headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return web.Response(status=304, headers=headers)
+    elif if_modified_since is not None:
+        try:
+            if int(modified) <= parsedate_to_datetime(if_modified_since).timestamp():
+                return web.Response(status=304, headers=headers)
+        except (TypeError, ValueError):
+            pass  # unparsable date: send the full response
+    return web.Response(body=body, content_type=content_type, headers=headers)
+
+async def index(request):
+    return conditional(request, PAGE, '"index"', request.app[STATE]["started"])
+
+async def page(request):
+    state = request.app[STATE]
+    name, version = request.match_info["name"], state["version"]
+    line = f"<p>{name}, version {version}</p>\n".encode()
+    body = line * (PAGE_SIZE // len(line))
+    return conditional(request, body, f'"{name}-{version}"', state["modified"])
+
+async def bump(request):
+    state = request.app[STATE]
+    state["version"] += 1
+    # Whole seconds: that is all Last-Modified can express
+    state["modified"] = max(time.time(), state["modified"] + 1)
+    return web.Response(text=str(state["version"]))
+
+async def sized_body(request):
+    size = int(request.match_info["n"])
+    response = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+    response.content_length = size
+    await response.prepare(request)
+    chunk = b"x" * CHUNK
+    sent = 0
+    try:
+        while sent < size:
+            part = chunk if size - sent >= CHUNK else chunk[:size - sent]
+            await response.write(part)
+            sent += len(part)
+    except ConnectionError:
+        pass  # the client stopped reading early; that is allowed
+    return response
+
+def fault_injection(delay=0.0, capacity=None, queue_limit=None, fail_rate=0.0, seed=0):
+    """Middleware that adds latency, limited capacity and failures."""
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(capacity) if capacity else None
+    waiting = 0
+
+    @web.middleware
+    async def middleware(request, handler):
+        nonlocal waiting
+        if rng.random() < fail_rate:
+            raise web.HTTPServiceUnavailable()
+        if slots is None:
+            await asyncio.sleep(delay)
+            return await handler(request)
+
+        if queue_limit is not None and slots.locked() and waiting >= queue_limit:
+            raise web.HTTPServiceUnavailable()  # shed load instead of queueing
+        waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            waiting -= 1
+        try:
+            await asyncio.sleep(delay)
+            return await handler(request)
+        finally:
+            slots.release()
+
+    return middleware
+
+def make_app(delay=0.0, capacity=None, queue_limit=None, fail_rate=0.0, seed=0):
+    middlewares = []
+    if delay or capacity or fail_rate:
+        middlewares.append(fault_injection(delay, capacity, queue_limit, fail_rate, seed))
+    app = web.Application(middlewares=middlewares)
+    app.router.add_get("/", index)
+    app.router.add_get("/bytes/{n:\\d+}", sized_body)
+    app.router.add_get("/page/{name}", page)
+    app.router.add_post("/bump", bump)
+    now = time.time()
+    app[STATE] = {"started": now, "modified": now, "version": 0}
+    return app
+
+class LocalServer:
+    """
+    Runs make_app() on its own event loop in a background thread, so the
+    client under test keeps its loop to itself.
+
+        with LocalServer() as server:
+            url = server.url("/bytes/1000000")
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **faults):
+        self.host = host
+        self.port = port  # 0: pick a free port
+        self.faults = faults  # keyword arguments of make_app()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runner = None
+
+    def url(self, path="/"):
+        return f"http://{self.host}:{self.port}{path}"
+
+    async def _start(self):
+        self.runner = web.AppRunner(make_app(**self.faults), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--delay", type=float, default=0.0)
+    arg_parser.add_argument("--capacity", type=int, default=None)
+    arg_parser.add_argument("--queue-limit", type=int, default=None)
+    arg_parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = arg_parser.parse_args()
+    web.run_app(make_app(args.delay, args.capacity, args.queue_limit, args.fail_rate),
+                host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
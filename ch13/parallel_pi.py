@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+File:
+    parallel_pi.py
+
+Purpose:
+    Estimate pi with the same series as omp_pi.c,
+
+        pi = 4*[1 - 1/3 + 1/5 - 1/7 + 1/9 - . . . ]
+
+    on interchangeable parallel backends, and report how each one scales:
+
+        threads     threading.Thread per worker, pure Python loop (like
+                    thread_hello.py): the GIL lets only one run at a time
+        processes   concurrent.futures.ProcessPoolExecutor, pure Python
+                    loop: one interpreter (and GIL) per worker
+        numpy       the terms computed as NumPy arrays, CHUNK terms at a
+                    time, blocks run on a thread pool (NumPy releases the
+                    GIL inside its array loops)
+        shared      one multiprocessing.Process per worker running the
+                    NumPy blocks; each writes its partial sum into its own
+                    slot of a shared-memory array, and the main process
+                    adds up the slots (the reduction(+: sum) of omp_pi.c)
+
+    Every backend splits the n terms into one contiguous block per worker,
+    like OpenMP's default static schedule.
+
+Input:
+    none
+Output:
+    the estimates, and per backend and worker count the time, speedup over
+    the same backend with 1 worker, and efficiency (speedup / workers)
+
+Usage:    python parallel_pi.py [--n N] [--backends threads,processes,numpy,shared]
+                                [--workers 1,2,4]
+
+Worker counts default to 1, 2, 4, ... up to the CPUs this process may use
+(and that count itself); there is no fixed maximum, and 1 is always run as
+the baseline.
+Requires: numpy
+"""
+
+import argparse
+import math
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Process
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from thread_hello import usable_cpus
+
+CHUNK = 1 << 20  # terms per NumPy array: bounds memory at 8 MiB per array
+
+def default_workers():
+    cpus = usable_cpus()
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+def blocks(n, workers):
+    """[first, last) term ranges, one per worker."""
+    return [(rank * n // workers, (rank + 1) * n // workers) for rank in range(workers)]
+
+# =============================================================================
+# Block sums
+# =============================================================================
+
+def python_block_sum(first, last):
+    """Sum of terms first..last-1, one term at a time (as in omp_pi.c)."""
+    factor = 1.0 if first % 2 == 0 else -1.0
+    total = 0.0
+    for i in range(first, last):
+        total += factor / (2 * i + 1)
+        factor = -factor
+    return total
+
+def numpy_block_sum(first, last):
+    """Sum of terms first..last-1, CHUNK terms per vectorized step."""
+    total = 0.0
+    for start in range(first, last, CHUNK):
+        i = np.arange(start, min(start + CHUNK, last), dtype=np.float64)
+        terms = 1.0 / (2.0 * i + 1.0)
+        odd = terms[1 - start % 2::2]  # positions of odd i: negative terms
+        np.negative(odd, out=odd)
+        total += terms.sum()
+    return total
+
+# =============================================================================
+# Backends: each returns the estimate of pi
+# =============================================================================
+
+def run_threads(n, workers):
+    partial = [0.0] * workers  # one slot per thread: no lock needed
+
+    def work(rank, first, last):
+        partial[rank] = python_block_sum(first, last)
+
+    threads = [threading.Thread(target=work, args=(rank, first, last))
+               for rank, (first, last) in enumerate(blocks(n, workers))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return 4.0 * sum(partial)
+
+def run_processes(n, workers):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        firsts, lasts = zip(*blocks(n, workers))
+        return 4.0 * sum(pool.map(python_block_sum, firsts, lasts))
+
+def run_numpy(n, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        firsts, lasts = zip(*blocks(n, workers))
+        return 4.0 * sum(pool.map(numpy_block_sum, firsts, lasts))
+
+def shared_worker(name, workers, rank, first, last):
+    shm = SharedMemory(name=name)
+    partial = np.ndarray((workers,), dtype=np.float64, buffer=shm.buf)
+    partial[rank] = numpy_block_sum(first, last)
+    del partial  # release the buffer before closing
+    shm.close()
+
+def run_shared(n, workers):
+    shm = SharedMemory(create=True, size=8 * workers)
+    try:
+        processes = [Process(target=shared_worker, args=(shm.name, workers, rank, first, last))
+                     for rank, (first, last) in enumerate(blocks(n, workers))]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        partial = np.ndarray((workers,), dtype=np.float64, buffer=shm.buf)
+        estimate = 4.0 * float(partial.sum())
+        del partial
+        return estimate
+    finally:
+        shm.close()
+        shm.unlink()
+
+BACKENDS = {
+    "threads": run_threads,
+    "processes": run_processes,
+    "numpy": run_numpy,
+    "shared": run_shared,
+}
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Estimate pi as omp_pi.c does, on several parallel backends.")
+    arg_parser.add_argument("--n", type=int, default=10_000_000, help="number of terms")
+    arg_parser.add_argument("--backends", default=",".join(BACKENDS))
+    arg_parser.add_argument("--workers", default=None,
+                            help="comma-separated worker counts (default: 1, 2, 4, ... CPUs)")
+    args = arg_parser.parse_args()
+    if args.n < 1:
+        arg_parser.error("n is the number of terms and should be >= 1")
+
+    counts = [int(w) for w in args.workers.split(",")] if args.workers else default_workers()
+    if min(counts) < 1:
+        arg_parser.error("worker counts should be >= 1")
+    counts = sorted(set(counts) | {1})  # speedup is relative to 1 worker
+
+    print(f"n = {args.n:,} terms, {usable_cpus()} usable CPUs")
+    print(f"{'backend':<10} {'workers':>7} {'seconds':>9} {'speedup':>8} "
+          f"{'efficiency':>10} {'estimate':>18} {'error':>9}")
+    print("-" * 78)
+    for name in args.backends.split(","):
+        for workers in counts:
+            start = time.perf_counter()
+            estimate = BACKENDS[name](args.n, workers)
+            seconds = time.perf_counter() - start
+            if workers == 1:
+                base = seconds
+            speedup = base / seconds
+            print(f"{name:<10} {workers:7} {seconds:9.3f} {speedup:8.2f} "
+                  f"{speedup / workers:10.0%} {estimate:18.14f} {abs(estimate - math.pi):9.1e}")
+    print(f"{'':<10} {'':>7} {'':>9} {'':>8} {'pi =':>10} {4.0 * math.atan(1.0):18.14f}")
+
+if __name__ == "__main__":
+    main()
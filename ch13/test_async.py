@@ -0,0 +1,88 @@
+"""
+Tests for async.py's AdaptiveLimiter, against local_server.py's fault injection.
+
+Usage:    python -m pytest test_async.py
+"""
+
+import asyncio
+import importlib
+
+from local_server import LocalServer
+
+fetcher = importlib.import_module("async")  # 'async' is a keyword
+
+URL = "http://example.test/page"
+
+def test_limit_grows_on_success_and_halves_on_failure():
+    limiter = fetcher.AdaptiveLimiter(initial=4, minimum=1, increase=1.0, decrease=0.5)
+
+    async def run():
+        for _ in range(4):
+            start = await limiter.acquire(URL)
+            limiter.release(URL, start, 200, 0.01)
+        grown = limiter.host(URL).limit
+
+        # Two failures of requests in flight together: one decrease only
+        first = await limiter.acquire(URL)
+        second = await limiter.acquire(URL)
+        limiter.release(URL, first, 503, 0.01)
+        limiter.release(URL, second, "Error: refused", None)
+        backed_off = limiter.host(URL).limit
+
+        for _ in range(5):
+            start = await limiter.acquire(URL)
+            limiter.release(URL, start, 429, 0.01)
+        return grown, backed_off
+
+    grown, backed_off = asyncio.run(run())
+    assert 4.9 < grown < 5  # about +1 per limit's worth of successes
+    assert backed_off == grown / 2
+    stats = limiter.stats()["example.test"]
+    assert (stats["limit"], stats["completed"], stats["errors"]) == (1, 4, 7)
+    assert stats["in_flight"] == 0
+
+def test_latency_spike_backs_off():
+    limiter = fetcher.AdaptiveLimiter(initial=8, tolerance=2.0)
+
+    async def run():
+        start = await limiter.acquire(URL)
+        limiter.release(URL, start, 200, 0.01)
+        start = await limiter.acquire(URL)
+        limiter.release(URL, start, 200, 0.05)  # 5x the baseline
+
+    asyncio.run(run())
+    assert limiter.limits() == {"example.test": 4}
+
+def test_waiters_get_freed_slots_in_order():
+    limiter = fetcher.AdaptiveLimiter(initial=1)
+    order = []
+
+    async def worker(name):
+        start = await limiter.acquire(URL)
+        order.append(name)
+        await asyncio.sleep(0)
+        limiter.release(URL, start, 200, 0.01)
+
+    async def run():
+        await asyncio.gather(*(worker(i) for i in range(5)))
+
+    asyncio.run(run())
+    assert order == list(range(5))
+    assert limiter.host(URL).in_flight == 0
+
+def test_fail_rate_injects_503s_and_the_limiter_backs_off():
+    with LocalServer(fail_rate=1.0) as server:
+        limiter = fetcher.AdaptiveLimiter(initial=8)
+        urls = [server.url("/")] * 20
+        results = asyncio.run(fetcher.process_adaptive(urls, limiter))
+    assert [status for _, status, _ in results] == [503] * 20
+    (stats,) = limiter.stats().values()
+    assert stats["errors"] == 20 and stats["limit"] < 8
+
+def test_partial_fail_rate():
+    with LocalServer(fail_rate=0.5, seed=1) as server:
+        urls = [server.url("/")] * 40
+        results = asyncio.run(fetcher.process_adaptive(urls))
+    statuses = [status for _, status, _ in results]
+    assert set(statuses) == {200, 503}
+    assert 5 < statuses.count(503) < 35
@@ -12,23 +12,30 @@ Input:
 Output:
     message from each thread
 
-Usage:    python thread_hello.py <thread_count>
+Usage:    python thread_hello.py [<thread_count>]
+
+Without <thread_count>, one thread per CPU this process may use.
 """
 
+import os
 import sys
 import threading
 
-MAX_THREADS = 64
-
 # Global variable: accessible to all threads
 thread_count = 0
 
 def usage(prog_name):
     """Print usage message and exit"""
-    sys.stderr.write(f"usage: {prog_name} <number of threads>\n")
-    sys.stderr.write(f"0 < number of threads <= {MAX_THREADS}\n")
+    sys.stderr.write(f"usage: {prog_name} [<number of threads>]\n")
+    sys.stderr.write("0 < number of threads (default: number of usable CPUs)\n")
     sys.exit(0)
 
+def usable_cpus():
+    """CPUs this process may run on (affinity-aware where supported)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 def hello(rank):
     """Thread function that prints a message"""
     print(f"Hello from thread {rank} of {thread_count}")
@@ -36,16 +43,16 @@ def hello(rank):
 def main():
     global thread_count
 
-    # Get number of threads from command line
-    if len(sys.argv) != 2:
+    # Get number of threads from command line, or size to the machine
+    if len(sys.argv) > 2:
         usage(sys.argv[0])
 
     try:
-        thread_count = int(sys.argv[1])
+        thread_count = int(sys.argv[1]) if len(sys.argv) == 2 else usable_cpus()
     except ValueError:
         usage(sys.argv[0])
 
-    if thread_count <= 0 or thread_count > MAX_THREADS:
+    if thread_count <= 0:
         usage(sys.argv[0])
 
     # Create thread objects
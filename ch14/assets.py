@@ -0,0 +1,184 @@
+"""
+Background asset loading for game.py.
+
+Loading every image with pygame.image.load() on the main thread before the
+first frame stalls startup for as long as the slowest disk read and decode
+takes. AssetManager instead:
+
+1. Decodes files on a thread pool (preload() returns immediately).
+2. Hands out a generated placeholder (a magenta checkerboard) while an
+   image is still loading, or if it is missing or unreadable, so the game
+   can start drawing right away and never crashes on a bad asset.
+3. Converts a finished image to the display's pixel format once, on the
+   main thread (convert_alpha() if it has per-pixel alpha, else convert()),
+   so blitting it later is a plain memory copy.
+4. Caches converted surfaces in an LRU bounded by their pixel memory;
+   evicted images are simply loaded again on the next request.
+5. Records decode and convert time per asset, and the time from the first
+   preload() until every requested asset was ready.
+
+Usage:
+    assets = AssetManager("images", workers=4, max_bytes=64 * 2**20)
+    assets.preload(["player.png", "enemy.png"])
+    ...
+    screen.blit(assets.get("player.png"), (x, y))  # placeholder until loaded
+
+All methods are meant to be called from the game's main thread; only the
+decoding runs on the worker threads.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pygame
+
+class AssetManager:
+    PLACEHOLDER_COLORS = ((255, 0, 255), (0, 0, 0))
+
+    def __init__(self, base_dir=".", workers=4, max_bytes=64 * 2**20,
+                 placeholder_size=(32, 32)):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self.placeholder_size = placeholder_size
+        self._placeholder = None
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="asset-loader")
+        self._cache = OrderedDict()  # name -> converted Surface, oldest first
+        self._pending = {}           # name -> Future of (Surface, decode seconds)
+        self.failed = {}             # name -> error message
+        self.cached_bytes = 0
+        self.evictions = 0
+        self.decode_seconds = {}
+        self.convert_seconds = {}
+        self.first_request = None
+        self.all_ready = None  # when the last pending load finished
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def _decode(self, name):
+        # Runs on a worker thread: file I/O and decoding only, no display calls
+        start = time.perf_counter()
+        surface = pygame.image.load(os.path.join(self.base_dir, name))
+        return surface, time.perf_counter() - start
+
+    def preload(self, names):
+        """Start loading 'names' in the background (already known ones are skipped)."""
+        if self.first_request is None:
+            self.first_request = time.perf_counter()
+        for name in names:
+            if name not in self._cache and name not in self._pending \
+                    and name not in self.failed:
+                self._pending[name] = self._executor.submit(self._decode, name)
+                self.all_ready = None
+
+    def get(self, name):
+        """The converted surface for 'name', or the placeholder if not ready."""
+        surface = self._cache.get(name)
+        if surface is not None:
+            self._cache.move_to_end(name)
+            return surface
+        if name in self.failed:
+            return self.placeholder()
+
+        future = self._pending.get(name)
+        if future is None:
+            self.preload([name])
+        elif future.done():
+            return self._finish(name, future)
+        return self.placeholder()
+
+    def wait(self, timeout=None):
+        """Block until every pending load is finished; False on timeout."""
+        wait(list(self._pending.values()), timeout)
+        for name, future in list(self._pending.items()):
+            if future.done():
+                self._finish(name, future)
+        return not self._pending
+
+    def _finish(self, name, future):
+        """Main thread: convert a decoded image and cache it (or record the error)."""
+        del self._pending[name]
+        try:
+            surface, decode_time = future.result()
+        except FileNotFoundError as e:
+            self._fail(name, f"Asset missing ({e})")
+            return self.placeholder()
+        except pygame.error as e:
+            self._fail(name, f"Image format not supported: {e}")
+            return self.placeholder()
+        except OSError as e:
+            self._fail(name, f"Asset unreadable ({e})")
+            return self.placeholder()
+
+        start = time.perf_counter()
+        if surface.get_flags() & pygame.SRCALPHA:
+            surface = surface.convert_alpha()
+        else:
+            surface = surface.convert()
+        self.convert_seconds[name] = time.perf_counter() - start
+        self.decode_seconds[name] = decode_time
+        self._store(name, surface)
+        self._loaded()
+        return surface
+
+    def _fail(self, name, message):
+        print(f"WARNING: {message}. Using a placeholder instead.")
+        self.failed[name] = message
+        self._loaded()
+
+    def _loaded(self):
+        if not self._pending:
+            self.all_ready = time.perf_counter()
+
+    # -------------------------------------------------------------------------
+    # Cache and placeholder
+    # -------------------------------------------------------------------------
+
+    def _store(self, name, surface):
+        size = surface.get_pitch() * surface.get_height()
+        self._cache[name] = surface
+        self.cached_bytes += size
+        # Keep the newest entry even if it alone is over the limit
+        while self.cached_bytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self.cached_bytes -= evicted.get_pitch() * evicted.get_height()
+            self.evictions += 1
+
+    def placeholder(self):
+        if self._placeholder is None:
+            width, height = self.placeholder_size
+            surface = pygame.Surface((width, height))
+            cell = max(1, width // 4)
+            for y in range(0, height, cell):
+                for x in range(0, width, cell):
+                    color = self.PLACEHOLDER_COLORS[(x // cell + y // cell) % 2]
+                    surface.fill(color, (x, y, cell, cell))
+            self._placeholder = surface.convert() if pygame.display.get_surface() else surface
+        return self._placeholder
+
+    # -------------------------------------------------------------------------
+    # Statistics
+    # -------------------------------------------------------------------------
+
+    def startup_seconds(self):
+        """From the first preload() until all requested assets were ready."""
+        if self.first_request is None or self.all_ready is None:
+            return None
+        return self.all_ready - self.first_request
+
+    def report(self):
+        decode = sum(self.decode_seconds.values())
+        convert = sum(self.convert_seconds.values())
+        startup = self.startup_seconds()
+        return (f"assets: {len(self.decode_seconds):,} loaded, {len(self.failed):,} failed, "
+                f"{len(self._pending):,} pending, {len(self._cache):,} cached "
+                f"({self.cached_bytes / 2**20:.1f} MiB, {self.evictions:,} evicted)\n"
+                f"decode {decode:.3f} s (worker time), convert {convert:.3f} s, "
+                f"startup {'-' if startup is None else f'{startup:.3f} s'}")
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
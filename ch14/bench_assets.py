@@ -0,0 +1,93 @@
+"""
+Benchmark: synchronous image loading vs AssetManager (assets.py).
+
+Writes --count noisy PNG images to a temporary directory, then measures:
+
+    first frame   time from the start of loading until the game could draw
+                  its first frame
+    all ready     time until every image was decoded and converted
+
+for plain pygame.image.load() + convert() on the main thread, and for
+AssetManager with each --workers count, where the "game" draws frames
+(get() on every asset) while loading runs in the background.
+
+Decoding releases the GIL only inside pygame/SDL_image, so the gain from
+several workers depends on the image format and on the number of cores.
+
+Usage:    python bench_assets.py [--count N] [--size PIXELS] [--workers 1,2,4]
+Requires: pygame, numpy
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"  # before pygame initializes video
+
+import numpy as np
+import pygame
+
+from assets import AssetManager
+
+def write_images(directory, count, size):
+    rng = np.random.default_rng(0)
+    names = []
+    for i in range(count):
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[:] = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+        del pixels
+        name = f"sprite_{i:04d}.png"
+        pygame.image.save(surface, os.path.join(directory, name))
+        names.append(name)
+    return names
+
+def bench_sync(directory, names):
+    start = time.perf_counter()
+    surfaces = [pygame.image.load(os.path.join(directory, name)).convert_alpha()
+                for name in names]
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(surfaces)
+
+def bench_manager(directory, names, workers):
+    assets = AssetManager(directory, workers=workers)
+    start = time.perf_counter()
+    assets.preload(names)
+    first_frame = None
+    frames = 0
+    while assets.all_ready is None:
+        for name in names:
+            assets.get(name)  # what a frame would blit
+        frames += 1
+        if first_frame is None:
+            first_frame = time.perf_counter() - start
+        time.sleep(0.001)  # the rest of the frame
+    assets.close()
+    return first_frame, assets.startup_seconds(), frames
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--count", type=int, default=200)
+    arg_parser.add_argument("--size", type=int, default=256)
+    arg_parser.add_argument("--workers", default="1,2,4")
+    args = arg_parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((640, 480))
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = write_images(directory, args.count, args.size)
+        print(f"{args.count} images of {args.size}x{args.size}, {os.cpu_count()} CPUs")
+        print(f"{'loader':<22} {'first frame (ms)':>17} {'all ready (s)':>14} {'frames':>8}")
+        print("-" * 64)
+        first, ready, _ = bench_sync(directory, names)
+        print(f"{'synchronous':<22} {first * 1e3:17.1f} {ready:14.3f} {'-':>8}")
+        for workers in map(int, args.workers.split(",")):
+            first, ready, frames = bench_manager(directory, names, workers)
+            print(f"{f'AssetManager x{workers}':<22} {first * 1e3:17.1f} {ready:14.3f} {frames:8,}")
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: Python-object entities vs the NumPy entity store (entities.py).
+
+For each entity count, times one simulation step of:
+
+    objects     game.py's World: one dict per box, a Python loop per update
+                (movement and wall bounces only, no collisions)
+    move        EntityStore.integrate() + bounce(), vectorized
+    collide     EntityStore.collisions() + resolve(): grid broad phase,
+                AABB narrow phase, velocity response
+    render      EntityRenderer.render() into a headless 640x480 screen
+
+The store's world is game.py's --entities world (WORLD_SCALE times the
+screen), and each run first simulates --warmup steps so collisions reach a
+steady state. "updates/s" is 1 / (move + collide): the highest fixed-step
+rate the simulation alone could sustain; 60 or more fits the 16.7 ms budget.
+
+Usage:    python bench_entities.py [--counts 1000,10000,50000] [--steps N]
+Requires: numpy, pygame
+"""
+
+import argparse
+import os
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"  # before pygame initializes video
+
+import pygame
+
+from entities import EntityRenderer, EntityStore
+from game import HEIGHT, WIDTH, WORLD_SCALE, World
+
+DT = 1 / 60
+
+def per_step(fn, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        fn()
+    return (time.perf_counter() - start) / steps
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--counts", default="1000,10000,50000")
+    arg_parser.add_argument("--steps", type=int, default=60)
+    arg_parser.add_argument("--warmup", type=int, default=120)
+    args = arg_parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    print(f"{'entities':>9} {'objects ms':>11} {'move ms':>9} {'collide ms':>11} "
+          f"{'pairs':>8} {'render ms':>10} {'updates/s':>10}")
+    print("-" * 74)
+    for count in map(int, args.counts.split(",")):
+        world = World(count)
+        objects = per_step(lambda: world.update(DT), max(1, args.steps // 10))
+
+        store = EntityStore((WIDTH * WORLD_SCALE, HEIGHT * WORLD_SCALE), capacity=count)
+        store.spawn_random(count, size=(2, 4), speed=200 * WORLD_SCALE)
+        for _ in range(args.warmup):
+            store.update(DT)
+
+        def move():
+            store.integrate(DT)
+            store.bounce()
+
+        pairs = []
+
+        def collide():
+            a, b = store.collisions()
+            pairs.append(len(a))
+            store.resolve(a, b)
+
+        moved = per_step(move, args.steps)
+        collided = per_step(collide, args.steps)
+        renderer = EntityRenderer(screen, store)
+        rendered = per_step(lambda: renderer.render(0.5), args.steps)
+
+        print(f"{count:9,} {objects * 1e3:11.2f} {moved * 1e3:9.2f} {collided * 1e3:11.2f} "
+              f"{sum(pairs) // len(pairs):8,} {rendered * 1e3:10.2f} "
+              f"{1 / (moved + collided):10,.0f}")
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
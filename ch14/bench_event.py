@@ -0,0 +1,229 @@
+"""
+Benchmark: the blocking, batch-draining EventLoop vs the old polling loop.
+
+A producer thread enqueues N events as fast as it can; a listener records
+each event's enqueue-to-dispatch latency. Reported per loop:
+
+    events/s      dispatched events per second of wall time
+    p50 / p99     enqueue-to-dispatch latency
+    stop          time from stop() until the loop thread has exited
+
+A second run mixes "slow" events (1 ms listener) with "fast" ones and
+compares the plain EventDispatcher, where every fast event waits behind the
+slow listener on the loop thread, with ShardedDispatcher, where slow and
+fast events go to different shards.
+
+A third run schedules N timers with EventLoop.schedule(), cancels every
+other one, and reports schedule/cancel rates and how late the survivors
+fire relative to their deadlines.
+
+Finally, the cost of listener instrumentation: N dispatches to a no-op
+listener, with the dispatcher plain, instrumented, and uninstrumented again.
+
+Usage:    python bench_event.py [--events N] [--slow-events N] [--timers N]
+                          [--dispatches N]
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+from event import Event, EventDispatcher, EventLoop, ShardedDispatcher
+
+class PollingEventLoop:
+    """The original loop: one queue.Queue.get(timeout=1) per event."""
+
+    def __init__(self, dispatcher):
+        self.event_queue = queue.Queue()
+        self.dispatcher = dispatcher
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                event = self.event_queue.get(timeout=1)  # Wait for 1 second
+                self.dispatcher.dispatch(event)
+            except queue.Empty:
+                pass  # Queue was empty, continue loop
+            except Exception as e:
+                print(f"Error in event loop: {e}")
+
+    def stop(self):
+        self.running = False
+
+    def enqueue_event(self, event):
+        self.event_queue.put(event)
+
+def percentile(ordered, percent):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+def bench(loop_cls, n):
+    latencies = []
+    done = threading.Event()
+
+    def record(event):
+        latencies.append(time.perf_counter() - event.data)
+        if len(latencies) == n:
+            done.set()
+
+    dispatcher = EventDispatcher()
+    dispatcher.register("tick", record)
+    loop = loop_cls(dispatcher)
+    thread = threading.Thread(target=loop.run)
+    thread.start()
+
+    start = time.perf_counter()
+    for _ in range(n):
+        loop.enqueue_event(Event("tick", time.perf_counter()))
+    done.wait()
+    elapsed = time.perf_counter() - start
+
+    # Let the loop go idle, as it would between bursts, then time shutdown
+    time.sleep(0.1)
+    stop_start = time.perf_counter()
+    loop.stop()
+    thread.join()
+    stop_time = time.perf_counter() - stop_start
+
+    latencies.sort()
+    return n / elapsed, percentile(latencies, 50), percentile(latencies, 99), stop_time
+
+def bench_slow_listener(dispatcher, n):
+    """Return (seconds for all events, p99 latency of fast events)."""
+    fast_latencies = []
+    all_done = threading.Event()
+    remaining = [2 * n]
+
+    def finish():
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            all_done.set()
+
+    def slow(event):
+        time.sleep(0.001)
+        finish()
+
+    def fast(event):
+        fast_latencies.append(time.perf_counter() - event.data)
+        finish()
+
+    dispatcher.register("slow", slow)
+    dispatcher.register("fast", fast)
+    loop = EventLoop(dispatcher)
+    thread = threading.Thread(target=loop.run)
+    thread.start()
+
+    start = time.perf_counter()
+    for _ in range(n):
+        loop.enqueue_event(Event("slow", time.perf_counter()))
+        loop.enqueue_event(Event("fast", time.perf_counter()))
+    all_done.wait()
+    elapsed = time.perf_counter() - start
+
+    loop.stop()
+    thread.join()
+    if isinstance(dispatcher, ShardedDispatcher):
+        dispatcher.close()
+    fast_latencies.sort()
+    return elapsed, percentile(fast_latencies, 99)
+
+def bench_timers(n, spread=1.0):
+    """Schedule n timers over 'spread' seconds, cancel half, time firing."""
+    lateness = []
+    done = threading.Event()
+
+    def record(event):
+        lateness.append(time.perf_counter() - event.data)
+        if len(lateness) == n - n // 2:
+            done.set()
+
+    dispatcher = EventDispatcher()
+    dispatcher.register("timer", record)
+    loop = EventLoop(dispatcher)
+    thread = threading.Thread(target=loop.run)
+    thread.start()
+
+    now = time.perf_counter()
+    base = now + 0.5  # leave time to schedule and cancel everything first
+    start = time.perf_counter()
+    handles = []
+    for i in range(n):
+        deadline = base + spread * i / n
+        handles.append(loop.schedule(Event("timer", deadline), deadline - time.perf_counter()))
+    schedule_rate = n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for handle in handles[::2]:
+        handle.cancel()
+    cancel_rate = (n // 2) / (time.perf_counter() - start)
+
+    done.wait()
+    loop.stop()
+    thread.join()
+    lateness.sort()
+    return schedule_rate, cancel_rate, percentile(lateness, 50), percentile(lateness, 99)
+
+def bench_instrumentation(n):
+    """Return ns per dispatch: plain, instrumented, uninstrumented again."""
+    dispatcher = EventDispatcher()
+    dispatcher.register("tick", lambda event: None)
+    event = Event("tick")
+
+    def per_dispatch():
+        dispatch = dispatcher.dispatch
+        start = time.perf_counter()
+        for _ in range(n):
+            dispatch(event)
+        return (time.perf_counter() - start) / n * 1e9
+
+    plain = per_dispatch()
+    dispatcher.instrument(budget=0.001)
+    instrumented = per_dispatch()
+    dispatcher.uninstrument()
+    return plain, instrumented, per_dispatch()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--events", type=int, default=200_000)
+    arg_parser.add_argument("--slow-events", type=int, default=500)
+    arg_parser.add_argument("--timers", type=int, default=200_000)
+    arg_parser.add_argument("--dispatches", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    print(f"{'loop':<18} {'events/s':>12} {'p50 (us)':>10} {'p99 (us)':>10} {'stop (ms)':>10}")
+    print("-" * 64)
+    for loop_cls in (PollingEventLoop, EventLoop):
+        rate, p50, p99, stop_time = bench(loop_cls, args.events)
+        print(f"{loop_cls.__name__:<18} {rate:12,.0f} {p50 * 1e6:10.1f} "
+              f"{p99 * 1e6:10.1f} {stop_time * 1e3:10.1f}")
+
+    print()
+    print(f"{'dispatcher':<18} {'total (s)':>12} {'fast p99 (ms)':>14}")
+    print("-" * 46)
+    dispatchers = {
+        "EventDispatcher": EventDispatcher(),
+        # Pin the two event names to different shards
+        "ShardedDispatcher": ShardedDispatcher(
+            workers=2, partition_key=lambda event: event.name == "fast"),
+    }
+    for name, dispatcher in dispatchers.items():
+        elapsed, fast_p99 = bench_slow_listener(dispatcher, args.slow_events)
+        print(f"{name:<18} {elapsed:12.3f} {fast_p99 * 1e3:14.2f}")
+
+    print()
+    print(f"{'timers':>10} {'schedule/s':>12} {'cancel/s':>12} "
+          f"{'late p50 (us)':>14} {'late p99 (us)':>14}")
+    print("-" * 66)
+    schedule_rate, cancel_rate, p50, p99 = bench_timers(args.timers)
+    print(f"{args.timers:10,} {schedule_rate:12,.0f} {cancel_rate:12,.0f} "
+          f"{p50 * 1e6:14.1f} {p99 * 1e6:14.1f}")
+
+    print()
+    plain, instrumented, restored = bench_instrumentation(args.dispatches)
+    print(f"{'dispatch (ns)':<18} {'plain':>10} {'instrumented':>14} {'restored':>10}")
+    print("-" * 56)
+    print(f"{'no-op listener':<18} {plain:10.0f} {instrumented:14.0f} {restored:10.0f}")
+
+if __name__ == "__main__":
+    main()
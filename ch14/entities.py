@@ -0,0 +1,234 @@
+"""
+Struct-of-arrays entity store for the game loop in game.py.
+
+Thousands of entities as Python objects (like game.py's World boxes) cost
+one interpreter round trip per entity per attribute per update. Here every
+attribute is one NumPy array with an entry per entity ("struct of arrays"):
+
+    x, y, vx, vy, w, h, color    entity i is index i in every array
+
+so one update is a handful of whole-array operations, whatever the count.
+
+Collisions use a uniform grid as the broad phase: cells are twice the
+size of the largest entity, so an entity's box touches at most 2x2 cells
+(and usually just one).
+Every (entity, cell) pair is listed, sorted by cell, and candidates are
+the entities sharing a cell; only those get the exact AABB test. All of
+that is vectorized too: no Python loop over entities or cells.
+
+Usage:
+    store = EntityStore(bounds=(640, 480))
+    store.spawn_random(50000, size=(2, 4))
+    store.update(1 / 60)                  # move, bounce, collide
+    EntityRenderer(screen, store).render(alpha)  # world scaled to the screen
+
+Requires: numpy
+"""
+
+import numpy as np
+import pygame
+
+PALETTE = [(230, 80, 80), (80, 200, 120), (90, 140, 240), (240, 200, 80),
+           (200, 110, 220), (80, 210, 220), (240, 150, 60), (220, 220, 220)]
+
+class EntityStore:
+    FIELDS = ("x", "y", "prev_x", "prev_y", "vx", "vy", "w", "h")
+
+    def __init__(self, bounds, capacity=1024):
+        self.width, self.height = bounds
+        self.count = 0
+        for field in self.FIELDS:
+            setattr(self, "_" + field, np.zeros(capacity))
+        self._color = np.zeros(capacity, dtype=np.uint8)
+
+    # Views of the live entities; cheap (no copy), valid until the next spawn
+    def __getattr__(self, name):
+        if name in self.FIELDS or name == "color":
+            return self.__dict__["_" + name][:self.count]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return self.count
+
+    # -------------------------------------------------------------------------
+    # Creating and removing entities
+    # -------------------------------------------------------------------------
+
+    def _reserve(self, extra):
+        capacity = len(self._x)
+        if self.count + extra <= capacity:
+            return
+        capacity = max(capacity * 2, self.count + extra)
+        for field in self.FIELDS + ("color",):
+            old = getattr(self, "_" + field)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, "_" + field, new)
+
+    def spawn(self, x, y, vx, vy, w, h, color=0):
+        """Add entities; every argument is a scalar or an array of equal length."""
+        n = max(np.size(value) for value in (x, y, vx, vy, w, h, color))
+        self._reserve(n)
+        new = slice(self.count, self.count + n)
+        self._x[new], self._y[new] = x, y
+        self._prev_x[new], self._prev_y[new] = x, y
+        self._vx[new], self._vy[new] = vx, vy
+        self._w[new], self._h[new] = w, h
+        self._color[new] = color
+        self.count += n
+        return np.arange(new.start, new.stop)
+
+    def spawn_random(self, n, size=(4, 16), speed=200, seed=0):
+        rng = np.random.default_rng(seed)
+        w = rng.integers(size[0], size[1] + 1, n)
+        h = rng.integers(size[0], size[1] + 1, n)
+        return self.spawn(rng.uniform(0, self.width - w), rng.uniform(0, self.height - h),
+                          rng.uniform(-speed, speed, n), rng.uniform(-speed, speed, n),
+                          w, h, rng.integers(0, len(PALETTE), n))
+
+    def remove(self, indices):
+        """
+        Remove entities by index. The last entities move into the freed
+        slots, so indices of other entities may change.
+        """
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        count = int(keep.sum())
+        for field in self.FIELDS + ("color",):
+            array = getattr(self, "_" + field)
+            array[:count] = array[:self.count][keep]
+        self.count = count
+
+    # -------------------------------------------------------------------------
+    # Simulation
+    # -------------------------------------------------------------------------
+
+    def update(self, dt):
+        """Advance by exactly 'dt' seconds: move, bounce off walls, collide."""
+        self.integrate(dt)
+        self.bounce()
+        self.resolve(*self.collisions())
+
+    def integrate(self, dt):
+        # (Locals: 'self.x += ...' would store the view as an attribute)
+        x, y = self.x, self.y
+        np.copyto(self.prev_x, x)
+        np.copyto(self.prev_y, y)
+        x += self.vx * dt
+        y += self.vy * dt
+
+    def bounce(self):
+        for pos, vel, size, limit in ((self.x, self.vx, self.w, self.width),
+                                      (self.y, self.vy, self.h, self.height)):
+            out = (pos < 0) | (pos > limit - size)
+            vel[out] = -vel[out]
+            np.clip(pos, 0, limit - size, out=pos)
+
+    def collisions(self):
+        """Return arrays (a, b), a < b, of every pair of overlapping entities."""
+        x, y, w, h = self.x, self.y, self.w, self.h
+        if self.count < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        cell = 2 * max(w.max(), h.max(), 1.0)
+        columns = int(self.width // cell) + 2
+        # Coordinates are >= 0, so truncating x / cell floors it (and is
+        # much faster than x // cell on floats)
+        scale = 1.0 / cell
+
+        # Every cell an entity's box touches (1, 2 or 4 of them): its home
+        # cell, plus the one right of, below, and diagonally below it
+        cx0, cy0 = (x * scale).astype(np.int32), (y * scale).astype(np.int32)
+        wide = np.flatnonzero(((x + w) * scale).astype(np.int32) != cx0)
+        tall = np.flatnonzero(((y + h) * scale).astype(np.int32) != cy0)
+        both = np.intersect1d(wide, tall, assume_unique=True)
+        home = cy0 * columns + cx0
+        entity = np.concatenate((np.arange(self.count), wide, tall, both))
+        cells = np.concatenate((home, home[wide] + 1, home[tall] + columns,
+                                home[both] + (columns + 1)))
+        order = np.argsort(cells)
+        entity, cells = entity[order], cells[order]
+
+        # Candidates: entries k apart in the sorted list with the same cell.
+        # Groups are contiguous, so once no group is k long, none is k + 1.
+        a_parts, b_parts = [], []
+        k = 1
+        while k < len(cells):
+            same = cells[:-k] == cells[k:]
+            if not same.any():
+                break
+            a, b, shared = entity[:-k][same], entity[k:][same], cells[:-k][same]
+            # Exact AABB test
+            hit = ((x[a] < x[b] + w[b]) & (x[b] < x[a] + w[a]) &
+                   (y[a] < y[b] + h[b]) & (y[b] < y[a] + h[a]))
+            a, b, shared = a[hit], b[hit], shared[hit]
+            # A pair can share up to 4 cells; report it only from the cell
+            # holding the top-left corner of the overlap
+            corner = ((np.maximum(y[a], y[b]) * scale).astype(np.int32) * columns +
+                      (np.maximum(x[a], x[b]) * scale).astype(np.int32))
+            first = corner == shared
+            a_parts.append(a[first])
+            b_parts.append(b[first])
+            k += 1
+
+        if not a_parts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        a, b = np.concatenate(a_parts), np.concatenate(b_parts)
+        return np.minimum(a, b), np.maximum(a, b)
+
+    def resolve(self, a, b):
+        """Equal-mass elastic response: colliding pairs swap velocities."""
+        # Only pairs still moving towards each other; swapping the velocities
+        # of a pair that is already separating would pull it back together
+        dx = (self.x[b] + self.w[b] / 2) - (self.x[a] + self.w[a] / 2)
+        dy = (self.y[b] + self.h[b] / 2) - (self.y[a] + self.h[a] / 2)
+        closing = dx * (self.vx[b] - self.vx[a]) + dy * (self.vy[b] - self.vy[a]) < 0
+        a, b = a[closing], b[closing]
+        if len(a):
+            # (An entity in several pairs takes the velocity of one of them)
+            self.vx[a], self.vx[b] = self.vx[b], self.vx[a]
+            self.vy[a], self.vy[b] = self.vy[b], self.vy[a]
+
+class EntityRenderer:
+    """
+    Draws an EntityStore straight into the screen's pixels with NumPy.
+
+    The world is mapped onto the screen (scaled down if it is larger), and
+    every entity becomes a filled rectangle of at least one pixel. Drawing
+    is one array assignment per pixel offset inside the largest rectangle,
+    not one call per entity; with tens of thousands of entities the dirty
+    rectangles would cover most of the screen anyway, so the whole display
+    is cleared and updated each frame.
+    """
+
+    def __init__(self, screen, store, background=(0, 0, 0)):
+        self.screen = screen
+        self.store = store
+        self.background = screen.map_rgb(background)
+        self.palette = np.array([screen.map_rgb(color) for color in PALETTE])
+        width, height = screen.get_size()
+        self.scale_x = width / store.width
+        self.scale_y = height / store.height
+
+    def render(self, alpha):
+        store = self.store
+        width, height = self.screen.get_size()
+        x = store.prev_x + (store.x - store.prev_x) * alpha
+        y = store.prev_y + (store.y - store.prev_y) * alpha
+        px = np.clip((x * self.scale_x).astype(np.intp), 0, width - 1)
+        py = np.clip((y * self.scale_y).astype(np.intp), 0, height - 1)
+        pw = np.maximum((store.w * self.scale_x).astype(np.intp), 1)
+        ph = np.maximum((store.h * self.scale_y).astype(np.intp), 1)
+        colors = self.palette[store.color]
+
+        pixels = pygame.surfarray.pixels2d(self.screen)  # locks the screen
+        pixels[:] = self.background
+        for dx in range(int(pw.max()) if len(pw) else 0):
+            for dy in range(int(ph.max())):
+                inside = (pw > dx) & (ph > dy)
+                if dx or dy:
+                    pixels[np.minimum(px[inside] + dx, width - 1),
+                           np.minimum(py[inside] + dy, height - 1)] = colors[inside]
+                else:
+                    pixels[px, py] = colors
+        del pixels  # unlock before the display reads the surface
+        pygame.display.flip()
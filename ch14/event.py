@@ -1,47 +1,633 @@
+import heapq
+import inspect
+import itertools
+import math
 import time
 import threading
-import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 class Event:
-    def __init__(self, name, data=None):
+    def __init__(self, name, data=None, key=None):
         self.name = name
         self.data = data
+        # Events with the same name and a non-None key may be coalesced
+        # (only the latest kept) by a queue using the "coalesce" policy
+        self.key = key
+
+class ListenerStats:
+    """Call count, time and a log-scale latency histogram of one listener."""
+    __slots__ = ("calls", "errors", "over_budget", "total", "max", "buckets")
+
+    # Four linear sub-buckets per power of two of nanoseconds: every bucket
+    # is at most 25% wide, whatever the magnitude
+    SUB_BUCKETS = 4
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.over_budget = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        mantissa, exponent = math.frexp(seconds * 1e9)  # mantissa in [0.5, 1)
+        bucket = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, percent):
+        """Upper bound (seconds) of the bucket holding the given percentile."""
+        rank = self.calls * percent / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                exponent, sub = divmod(bucket, self.SUB_BUCKETS)
+                upper = math.ldexp(0.5 + (sub + 1) / (2 * self.SUB_BUCKETS), exponent) / 1e9
+                return min(upper, self.max)
+        return self.max
+
+class ListenerProfiler:
+    """
+    Opt-in instrumentation for EventDispatcher: per event name and per
+    listener, counts calls, errors and time, keeps a latency histogram and
+    flags calls slower than 'budget' seconds (on_slow(event_name,
+    listener_name, seconds) is called for each, if given).
+
+    EventDispatcher.instrument() swaps each registered listener for a timing
+    wrapper; uninstrument() swaps the originals back. Dispatch itself is
+    never changed, so a dispatcher that is not instrumented runs exactly
+    the original code.
+
+    Coroutine listeners (AsyncEventDispatcher) get an async wrapper that
+    awaits them, so their time runs until they finish (including the time
+    they spend suspended) and exceptions raised after an await count as
+    errors.
+    """
+
+    def __init__(self, budget=None, on_slow=None, clock=time.perf_counter):
+        self.budget = budget
+        self.on_slow = on_slow
+        self.clock = clock
+        self.stats = {}  # (event name, listener name) -> ListenerStats
+        self.lock = threading.Lock()  # ShardedDispatcher records from many threads
+
+    def wrap(self, event_name, listener, batch=False):
+        name = getattr(listener, "__qualname__", repr(listener))
+        if batch:
+            name += " [batch]"
+        stats = self.stats.setdefault((event_name, name), ListenerStats())
+        clock, lock = self.clock, self.lock
+
+        def record(elapsed, failed):
+            with lock:
+                stats.add(elapsed)
+                stats.errors += failed
+                slow = self.budget is not None and elapsed > self.budget
+                if slow:
+                    stats.over_budget += 1
+            if slow and self.on_slow:
+                self.on_slow(event_name, name, elapsed)
+
+        if inspect.iscoroutinefunction(listener):
+            async def timed(arg):
+                failed = True
+                start = clock()
+                try:
+                    result = await listener(arg)
+                    failed = False
+                    return result
+                finally:
+                    record(clock() - start, failed)
+        else:
+            def timed(arg):
+                failed = True
+                start = clock()
+                try:
+                    result = listener(arg)
+                    failed = False
+                    return result
+                finally:
+                    record(clock() - start, failed)
+        timed.unwrapped = listener
+        return timed
+
+    def snapshot(self):
+        """{event name: {listener name: summary dict}}, times in seconds."""
+        result = {}
+        with self.lock:
+            for (event_name, name), stats in self.stats.items():
+                result.setdefault(event_name, {})[name] = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "over_budget": stats.over_budget,
+                    "total": stats.total,
+                    "mean": stats.total / stats.calls if stats.calls else 0.0,
+                    "p50": stats.percentile(50),
+                    "p95": stats.percentile(95),
+                    "p99": stats.percentile(99),
+                    "max": stats.max,
+                }
+        return result
+
+    def slow_listeners(self):
+        """(event name, listener name) pairs that went over budget, worst first."""
+        with self.lock:
+            flagged = [(stats.over_budget, key) for key, stats in self.stats.items()
+                       if stats.over_budget]
+        return [key for _, key in sorted(flagged, reverse=True)]
+
+    def report(self):
+        lines = [f"{'event':<12} {'listener':<24} {'calls':>9} {'total s':>9} "
+                 f"{'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9} {'errors':>7} {'slow':>6}"]
+        for event_name, listeners in sorted(self.snapshot().items()):
+            for name, row in sorted(listeners.items(), key=lambda item: -item[1]["total"]):
+                lines.append(f"{event_name:<12} {name:<24} {row['calls']:9,} "
+                             f"{row['total']:9.4f} {row['p50'] * 1e6:9.1f} "
+                             f"{row['p95'] * 1e6:9.1f} {row['p99'] * 1e6:9.1f} "
+                             f"{row['max'] * 1e6:9.1f} {row['errors']:7,} {row['over_budget']:6,}")
+        return "\n".join(lines)
 
 class EventDispatcher:
     def __init__(self):
         self._listeners = {}
+        self._batch_listeners = {}
+        self.profiler = None
 
     def register(self, event_name, listener):
+        if self.profiler:
+            listener = self.profiler.wrap(event_name, listener)
         if event_name not in self._listeners:
             self._listeners[event_name] = []
         self._listeners[event_name].append(listener)
 
+    def register_batch(self, event_name, listener):
+        """Register a listener that receives a list of events at once."""
+        if self.profiler:
+            listener = self.profiler.wrap(event_name, listener, batch=True)
+        if event_name not in self._batch_listeners:
+            self._batch_listeners[event_name] = []
+        self._batch_listeners[event_name].append(listener)
+
+    def instrument(self, budget=None, on_slow=None):
+        """Start timing every listener; returns the ListenerProfiler."""
+        if self.profiler is None:
+            self.profiler = ListenerProfiler(budget, on_slow)
+            for table, batch in ((self._listeners, False), (self._batch_listeners, True)):
+                for event_name, listeners in table.items():
+                    # Slice assignment: threads iterating the list see old or new
+                    listeners[:] = [self.profiler.wrap(event_name, listener, batch)
+                                    for listener in listeners]
+        return self.profiler
+
+    def uninstrument(self):
+        """Put the original listeners back; the profiler keeps its data."""
+        profiler, self.profiler = self.profiler, None
+        if profiler:
+            for table in (self._listeners, self._batch_listeners):
+                for listeners in table.values():
+                    listeners[:] = [getattr(listener, "unwrapped", listener)
+                                    for listener in listeners]
+        return profiler
+
     def dispatch(self, event):
         if event.name in self._listeners:
             for listener in self._listeners[event.name]:
                 listener(event)
 
+    def dispatch_batch(self, events, on_error=None):
+        """
+        Dispatch several events: each one to the regular listeners, in
+        order, then every batch listener once with all events of its name.
+
+        With on_error, an exception from one listener call is passed to it
+        and the remaining calls still happen; without, it propagates.
+        """
+        by_name = {}
+        for event in events:
+            if event.name in self._batch_listeners:
+                by_name.setdefault(event.name, []).append(event)
+            try:
+                self.dispatch(event)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+
+        for name, group in by_name.items():
+            for listener in self._batch_listeners[name]:
+                try:
+                    listener(group)
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(e)
+
+class EventQueue:
+    """
+    Thread-safe FIFO that hands the consumer everything pending at once.
+
+    get_batch() blocks on a condition variable until at least one item is
+    queued, then swaps out the whole deque under a single lock acquisition,
+    instead of paying one lock round trip per item like queue.Queue.get().
+
+    With a capacity, put() on a full queue follows the overflow policy:
+
+        "block"        wait until the consumer makes room
+        "drop_oldest"  discard the oldest queued item
+        "drop_newest"  discard the item being put
+        "coalesce"     an item put with the same key as a queued one
+                       replaces it in place (keeping its position); a new
+                       key on a full queue drops the oldest item
+
+    "coalesce" merges same-key items even when the queue is not full.
+    The dropped and coalesced counters record how often each happened.
+
+    Items put with force=True (control items such as a stop sentinel) are
+    never dropped or coalesced, and do not count against the capacity.
+    """
+
+    POLICIES = ("block", "drop_oldest", "drop_newest", "coalesce")
+
+    def __init__(self, capacity=None, overflow="block"):
+        if overflow not in self.POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.dropped = 0
+        self.coalesced = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._waiting = False
+        self._woken = False
+        # coalesce policy: queue entries are [item, key] cells, indexed by key
+        self._cells = {}
+        self._forced = set()  # id() of the queued entries put with force
+
+    def put(self, item, key=None, force=False):
+        """
+        Queue 'item'; return False if the overflow policy discarded it.
+        'force' bypasses the capacity (for control items like sentinels).
+        """
+        with self._lock:
+            coalescing = self.overflow == "coalesce"
+            if coalescing and not force and key is not None and key in self._cells:
+                self._cells[key][0] = item
+                self.coalesced += 1
+                return True
+
+            if not force and self.capacity is not None and self._full():
+                if self.overflow == "block":
+                    while self._full():
+                        self._not_full.wait()
+                elif self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return False
+                else:
+                    self._drop_oldest()
+
+            if coalescing:
+                item = [item, key]
+                if key is not None and not force:
+                    self._cells[key] = item
+            if force:
+                self._forced.add(id(item))
+            self._items.append(item)
+            if self._waiting:
+                self._ready.notify()
+            return True
+
+    def _full(self):
+        return len(self._items) - len(self._forced) >= self.capacity
+
+    def _drop_oldest(self):
+        # The oldest item not put with force (there is one: the queue is full)
+        for index, oldest in enumerate(self._items):
+            if id(oldest) not in self._forced:
+                break
+        del self._items[index]
+        if self.overflow == "coalesce" and self._cells.get(oldest[1]) is oldest:
+            del self._cells[oldest[1]]
+        self.dropped += 1
+
+    def wake(self):
+        """Make the current (or next) get_batch() return, even if empty."""
+        with self._lock:
+            self._woken = True
+            if self._waiting:
+                self._ready.notify()
+
+    def get_batch(self, timeout=None):
+        """Return a deque of all pending items (empty on timeout or wake)."""
+        with self._lock:
+            if not self._items and not self._woken:
+                self._waiting = True
+                self._ready.wait(timeout)
+                self._waiting = False
+            self._woken = False
+            batch, self._items = self._items, deque()
+            self._forced.clear()
+            if self.overflow == "coalesce":
+                self._cells.clear()
+                batch = deque(cell[0] for cell in batch)
+            if self.overflow == "block":
+                self._not_full.notify_all()
+            return batch
+
+    def __len__(self):
+        return len(self._items)
+
+class TimerHandle:
+    """Returned by EventLoop.schedule*(); cancel() stops the timer."""
+    __slots__ = ("loop", "event", "interval", "cancelled", "done")
+
+    def __init__(self, loop, event, interval):
+        self.loop = loop
+        self.event = event
+        self.interval = interval  # None for a one-shot timer
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        # O(1): the heap entry stays behind and is skipped when it comes up
+        self.loop._cancel_timer(self)
+
 class EventLoop:
-    def __init__(self, dispatcher):
-        self.event_queue = queue.Queue()
+    # Queued by stop(): wakes the loop at once and ends it after every event
+    # enqueued before it has been dispatched
+    _STOP = object()
+
+    def __init__(self, dispatcher, capacity=None, overflow="block"):
+        self.event_queue = EventQueue(capacity, overflow)
         self.dispatcher = dispatcher
         self.running = True
 
+        # Counters (written only by the loop thread)
+        self.events_dispatched = 0
+        self.batches = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent_latencies = deque(maxlen=10000)  # for percentiles
+        self.started_at = None
+        self.timers_fired = 0
+
+        # Timers: a heap of (deadline, sequence number, TimerHandle). The
+        # loop sleeps until the earliest deadline unless events arrive first.
+        self._timers = []
+        self._timer_lock = threading.Lock()
+        self._timer_seq = itertools.count()
+        self._cancelled = 0  # cancelled entries still in the heap
+
     def run(self):
+        clock = time.perf_counter
+        self.started_at = clock()
         while self.running:
-            try:
-                event = self.event_queue.get(timeout=1)  # Wait for 1 second
-                self.dispatcher.dispatch(event)
-            except queue.Empty:
-                pass  # Queue was empty, continue loop
-            except Exception as e:
-                print(f"Error in event loop: {e}")
+            batch = self.event_queue.get_batch(self._next_timeout(clock()))
+            events = []
+            enqueued = []
+            for enqueued_at, event in batch:
+                if event is self._STOP:
+                    self.running = False
+                    break
+                enqueued.append(enqueued_at)
+                events.append(event)
+            if self.running:
+                events.extend(self._due_timers(clock()))
+            if events:
+                self.batches += 1
+                self.dispatcher.dispatch_batch(events, on_error=self.report_error)
+                self.events_dispatched += len(events)
+                # Taken after dispatch: an event behind slow listeners in
+                # its batch waited for them too
+                done = clock()
+                for enqueued_at in enqueued:
+                    latency = done - enqueued_at
+                    self.total_latency += latency
+                    self.max_latency = max(self.max_latency, latency)
+                    self.recent_latencies.append(latency)
+
+    # -------------------------------------------------------------------------
+    # Timers
+    # -------------------------------------------------------------------------
+
+    def schedule(self, event, delay):
+        """Dispatch 'event' once, 'delay' seconds from now."""
+        return self._add_timer(event, delay, None)
+
+    def schedule_every(self, event, interval, delay=None):
+        """Dispatch 'event' every 'interval' seconds (first after 'delay')."""
+        if interval <= 0:
+            # It would always be due again: _due_timers() would never return
+            raise ValueError("interval must be positive")
+        return self._add_timer(event, interval if delay is None else delay, interval)
+
+    def _add_timer(self, event, delay, interval):
+        # Timer events go straight to dispatch: they bypass the queue's
+        # capacity and overflow policy
+        handle = TimerHandle(self, event, interval)
+        deadline = time.perf_counter() + delay
+        with self._timer_lock:
+            earliest = self._timers[0][0] if self._timers else None
+            heapq.heappush(self._timers, (deadline, next(self._timer_seq), handle))
+        if earliest is None or deadline < earliest:
+            self.event_queue.wake()  # the loop may be sleeping until later
+        return handle
+
+    def _cancel_timer(self, handle):
+        # Under the lock: _due_timers() may be firing this very timer
+        with self._timer_lock:
+            if handle.cancelled or handle.done:
+                return
+            handle.cancelled = True
+            self._cancelled += 1
+            # Rebuild once most of the heap is dead entries: amortized O(1)
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._timers):
+                self._timers = [entry for entry in self._timers if not entry[2].cancelled]
+                heapq.heapify(self._timers)
+                self._cancelled = 0
+
+    def _next_timeout(self, now):
+        """Seconds until the earliest live timer, or None if there is none."""
+        with self._timer_lock:
+            timers = self._timers
+            while timers and timers[0][2].cancelled:
+                heapq.heappop(timers)
+                self._cancelled -= 1
+            return max(0.0, timers[0][0] - now) if timers else None
+
+    def _due_timers(self, now):
+        """Pop the events of all timers due by 'now'; re-arm periodic ones."""
+        due = []
+        with self._timer_lock:
+            timers = self._timers
+            while timers and timers[0][0] <= now:
+                deadline, _, handle = heapq.heappop(timers)
+                if handle.cancelled:
+                    self._cancelled -= 1
+                    continue
+                due.append(handle.event)
+                if handle.interval is None:
+                    handle.done = True
+                    continue
+                # Fixed rate; after a stall, skip missed ticks instead of bursting
+                deadline += handle.interval
+                if deadline <= now:
+                    deadline = now + handle.interval
+                heapq.heappush(timers, (deadline, next(self._timer_seq), handle))
+        self.timers_fired += len(due)
+        return due
+
+    # -------------------------------------------------------------------------
+    # Events and statistics
+    # -------------------------------------------------------------------------
+
+    def report_error(self, error):
+        print(f"Error in event loop: {error}")
 
     def stop(self):
-        self.running = False
+        self.event_queue.put((time.perf_counter(), self._STOP), force=True)
 
     def enqueue_event(self, event):
-        self.event_queue.put(event)
+        """Queue 'event'; False if the overflow policy dropped it."""
+        key = (event.name, event.key) if event.key is not None else None
+        return self.event_queue.put((time.perf_counter(), event), key)
+
+    def latency_percentile(self, percent):
+        """
+        Latency (seconds) over the recent events, from enqueue_event() until
+        dispatch_batch() returned for the batch holding the event: queue
+        wait plus the listeners of the whole batch. Timer events are not
+        counted.
+        """
+        if not self.recent_latencies:
+            return 0.0
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def stats(self):
+        dispatched = self.events_dispatched
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "events_dispatched": dispatched,
+            "events_per_second": dispatched / elapsed if elapsed else 0.0,
+            "batches": self.batches,
+            "events_per_batch": dispatched / self.batches if self.batches else 0.0,
+            "queue_depth": len(self.event_queue),
+            "dropped": self.event_queue.dropped,
+            "coalesced": self.event_queue.coalesced,
+            "pending_timers": len(self._timers) - self._cancelled,
+            "timers_fired": self.timers_fired,
+            "mean_latency": self.total_latency / dispatched if dispatched else 0.0,
+            "p99_latency": self.latency_percentile(99),
+            "max_latency": self.max_latency,
+        }
+
+def call_listeners(listeners, arg):
+    """Run listeners in order; the unit of work sent to a shard process."""
+    for listener in listeners:
+        listener(arg)
+
+class ShardedDispatcher(EventDispatcher):
+    """
+    Runs listeners on a pool of worker threads instead of the loop thread.
+
+    dispatch() only routes the event to one of N shards, chosen by
+    partition_key(event) (the event name by default); each shard has its
+    own queue and worker, so events of one shard are handled in order while
+    different shards run in parallel, and a slow listener only delays its
+    own shard.
+
+    With use_processes=True each shard hands its events to a dedicated
+    single-process executor instead, for CPU-bound listeners that the GIL
+    would otherwise serialize. Listeners and event data must then be
+    picklable (module-level functions, plain data).
+    """
+
+    _STOP = object()
+
+    def __init__(self, workers=4, partition_key=None, use_processes=False,
+                 capacity=None, overflow="block"):
+        super().__init__()
+        self.partition_key = partition_key or (lambda event: event.name)
+        self.shards = [EventQueue(capacity, overflow) for _ in range(workers)]
+        self.processed = [0] * workers
+        self.executors = None
+        if use_processes:
+            self.executors = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+        self.threads = [threading.Thread(target=self._work, args=(index,),
+                                         name=f"shard-{index}")
+                        for index in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def instrument(self, budget=None, on_slow=None):
+        if self.executors:
+            # The timing wrappers would run, and record, in the shard process
+            raise RuntimeError("cannot instrument listeners that run in "
+                               "worker processes")
+        return super().instrument(budget, on_slow)
+
+    def dispatch(self, event):
+        shard = hash(self.partition_key(event)) % len(self.shards)
+        key = (event.name, event.key) if event.key is not None else None
+        self.shards[shard].put(event, key)
+
+    def dispatch_batch(self, events, on_error=None):
+        # Listeners (batch ones included) run on the shard workers
+        for event in events:
+            self.dispatch(event)
+
+    def _work(self, index):
+        shard = self.shards[index]
+        executor = self.executors[index] if self.executors else None
+
+        def run(listeners, arg):
+            try:
+                if executor:
+                    executor.submit(call_listeners, listeners, arg).result()
+                else:
+                    call_listeners(listeners, arg)
+            except Exception as e:
+                print(f"Error in shard {index}: {e}")
+
+        while True:
+            by_name = {}
+            stopping = False
+            for event in shard.get_batch():
+                if event is self._STOP:
+                    stopping = True
+                    break
+                if event.name in self._listeners:
+                    run(self._listeners[event.name], event)
+                if event.name in self._batch_listeners:
+                    by_name.setdefault(event.name, []).append(event)
+                self.processed[index] += 1
+            for name, group in by_name.items():
+                run(self._batch_listeners[name], group)
+            if stopping:
+                return
+
+    def shard_depths(self):
+        """Events waiting in each shard's queue right now."""
+        return [len(shard) for shard in self.shards]
+
+    def close(self):
+        """Finish every event already dispatched, then stop the workers."""
+        for shard in self.shards:
+            shard.put(self._STOP, force=True)
+        for thread in self.threads:
+            thread.join()
+        for executor in self.executors or ():
+            executor.shutdown()
 
 # Listener functions
 def log_event(event):
@@ -60,21 +646,22 @@ if __name__ == "__main__":
 
     dispatcher.register("log", log_event)
     dispatcher.register("process", process_data)
+    profiler = dispatcher.instrument(budget=0.001)
 
     loop_thread = threading.Thread(target=event_loop.run)
     loop_thread.start()
 
-    # Simulate event generation
+    # Simulate event generation: timers instead of sleeping between events
     event_loop.enqueue_event(Event("log", {"message": "User login"}))
-    time.sleep(0.5)
-    event_loop.enqueue_event(Event("process", "test data"))
-    time.sleep(0.5)
-    event_loop.enqueue_event(Event("log", {"message": "Data processed"}))
-    time.sleep(0.5)
-    event_loop.enqueue_event(Event("process"))
-    time.sleep(1.5)
+    event_loop.schedule(Event("process", "test data"), 0.5)
+    event_loop.schedule(Event("log", {"message": "Data processed"}), 1.0)
+    event_loop.schedule(Event("process"), 1.5)
+    heartbeat = event_loop.schedule_every(Event("log", {"message": "Heartbeat"}), 0.75)
+    time.sleep(2.0)
+    heartbeat.cancel()
 
     event_loop.stop()
     loop_thread.join()
 
     print("Event loop stopped.")
+    print(profiler.report())
@@ -1,13 +1,228 @@
-import pygame
+"""
+Pygame loop with exception handling and a fixed-timestep game loop.
+
+The simulation advances in fixed steps (--updates-per-second) no matter how
+fast frames are drawn; rendering interpolates between the last two
+simulation states, so motion stays smooth at any frame rate. When the
+machine falls behind, the loop runs several updates per frame (at most
+MAX_STEPS) and skips drawing that frame, so the simulation keeps real time.
+
+Only the rectangles that changed are sent to the display
+(pygame.display.update(rects)) instead of flipping the whole screen.
+
+--entities N swaps the box World for the NumPy entity store in
+entities.py (vectorized movement, grid-based collisions, batched drawing).
+
+--headless uses SDL's dummy video driver to benchmark frame time and
+simulation throughput on a machine without a display. It free-runs: every
+frame is one update and one render back-to-back, with no frame cap and no
+accumulator tying updates to wall-clock time, and the report gives
+steps/s, the maximum update rate.
+
+Usage:    python game.py [--boxes N] [--fps N] [--updates-per-second N]
+          python game.py --headless [--frames N] [--boxes N | --entities N]
+"""
+
+import argparse
+import os
+import random
 import sys
+import time
+from collections import deque
+
+import pygame
+
+from assets import AssetManager
+
+WIDTH, HEIGHT = 640, 480
+BACKGROUND = (0, 0, 0)
+BOX_SIZE = 16
+WORLD_SCALE = 4  # entity world size relative to the screen (--entities)
+
+class World:
+    """Boxes bouncing around the screen: the game state the loop updates."""
+
+    def __init__(self, count, seed=0):
+        rng = random.Random(seed)
+        self.boxes = []
+        for _ in range(count):
+            x, y = rng.uniform(0, WIDTH - BOX_SIZE), rng.uniform(0, HEIGHT - BOX_SIZE)
+            self.boxes.append({
+                "x": x, "y": y,
+                "prev_x": x, "prev_y": y,
+                "vx": rng.uniform(-200, 200), "vy": rng.uniform(-200, 200),
+                "color": (rng.randrange(64, 256), rng.randrange(64, 256), rng.randrange(64, 256)),
+            })
+
+    def update(self, dt):
+        """Advance the simulation by exactly 'dt' seconds."""
+        for box in self.boxes:
+            box["prev_x"], box["prev_y"] = box["x"], box["y"]
+            box["x"] += box["vx"] * dt
+            box["y"] += box["vy"] * dt
+            if not 0 <= box["x"] <= WIDTH - BOX_SIZE:
+                box["vx"] = -box["vx"]
+                box["x"] = min(max(box["x"], 0), WIDTH - BOX_SIZE)
+            if not 0 <= box["y"] <= HEIGHT - BOX_SIZE:
+                box["vy"] = -box["vy"]
+                box["y"] = min(max(box["y"], 0), HEIGHT - BOX_SIZE)
+
+class Renderer:
+    """Draws the World and reports only the screen areas that changed."""
+
+    def __init__(self, screen, world, sprite=None):
+        self.screen = screen
+        self.world = world
+        self.sprite = sprite  # returns the player image to draw centered
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(BACKGROUND)
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()  # one full update; dirty rectangles after that
+        self.drawn = []  # rectangles drawn last frame, to erase next frame
+
+    def render(self, alpha):
+        """Draw at 'alpha' (0..1) between the previous and current state."""
+        dirty = self.drawn
+        # Erase last frame's boxes by copying the background back over them
+        for rect in dirty:
+            self.screen.blit(self.background, rect, rect)
+
+        self.drawn = []
+        for box in self.world.boxes:
+            x = box["prev_x"] + (box["x"] - box["prev_x"]) * alpha
+            y = box["prev_y"] + (box["y"] - box["prev_y"]) * alpha
+            self.drawn.append(self.screen.fill(box["color"], (x, y, BOX_SIZE, BOX_SIZE)))
+        if self.sprite:
+            image = self.sprite()
+            self.drawn.append(self.screen.blit(
+                image, image.get_rect(center=(WIDTH // 2, HEIGHT // 2))))
+
+        pygame.display.update(dirty + self.drawn)
+
+class FixedStepLoop:
+    """
+    Runs update(dt) at a fixed rate and render(alpha) once per frame.
+
+    Each frame adds the elapsed real time to an accumulator and runs
+    update() once per whole step in it. If that takes MAX_STEPS updates
+    and time is still left over, the loop is behind: it skips rendering
+    (at most MAX_SKIPPED frames in a row) to spend the time on updates.
+    Frame times above MAX_FRAME_TIME (a breakpoint, a dragged window) are
+    clamped so the loop does not try to catch up on all of it at once.
+
+    With free_run, wall-clock time is ignored: each frame runs exactly one
+    update and one render, as fast as they go (for benchmarking).
+    """
+
+    MAX_STEPS = 5
+    MAX_SKIPPED = 5
+    MAX_FRAME_TIME = 0.25
+    FRAME_WINDOW = 10000  # recent frame times kept for the percentile
+
+    def __init__(self, update, render, handle_events, updates_per_second=60, fps=60,
+                 free_run=False):
+        self.update = update
+        self.render = render
+        self.handle_events = handle_events  # returns False to quit
+        self.step = 1.0 / updates_per_second
+        self.fps = fps  # 0 = uncapped
+        self.free_run = free_run
+        self.frames = 0
+        self.updates = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.frame_times = deque(maxlen=self.FRAME_WINDOW)
+        self.frame_time_total = 0.0
+
+    def run(self, max_frames=None):
+        clock = pygame.time.Clock()
+        now = time.perf_counter
+        previous = now()
+        accumulator = 0.0
+        skipped_in_row = 0
+
+        while max_frames is None or self.frames < max_frames:
+            frame_start = now()
+            accumulator += min(frame_start - previous, self.MAX_FRAME_TIME)
+            previous = frame_start
+
+            if not self.handle_events():
+                break
+
+            if self.free_run:
+                self.update(self.step)
+                self.updates += 1
+                self.render(1.0)
+                self.rendered += 1
+                self.frames += 1
+                frame_time = now() - frame_start
+                self.frame_times.append(frame_time)
+                self.frame_time_total += frame_time
+                continue
+
+            steps = 0
+            while accumulator >= self.step and steps < self.MAX_STEPS:
+                self.update(self.step)
+                accumulator -= self.step
+                steps += 1
+            self.updates += steps
+
+            behind = accumulator >= self.step
+            if behind and skipped_in_row < self.MAX_SKIPPED:
+                skipped_in_row += 1
+                self.skipped += 1
+            else:
+                skipped_in_row = 0
+                # Still behind after a forced render: drop the backlog
+                accumulator = min(accumulator, self.step)
+                self.render(accumulator / self.step)
+                self.rendered += 1
+
+            self.frames += 1
+            frame_time = now() - frame_start
+            self.frame_times.append(frame_time)
+            self.frame_time_total += frame_time
+            clock.tick(self.fps)
+
+    def report(self, elapsed):
+        ordered = sorted(self.frame_times) or [0.0]
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        mean = self.frame_time_total / max(self.frames, 1)
+        return (f"{self.frames:,} frames in {elapsed:.2f} s "
+                f"({self.rendered:,} rendered, {self.skipped:,} skipped)\n"
+                f"frame time: mean {mean * 1e3:.3f} ms, "
+                f"p99 {p99 * 1e3:.3f} ms (last {len(ordered):,} frames)\n"
+                f"{'steps/s' if self.free_run else 'updates/s'}: "
+                f"{self.updates / elapsed:,.0f}   "
+                f"frames/s: {self.frames / elapsed:,.0f}")
 
 def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--headless", action="store_true")
+    arg_parser.add_argument("--frames", type=int, default=None,
+                            help="stop after N frames (headless default: 2000)")
+    arg_parser.add_argument("--boxes", type=int, default=200)
+    arg_parser.add_argument("--entities", type=int, default=0,
+                            help="use the NumPy entity store with N entities")
+    arg_parser.add_argument("--fps", type=int, default=None,
+                            help="frame rate cap, 0 = uncapped (headless default: 0)")
+    arg_parser.add_argument("--updates-per-second", type=int, default=60)
+    args = arg_parser.parse_args()
+
+    if args.headless:
+        # Must be set before pygame.init(): no window, no display needed
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        if args.frames is None:
+            args.frames = 2000
+    if args.fps is None:
+        args.fps = 0 if args.headless else 60
+
     # ---------------------------------------------------------
     # SETUP PHASE
     # ---------------------------------------------------------
     try:
         pygame.init()
-        screen = pygame.display.set_mode((640, 480))
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Pygame with Exception Handling")
     except pygame.error as e:
         print(f"CRITICAL: Failed to initialize Pygame hardware: {e}")
@@ -15,51 +230,59 @@ def main():
 
     # 1. LOCALIZED EXCEPTION HANDLING (Asset Loading)
     # ---------------------------------------------------------
-    # We try to load a file. If it fails, we catch the specific error
-    # and recover by continuing the game without it.
-    try:
-        # Intentionally trying to load a file that doesn't exist
-        player_image = pygame.image.load("missing_player_sprite.png")
-    except FileNotFoundError as e:
-        print(f"WARNING: Asset missing ({e}). Using a default colored square instead.")
-        # Fallback logic goes here (e.g., drawing a simple rectangle)
-    except pygame.error as e:
-        print(f"WARNING: Image format not supported: {e}")
+    # Assets load on background threads, so startup does not wait for them.
+    # AssetManager catches the specific errors (FileNotFoundError,
+    # pygame.error) and recovers by handing out a placeholder surface, so
+    # the game continues without the file.
+    assets = AssetManager()
 
-    clock = pygame.time.Clock()
-    running = True
-    print("Game started. Try pressing SPACE, ESCAPE, or clicking the mouse!")
-
-    # 2. THE GLOBAL WRAPPER (Guaranteed Cleanup)
-    # ---------------------------------------------------------
-    # We wrap the entire game loop in a try-finally block.
-    try:
-        while running:
+    if args.entities:
+        from entities import EntityRenderer, EntityStore  # requires numpy
+        # Tens of thousands of entities need room: the world is WORLD_SCALE
+        # times the screen in each direction and drawn scaled down
+        world = EntityStore((WIDTH * WORLD_SCALE, HEIGHT * WORLD_SCALE),
+                            capacity=args.entities)
+        world.spawn_random(args.entities, size=(2, 4), speed=200 * WORLD_SCALE)
+        renderer = EntityRenderer(screen, world, BACKGROUND)
+    else:
+        world = World(args.boxes)
+        # Intentionally trying to load a file that doesn't exist (only the
+        # box world draws the player sprite)
+        assets.preload(["missing_player_sprite.png"])
+        renderer = Renderer(screen, world,
+                            sprite=lambda: assets.get("missing_player_sprite.png"))
 
-            # --- STEP 1: EVENT HANDLING ---
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
+    # --- STEP 1: EVENT HANDLING (once per frame) ---
+    def handle_events():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
 
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        print("Event: Spacebar was pressed!")
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    print("Event: Spacebar was pressed!")
 
-                        # Let's simulate a random, unexpected crash happening in our game logic
-                        # If you press SPACE, we divide by zero to trigger an exception!
-                        print("Simulating a game crash now...")
-                        crash_variable = 10 / 0
+                    # Let's simulate a random, unexpected crash happening in our game logic
+                    # If you press SPACE, we divide by zero to trigger an exception!
+                    print("Simulating a game crash now...")
+                    crash_variable = 10 / 0
 
-                    elif event.key == pygame.K_ESCAPE:
-                        running = False
+                elif event.key == pygame.K_ESCAPE:
+                    return False
+        return True
 
-            # --- STEP 2: GAME LOGIC ---
-            # (Game logic updates would go here)
+    # --- STEP 2: GAME LOGIC (fixed steps) and STEP 3: DRAWING (interpolated) ---
+    loop = FixedStepLoop(world.update, renderer.render, handle_events,
+                         updates_per_second=args.updates_per_second, fps=args.fps,
+                         free_run=args.headless)
+    print("Game started. Try pressing SPACE, ESCAPE, or clicking the mouse!")
 
-            # --- STEP 3: DRAWING ---
-            screen.fill((0, 0, 0))
-            pygame.display.flip()
-            clock.tick(60)
+    # 2. THE GLOBAL WRAPPER (Guaranteed Cleanup)
+    # ---------------------------------------------------------
+    # We wrap the entire game loop in a try-finally block.
+    start = time.perf_counter()
+    try:
+        loop.run(args.frames)
 
     # Catching any unexpected runtime errors during gameplay
     except Exception as e:
@@ -69,6 +292,10 @@ def main():
     # The 'finally' block is our safety net.
     # It runs if the game ends normally OR if it crashes.
     finally:
+        print(loop.report(time.perf_counter() - start))
+        assets.wait(timeout=5.0)  # a short run can end before the loader does
+        print(assets.report())
+        assets.close()
         # ---------------------------------------------------------
         # CLEANUP PHASE
         # ---------------------------------------------------------
@@ -78,4 +305,4 @@ def main():
 
 # Python best practice: only run the main loop if this script is executed directly
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
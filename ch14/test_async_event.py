@@ -0,0 +1,109 @@
+"""
+Tests for async_event.py.
+
+Usage:    python -m pytest test_async_event.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_event import AsyncEventDispatcher, AsyncEventLoop
+from event import Event
+
+def test_dispatch_batch_awaits_every_listener():
+    dispatcher = AsyncEventDispatcher()
+    seen, batches = [], []
+
+    async def slow(event):
+        await asyncio.sleep(0)
+        seen.append(("async", event.data))
+
+    async def batch_listener(events):
+        await asyncio.sleep(0)
+        batches.append([event.data for event in events])
+
+    dispatcher.register("tick", slow)
+    dispatcher.register("tick", lambda event: seen.append(("plain", event.data)))
+    dispatcher.register_batch("tick", batch_listener)
+
+    asyncio.run(dispatcher.dispatch_batch([Event("tick", 1), Event("tick", 2)]))
+    assert seen == [("async", 1), ("plain", 1), ("async", 2), ("plain", 2)]
+    assert batches == [[1, 2]]
+
+def test_dispatch_batch_reports_errors():
+    dispatcher = AsyncEventDispatcher()
+
+    async def failing(event):
+        raise RuntimeError(f"bad {event.data}")
+
+    dispatcher.register("tick", failing)
+    errors = []
+    asyncio.run(dispatcher.dispatch_batch([Event("tick", 1), Event("tick", 2)],
+                                          on_error=errors.append))
+    assert [str(e) for e in errors] == ["bad 1", "bad 2"]
+    with pytest.raises(RuntimeError):
+        asyncio.run(dispatcher.dispatch_batch([Event("tick", 3)]))
+
+def test_profiler_times_whole_coroutine_listeners():
+    dispatcher = AsyncEventDispatcher()
+
+    async def blocking(event):
+        time.sleep(0.02)  # before the first await: holds up the loop
+        await asyncio.sleep(0)
+
+    async def failing_late(event):
+        await asyncio.sleep(0)
+        raise RuntimeError("late")
+
+    dispatcher.register("tick", blocking)
+    dispatcher.register("tick", failing_late)
+    profiler = dispatcher.instrument(budget=0.01)
+    errors = []
+    asyncio.run(dispatcher.dispatch_batch([Event("tick", i) for i in range(3)],
+                                          on_error=errors.append))
+    stats = profiler.snapshot()["tick"]
+    slow = stats[blocking.__qualname__]
+    assert (slow["calls"], slow["errors"], slow["over_budget"]) == (3, 0, 3)
+    assert slow["p50"] >= 0.015
+    late = stats[failing_late.__qualname__]
+    assert (late["calls"], late["errors"]) == (3, 3)
+    assert len(errors) == 3
+
+    dispatcher.uninstrument()
+    assert dispatcher._listeners["tick"] == [blocking, failing_late]
+
+def test_loop_takes_events_put_before_it_runs():
+    dispatcher = AsyncEventDispatcher()
+    seen = []
+    dispatcher.register("tick", lambda event: seen.append(event.data))
+    loop = AsyncEventLoop(dispatcher)
+    producer = threading.Thread(target=lambda: [loop.enqueue_event(Event("tick", i))
+                                                for i in range(1000)])
+    producer.start()  # races with run() taking the loop below
+    consumer = threading.Thread(target=asyncio.run, args=(loop.run(),), daemon=True)
+    consumer.start()
+    producer.join()
+    loop.stop()
+    consumer.join(timeout=5)
+    assert not consumer.is_alive()
+    assert seen == list(range(1000))
+
+def test_loop_delivers_batch_listeners():
+    dispatcher = AsyncEventDispatcher()
+    batches = []
+
+    async def batch_listener(events):
+        await asyncio.sleep(0)
+        batches.append([event.data for event in events])
+
+    dispatcher.register_batch("tick", batch_listener)
+    loop = AsyncEventLoop(dispatcher)
+    for i in range(5):
+        loop.enqueue_event(Event("tick", i))
+    loop.enqueue_event(Event("other"))
+    loop.stop()
+    asyncio.run(loop.run())
+    assert batches == [[0, 1, 2, 3, 4]]
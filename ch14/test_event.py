@@ -0,0 +1,150 @@
+"""
+Tests for event.py.
+
+Usage:    python -m pytest test_event.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from event import Event, EventDispatcher, EventLoop, EventQueue, ShardedDispatcher
+
+@pytest.mark.parametrize("overflow", ["drop_oldest", "coalesce"])
+def test_forced_items_survive_overflow(overflow):
+    queue = EventQueue(capacity=2, overflow=overflow)
+    queue.put("a", key="a")
+    queue.put("b", key="b")
+    queue.put("STOP", key="a", force=True)  # neither dropped nor merged later
+    for i in range(10):
+        assert queue.put(f"x{i}", key=f"x{i}")
+    batch = list(queue.get_batch())
+    assert "STOP" in batch
+    assert batch[-2:] == ["x8", "x9"]  # the capacity still holds for the rest
+    assert queue.dropped == 10
+
+@pytest.mark.parametrize("overflow", ["drop_oldest", "coalesce"])
+def test_stop_ends_loop_on_full_queue(overflow):
+    loop = EventLoop(EventDispatcher(), capacity=4, overflow=overflow)
+    for i in range(4):
+        loop.enqueue_event(Event("tick", i, key=i))
+    loop.stop()
+    for i in range(100):  # producers keep going after stop()
+        loop.enqueue_event(Event("tick", i, key=i + 4))
+    thread = threading.Thread(target=loop.run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+@pytest.mark.parametrize("interval", [0, -1.0])
+def test_schedule_every_rejects_non_positive_interval(interval):
+    loop = EventLoop(EventDispatcher())
+    with pytest.raises(ValueError):
+        loop.schedule_every(Event("tick"), interval)
+    assert loop.stats()["pending_timers"] == 0
+
+def test_schedule_every_repeats():
+    dispatcher = EventDispatcher()
+    loop = EventLoop(dispatcher)
+    ticks = []
+    dispatcher.register("tick", ticks.append)
+
+    def stop_after_three(event):
+        if len(ticks) >= 3:
+            loop.stop()
+
+    dispatcher.register("tick", stop_after_three)
+    loop.schedule_every(Event("tick"), 0.001)
+    thread = threading.Thread(target=loop.run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive() and len(ticks) >= 3
+
+def test_latency_includes_slow_listeners_of_the_batch():
+    dispatcher = EventDispatcher()
+    dispatcher.register("slow", lambda event: time.sleep(0.05))
+    loop = EventLoop(dispatcher)
+    loop.enqueue_event(Event("slow"))
+    loop.enqueue_event(Event("fast"))  # dispatched after the slow listener
+    loop.stop()
+    loop.run()
+    assert loop.stats()["events_dispatched"] == 2
+    assert loop.latency_percentile(0) >= 0.05
+    assert loop.max_latency >= 0.05
+
+class FiringLock:
+    """A timer lock that lets the loop fire due timers first, once: as if
+    the loop thread got the lock just before cancel() did."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.lock = threading.Lock()
+        self.armed = True
+
+    def __enter__(self):
+        if self.armed:
+            self.armed = False
+            self.loop._due_timers(time.perf_counter())
+        self.lock.acquire()
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+@pytest.mark.parametrize("periodic", [False, True])
+def test_cancel_while_timer_fires(periodic):
+    loop = EventLoop(EventDispatcher())
+    if periodic:
+        handle = loop.schedule_every(Event("tick"), 60, delay=0)
+    else:
+        handle = loop.schedule(Event("tick"), 0)
+    loop._timer_lock = FiringLock(loop)
+    handle.cancel()
+    assert loop.timers_fired == 1
+    assert handle.cancelled == periodic  # a one-shot timer that ran stays done
+    loop._next_timeout(time.perf_counter())  # drops the cancelled entry
+    assert loop.stats()["pending_timers"] == 0
+
+@pytest.mark.parametrize("capacity", [0, -1])
+def test_queue_rejects_capacity_below_one(capacity):
+    with pytest.raises(ValueError):
+        EventQueue(capacity, "block")
+    with pytest.raises(ValueError):
+        EventLoop(EventDispatcher(), capacity=capacity, overflow="drop_oldest")
+
+def test_sharded_dispatch_keeps_order_per_partition():
+    dispatcher = ShardedDispatcher(workers=3, partition_key=lambda event: event.data[0])
+    seen = {}
+    threads = {}
+    batches = []
+
+    def record(event):
+        user, n = event.data
+        time.sleep(0.001 * (user == 0))  # one slow partition
+        seen.setdefault(user, []).append(n)
+        threads.setdefault(user, set()).add(threading.current_thread().name)
+
+    dispatcher.register("click", record)
+    dispatcher.register_batch("click", lambda events: batches.append(len(events)))
+    try:
+        for n in range(50):
+            for user in range(6):
+                dispatcher.dispatch(Event("click", (user, n)))
+    finally:
+        dispatcher.close()
+    assert seen == {user: list(range(50)) for user in range(6)}
+    assert all(len(names) == 1 for names in threads.values())  # one shard each
+    assert len(set.union(*threads.values())) > 1
+    assert sum(batches) == sum(dispatcher.processed) == 300
+
+def test_sharded_processes_cannot_be_instrumented():
+    dispatcher = ShardedDispatcher(workers=1, use_processes=True)
+    try:
+        with pytest.raises(RuntimeError):
+            dispatcher.instrument()
+        dispatcher.register("tick", repr)  # picklable, runs in the shard process
+        for i in range(5):
+            dispatcher.dispatch(Event("tick", [i]))
+    finally:
+        dispatcher.close()
+    assert dispatcher.processed == [5]